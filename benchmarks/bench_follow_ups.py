@@ -0,0 +1,93 @@
+"""Follow-up task generation for 10k flagged portal records.
+
+Compares ``TaskManager.ensure_follow_up_tasks`` with the original
+per-record loop: one ``fetch_task_by_title`` lookup (without
+``idx_tasks_title``) and one ``upsert_task`` per new task. Run it with the
+package installed (``pip install -e .``):
+
+    python benchmarks/bench_follow_ups.py [--records 10000] >> bench_output.txt
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Sequence
+
+from campus_connect_portal.models import PortalRecord, Task
+from campus_connect_portal.storage import Storage
+from campus_connect_portal.tasks import TaskManager
+
+
+def flagged_records(count: int) -> list[PortalRecord]:
+    return [
+        PortalRecord(
+            record_id=f"r{n}",
+            course="CSC 101",
+            component=f"Assignment {n}",
+            grade=None,
+            points=None,
+            campus_area="Financial Aid" if n % 4 == 0 else "Grades",
+            needs_follow_up=True,
+            notes="Check the rubric feedback",
+        )
+        for n in range(count)
+    ]
+
+
+def per_record_loop(storage: Storage, records: Sequence[PortalRecord]) -> list[Task]:
+    """The original implementation, kept here as the baseline."""
+    created = []
+    for record in records:
+        if not record.needs_follow_up:
+            continue
+        title = f"Follow up: {record.component}"
+        if storage.fetch_task_by_title(title):
+            continue
+        task = Task(
+            title=title,
+            description=record.notes or f"Review {record.course or 'record'} in Campus Connect.",
+            status="todo",
+            priority="high" if record.campus_area == "Financial Aid" else "medium",
+        )
+        storage.upsert_task(task.to_row())
+        created.append(task)
+    return created
+
+
+def run(count: int) -> dict[str, dict[str, float]]:
+    """Milliseconds for a first (all new) and a repeated (all existing) pass."""
+    records = flagged_records(count)
+    results: dict[str, dict[str, float]] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        baseline = Storage(Path(tmp) / "baseline.db")
+        with baseline.connection() as conn:
+            conn.execute("DROP INDEX IF EXISTS idx_tasks_title")
+        set_based = Storage(Path(tmp) / "set-based.db", persistent=True)
+        generators: dict[str, Callable[[], list[Task]]] = {
+            "per-record loop": lambda: per_record_loop(baseline, records),
+            "ensure_follow_up_tasks": lambda: TaskManager(set_based).ensure_follow_up_tasks(records),
+        }
+        for name, generate in generators.items():
+            for phase in ("new", "existing"):
+                started = time.perf_counter()
+                generate()
+                results.setdefault(name, {})[phase] = (time.perf_counter() - started) * 1000
+        set_based.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=10_000, help="Flagged records to process.")
+    args = parser.parse_args()
+    print(f"{args.records:,} flagged records")
+    print(f"{'implementation':<24}{'all new ms':>12}{'all existing ms':>17}")
+    for name, phases in run(args.records).items():
+        print(f"{name:<24}{phases['new']:>12,.0f}{phases['existing']:>17,.0f}")
+
+
+if __name__ == "__main__":
+    main()
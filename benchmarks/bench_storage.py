@@ -0,0 +1,62 @@
+"""Storage throughput with per-call connections versus persistent ones.
+
+Per-call mode (``Storage()``) is the original behaviour: every helper opens,
+configures, commits and closes its own SQLite connection. Persistent mode
+(``Storage(persistent=True)``) keeps one connection per thread. Run it with
+the package installed (``pip install -e .``):
+
+    python benchmarks/bench_storage.py [--ops 2000] >> bench_output.txt
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+from campus_connect_portal.models import ChatMessage, KnowledgeEntry
+from campus_connect_portal.storage import Storage
+
+
+def _workloads(storage: Storage) -> dict[str, Callable[[int], None]]:
+    return {
+        "upsert_knowledge": lambda n: storage.upsert_knowledge(
+            KnowledgeEntry(title=f"Note {n}", content="Office hours moved to Friday").to_row()
+        ),
+        "insert_chat_message": lambda n: storage.insert_chat_message(
+            ChatMessage(session_id="bench", role="user", content=f"question {n}").to_row()
+        ),
+        "fetch_task_by_title": lambda n: storage.fetch_task_by_title(f"Task {n}"),
+        "fetch_tasks": lambda n: storage.fetch_tasks(limit=20),
+    }
+
+
+def run(ops: int) -> dict[str, dict[str, float]]:
+    """Ops/sec per workload for ``per-call`` and ``persistent`` storage."""
+    results: dict[str, dict[str, float]] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode, persistent in (("per-call", False), ("persistent", True)):
+            with Storage(Path(tmp) / f"{mode}.db", persistent=persistent) as storage:
+                for name, call in _workloads(storage).items():
+                    started = time.perf_counter()
+                    for n in range(ops):
+                        call(n)
+                    elapsed = time.perf_counter() - started
+                    results.setdefault(name, {})[mode] = ops / elapsed
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ops", type=int, default=2000, help="Calls per workload.")
+    args = parser.parse_args()
+    print(f"{'workload':<22}{'per-call ops/s':>16}{'persistent ops/s':>18}{'speedup':>9}")
+    for name, modes in run(args.ops).items():
+        before, after = modes["per-call"], modes["persistent"]
+        print(f"{name:<22}{before:>16,.0f}{after:>18,.0f}{after / before:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,16 @@
 """Campus Connect Grading Portal Interface package."""
 
-from importlib import metadata
+__all__ = ["__version__"]
 
-try:
-    __version__ = metadata.version("campus-connect-grading-portal-interface")
-except metadata.PackageNotFoundError:  # pragma: no cover - local dev
-    __version__ = "0.0.0"
 
-__all__ = ["__version__"]
+def __getattr__(name: str) -> str:
+    # Resolved on demand: importlib.metadata is slow to import and the CLI
+    # never needs the version on its hot path.
+    if name != "__version__":
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import metadata
+
+    try:
+        return metadata.version("campus-connect-grading-portal-interface")
+    except metadata.PackageNotFoundError:  # pragma: no cover - local dev
+        return "0.0.0"
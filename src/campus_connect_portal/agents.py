@@ -2,14 +2,49 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Sequence
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor, wait
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, Sequence
 
+from .config import LLM_CONCURRENCY, RETRIEVAL_TIMEOUT, RETRIEVAL_WORKERS
+from .context import ContextBuilder, PromptContext
 from .llm import LLMClient
 from .models import KnowledgeEntry, Task
 from .pkms import KnowledgeBase
+from .storage import Storage
 from .tasks import TaskManager
 
+LOGGER = logging.getLogger(__name__)
+
+RETRIEVER_KINDS = ("knowledge", "tasks")
+
+_EXECUTOR: ThreadPoolExecutor | None = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def retrieval_executor() -> ThreadPoolExecutor:
+    """Process-wide pool shared by every agent, created on first use."""
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(
+                RETRIEVAL_WORKERS, thread_name_prefix="campus-connect-retrieval"
+            )
+        return _EXECUTOR
+
+
+@dataclass(slots=True)
+class Retriever:
+    name: str
+    kind: str  # which AgentResult list the hits are merged into
+    retrieve: Callable[[str, int], list]
+    limit: int = 3
+
 
 @dataclass(slots=True)
 class AgentResult:
@@ -18,6 +53,11 @@ class AgentResult:
     knowledge: list[KnowledgeEntry]
     tasks: list[Task]
     suggested_actions: list[str]
+    # Milliseconds per retriever (timed-out ones report the budget) plus
+    # "llm" and, when streamed, "first_token".
+    timings: dict[str, float] = field(default_factory=dict)
+    degraded: list[str] = field(default_factory=list)
+    prompt_tokens: int = 0  # estimated system plus user prompt tokens sent
 
 
 class KnowledgeAgent:
@@ -33,24 +73,11 @@ class TaskAgent:
         self.task_manager = task_manager or TaskManager()
 
     def retrieve(self, query: str, limit: int = 3) -> list[Task]:
-        tasks = self.task_manager.list_tasks(limit=50)
-        query_lower = query.lower()
-        scored: list[tuple[float, Task]] = []
-        for task in tasks:
-            score = 0.0
-            if query_lower in task.title.lower():
-                score += 2.5
-            if query_lower in task.description.lower():
-                score += 1.5
-            if task.status != "done":
-                score += 1.0
-            if score > 0:
-                scored.append((score, task))
-        if not scored:
-            # fall back to TODO tasks
-            scored = [(1.0, task) for task in tasks[:limit]]
-        scored.sort(key=lambda item: item[0], reverse=True)
-        return [task for _, task in scored[:limit]]
+        return self.task_manager.search_tasks(query, limit=limit)
+
+    def next_up(self, query: str, limit: int = 3) -> list[Task]:
+        """The scheduler's next-up tasks; ``query`` is ignored."""
+        return self.task_manager.next_tasks(limit)
 
 
 class CampusConnectAgent:
@@ -62,16 +89,245 @@ class CampusConnectAgent:
         knowledge_agent: KnowledgeAgent | None = None,
         task_agent: TaskAgent | None = None,
         llm_client: LLMClient | None = None,
+        context_builder: ContextBuilder | None = None,
     ):
-        self.knowledge_agent = knowledge_agent or KnowledgeAgent()
-        self.task_agent = task_agent or TaskAgent()
+        if knowledge_agent is None or task_agent is None:
+            # Missing agents share the other one's storage (see answer_many).
+            if knowledge_agent is not None:
+                storage = knowledge_agent.knowledge_base.storage
+            elif task_agent is not None:
+                storage = task_agent.task_manager.storage
+            else:
+                storage = Storage()
+            knowledge_agent = knowledge_agent or KnowledgeAgent(KnowledgeBase(storage))
+            task_agent = task_agent or TaskAgent(TaskManager(storage))
+        self.knowledge_agent = knowledge_agent
+        self.task_agent = task_agent
         self.llm_client = llm_client or LLMClient()
+        self.context_builder = context_builder or ContextBuilder()
+        self.retrievers: dict[str, Retriever] = {}
+        self.register_retriever("knowledge", self.knowledge_agent.retrieve, kind="knowledge")
+        self.register_retriever("tasks", self.task_agent.retrieve, kind="tasks")
+        self.register_retriever("next_tasks", self.task_agent.next_up, kind="tasks")
+
+    def register_retriever(
+        self,
+        name: str,
+        retrieve: Callable[[str, int], list],
+        *,
+        kind: str,
+        limit: int = 3,
+    ) -> None:
+        """Add (or replace) a retriever queried on every :meth:`answer`."""
+        if kind not in RETRIEVER_KINDS:
+            raise ValueError(f"Unsupported retriever kind: {kind}")
+        self.retrievers[name] = Retriever(name=name, kind=kind, retrieve=retrieve, limit=limit)
+
+    def answer(
+        self,
+        prompt: str,
+        *,
+        timeout: float = RETRIEVAL_TIMEOUT,
+        on_token: Callable[[str], None] | None = None,
+        history: Sequence[str] = (),
+    ) -> AgentResult:
+        """Answer ``prompt``; with ``on_token`` the answer is streamed into it.
+
+        ``history`` is the conversation so far, e.g. from
+        ``ConversationMemory.lines()``. Streaming adds ``first_token``
+        (milliseconds from the start of the answer) to the result timings;
+        ``llm`` is the full generation time.
+        """
+        started = time.perf_counter()
+        hits, timings, degraded = self._retrieve(prompt, timeout)
+        context = self._build_context(prompt, hits, history)
+        llm_started = time.perf_counter()
+        if on_token is None:
+            answer = self.llm_client.respond(
+                context.system_prompt, context.user_prompt, ref_ids=self._ref_ids(context)
+            )
+        else:
+            parts: list[str] = []
+            for delta in self.llm_client.stream(
+                context.system_prompt, context.user_prompt, ref_ids=self._ref_ids(context)
+            ):
+                if not parts:
+                    timings["first_token"] = (time.perf_counter() - started) * 1000
+                parts.append(delta)
+                on_token(delta)
+            answer = "".join(parts)
+        timings["llm"] = (time.perf_counter() - llm_started) * 1000
+        return self._result(answer, context, timings, degraded)
+
+    async def answer_async(
+        self,
+        prompt: str,
+        executor: Executor | None = None,
+        *,
+        timeout: float = RETRIEVAL_TIMEOUT,
+        history: Sequence[str] = (),
+    ) -> AgentResult:
+        """Async variant of :meth:`answer` for hosting many sessions on one loop.
+
+        Retrievers and response-cache calls run on ``executor`` (pass the
+        bounded pool from ``AsyncStorage`` to cap SQLite work); the LLM call
+        is awaited without blocking other sessions.
+        """
+        loop = asyncio.get_running_loop()
+        retrievers = list(self.retrievers.values())
+        started = time.perf_counter()
+        outcomes = await asyncio.gather(
+            *(
+                asyncio.wait_for(
+                    loop.run_in_executor(executor, self._timed, retriever, prompt), timeout
+                )
+                for retriever in retrievers
+            ),
+            return_exceptions=True,
+        )
+        hits, timings, degraded = self._merge(retrievers, outcomes, started)
+        context = self._build_context(prompt, hits, history)
+        answer = await self.llm_client.respond_async(
+            context.system_prompt,
+            context.user_prompt,
+            ref_ids=self._ref_ids(context),
+            executor=executor,
+        )
+        return self._result(answer, context, timings, degraded)
+
+    def answer_many(
+        self,
+        prompts: Sequence[str],
+        *,
+        concurrency: int = LLM_CONCURRENCY,
+    ) -> list[AgentResult]:
+        """Answer a batch of questions (e.g. a nightly digest), in order.
+
+        Each distinct prompt is retrieved and answered once. All retrieval
+        happens in one read transaction so every answer sees the same
+        snapshot of notes and tasks; the LLM requests then run
+        ``concurrency`` at a time. Repeated prompts share one result.
+
+        The snapshot spans notes and tasks only when the knowledge and task
+        agents use the same ``Storage`` object; separate storages each get
+        their own read transaction.
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        unique = list(dict.fromkeys(prompts))
+        retrievers = list(self.retrievers.values())
+        retrieved = {}
+        with self._snapshot():
+            for prompt in unique:
+                started = time.perf_counter()
+                outcomes = [self._timed(retriever, prompt) for retriever in retrievers]
+                retrieved[prompt] = self._merge(retrievers, outcomes, started)
+
+        def respond(prompt: str) -> AgentResult:
+            hits, timings, degraded = retrieved[prompt]
+            context = self._build_context(prompt, hits)
+            started = time.perf_counter()
+            answer = self.llm_client.respond(
+                context.system_prompt, context.user_prompt, ref_ids=self._ref_ids(context)
+            )
+            timings["llm"] = (time.perf_counter() - started) * 1000
+            return self._result(answer, context, timings, degraded)
+
+        workers = max(1, min(concurrency, len(unique)))
+        with ThreadPoolExecutor(workers, thread_name_prefix="campus-connect-llm") as pool:
+            answers = dict(zip(unique, pool.map(respond, unique)))
+        return [answers[prompt] for prompt in prompts]
+
+    @contextmanager
+    def _snapshot(self) -> Iterator[None]:
+        """Hold one read transaction per backing storage for the block."""
+        storages = {
+            id(storage): storage
+            for storage in (
+                self.knowledge_agent.knowledge_base.storage,
+                self.task_agent.task_manager.storage,
+            )
+        }
+        with ExitStack() as stack:
+            for storage in storages.values():
+                conn = stack.enter_context(storage.connection())
+                if not conn.in_transaction:
+                    conn.execute("BEGIN")
+            yield
+
+    def _retrieve(
+        self, prompt: str, timeout: float
+    ) -> tuple[dict[str, list], dict[str, float], list[str]]:
+        """Fan out to every retriever and wait at most ``timeout`` seconds.
+
+        Retrievers that miss the budget or raise contribute no hits; they are
+        listed in ``degraded`` instead of stalling the answer. A straggler
+        keeps its pool thread until it returns on its own.
+        """
+        retrievers = list(self.retrievers.values())
+        started = time.perf_counter()
+        executor = retrieval_executor()
+        futures = [executor.submit(self._timed, retriever, prompt) for retriever in retrievers]
+        wait(futures, timeout=timeout)
+        outcomes = []
+        for future in futures:
+            if future.done():
+                outcomes.append(future.result())
+            else:
+                future.cancel()
+                outcomes.append(TimeoutError())
+        return self._merge(retrievers, outcomes, started)
+
+    @staticmethod
+    def _ref_ids(context: PromptContext) -> list[str]:
+        return [entry.id for entry in context.knowledge] + [task.id for task in context.tasks]
 
-    def answer(self, prompt: str) -> AgentResult:
-        knowledge_hits = self.knowledge_agent.retrieve(prompt, limit=3)
-        task_hits = self.task_agent.retrieve(prompt, limit=3)
-        context = self._build_context(prompt, knowledge_hits, task_hits)
-        answer = self.llm_client.respond(*context)
+    @staticmethod
+    def _timed(retriever: Retriever, prompt: str) -> tuple[list | Exception, float]:
+        started = time.perf_counter()
+        try:
+            hits = retriever.retrieve(prompt, retriever.limit)
+        except Exception as exc:
+            hits = exc
+        return hits, (time.perf_counter() - started) * 1000
+
+    @staticmethod
+    def _merge(
+        retrievers: Sequence[Retriever], outcomes: Sequence, started: float
+    ) -> tuple[dict[str, list], dict[str, float], list[str]]:
+        hits: dict[str, list] = {kind: [] for kind in RETRIEVER_KINDS}
+        seen: set[str] = set()
+        timings: dict[str, float] = {}
+        degraded: list[str] = []
+        for retriever, outcome in zip(retrievers, outcomes):
+            if isinstance(outcome, BaseException):  # missed the budget
+                timings[retriever.name] = (time.perf_counter() - started) * 1000
+                degraded.append(retriever.name)
+                continue
+            items, timings[retriever.name] = outcome
+            if isinstance(items, Exception):
+                LOGGER.warning("Retriever %s failed: %s", retriever.name, items)
+                degraded.append(retriever.name)
+                continue
+            for item in items:
+                if item.id not in seen:
+                    seen.add(item.id)
+                    hits[retriever.kind].append(item)
+        return hits, timings, degraded
+
+    def _build_context(
+        self, prompt: str, hits: dict[str, list], history: Sequence[str] = ()
+    ) -> PromptContext:
+        return self.context_builder.build(prompt, hits["knowledge"], hits["tasks"], history)
+
+    def _result(
+        self,
+        answer: str,
+        context: PromptContext,
+        timings: dict[str, float],
+        degraded: list[str],
+    ) -> AgentResult:
+        knowledge_hits, task_hits = context.knowledge, context.tasks
         citations = [entry.id for entry in knowledge_hits] + [task.id for task in task_hits]
         suggested_actions = [
             f"Advance task '{task.title}' (status: {task.status})" for task in task_hits
@@ -82,31 +338,7 @@ class CampusConnectAgent:
             knowledge=knowledge_hits,
             tasks=task_hits,
             suggested_actions=suggested_actions,
+            timings=timings,
+            degraded=degraded,
+            prompt_tokens=context.tokens,
         )
-
-    def _build_context(
-        self,
-        prompt: str,
-        knowledge_hits: Sequence[KnowledgeEntry],
-        task_hits: Sequence[Task],
-    ) -> tuple[str, str]:
-        system_prompt = (
-            "You are a helpful academic success coach for DePaul University students. "
-            "Use the provided knowledge entries and tasks to answer user questions. "
-            "Cite concrete action items and stay concise."
-        )
-        knowledge_block = "\n".join(
-            f"- [{entry.id}] {entry.title} ({', '.join(entry.tags) or 'untagged'}): {entry.content}"
-            for entry in knowledge_hits
-        ) or "No knowledge entries yet."
-        task_block = "\n".join(
-            f"- [{task.id}] {task.title} (status={task.status}, priority={task.priority}) — {task.description}"
-            for task in task_hits
-        ) or "No tasks found."
-        user_prompt = (
-            f"Question: {prompt}\n\n"
-            f"Knowledge entries:\n{knowledge_block}\n\n"
-            f"Tasks:\n{task_block}\n\n"
-            "Respond with 2-3 sentences highlighting risks, upcoming deadlines, and a suggested next step."
-        )
-        return system_prompt, user_prompt
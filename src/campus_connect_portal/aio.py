@@ -0,0 +1,146 @@
+"""asyncio surface for hosting many chat sessions in one process."""
+
+from __future__ import annotations
+
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Sequence, TypeVar
+from uuid import uuid4
+
+from .agents import AgentResult, CampusConnectAgent, KnowledgeAgent, TaskAgent
+from .cache import ResponseCache
+from .config import ASYNC_DB_WORKERS
+from .llm import LLMClient
+from .memory import ConversationMemory
+from .models import ChatMessage
+from .pkms import KnowledgeBase
+from .storage import Storage
+from .tasks import TaskManager
+
+T = TypeVar("T")
+
+DEFAULT_LOAD_TEST_PROMPTS = (
+    "What should I follow up on before finals?",
+    "Any financial aid deadlines coming up?",
+    "Which grades changed recently?",
+)
+
+
+class AsyncStorage:
+    """Runs ``Storage`` calls on a bounded thread pool.
+
+    The wrapped storage is persistent, so each worker thread keeps one
+    connection. At most ``max_workers`` connections exist as long as all
+    SQLite work goes through :attr:`executor`; ``AsyncChatSession`` passes it
+    to the agent for retrieval and response-cache calls.
+    """
+
+    def __init__(self, storage: Storage | None = None, *, max_workers: int = ASYNC_DB_WORKERS):
+        self.storage = storage or Storage(persistent=True)
+        self.executor = ThreadPoolExecutor(max_workers, thread_name_prefix="campus-connect-db")
+
+    async def __aenter__(self) -> "AsyncStorage":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.close()
+
+    async def run(self, func: Callable[..., T], /, *args: Any, **kwargs: Any) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(func, *args, **kwargs))
+
+    async def fetch_knowledge(self, limit: int = 50):
+        return await self.run(self.storage.fetch_knowledge, limit=limit)
+
+    async def fetch_tasks(self, status: str | None = None, limit: int = 50):
+        return await self.run(self.storage.fetch_tasks, status=status, limit=limit)
+
+    async def insert_chat_message(self, message_row: Sequence) -> None:
+        await self.run(self.storage.insert_chat_message, message_row)
+
+    async def fetch_chat_history(self, session_id: str, limit: int = 20):
+        return await self.run(self.storage.fetch_chat_history, session_id, limit=limit)
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
+        self.storage.close()
+
+
+class AsyncChatSession:
+    """Non-interactive chat session driven by ``await ask(prompt)``."""
+
+    def __init__(self, storage: AsyncStorage, *, agent: CampusConnectAgent | None = None):
+        self.storage = storage
+        self.agent = agent or build_agent(storage.storage)
+        self.session_id = str(uuid4())
+        self.memory = ConversationMemory(self.session_id)
+
+    async def ask(self, prompt: str) -> AgentResult:
+        await self._log("user", prompt)
+        result = await self.agent.answer_async(
+            prompt, executor=self.storage.executor, history=self.memory.lines()
+        )
+        await self._log("assistant", result.answer, result.citations)
+        self.memory.add("user", prompt)
+        self.memory.add("assistant", result.answer)
+        return result
+
+    async def _log(self, role: str, content: str, citations: list[str] | None = None) -> None:
+        message = ChatMessage(
+            session_id=self.session_id,
+            role=role,
+            content=content,
+            citations=citations or [],
+        )
+        await self.storage.insert_chat_message(message.to_row())
+
+
+def build_agent(storage: Storage, llm_client: LLMClient | None = None) -> CampusConnectAgent:
+    return CampusConnectAgent(
+        knowledge_agent=KnowledgeAgent(knowledge_base=KnowledgeBase(storage=storage)),
+        task_agent=TaskAgent(task_manager=TaskManager(storage=storage)),
+        llm_client=llm_client or LLMClient(cache=ResponseCache(storage)),
+    )
+
+
+async def run_load_test(
+    storage: AsyncStorage,
+    *,
+    sessions: int,
+    turns: int,
+    prompts: Sequence[str] = DEFAULT_LOAD_TEST_PROMPTS,
+) -> dict[str, float]:
+    """Drive ``sessions`` concurrent sessions for ``turns`` questions each.
+
+    Returns turn-latency percentiles in milliseconds plus overall throughput.
+    """
+    if sessions < 1 or turns < 1:
+        raise ValueError("sessions and turns must be at least 1")
+    agent = build_agent(storage.storage)
+    latencies: list[float] = []
+
+    async def drive(index: int) -> None:
+        session = AsyncChatSession(storage, agent=agent)
+        for turn in range(turns):
+            started = time.perf_counter()
+            await session.ask(prompts[(index + turn) % len(prompts)])
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(drive(index) for index in range(sessions)))
+    elapsed = time.perf_counter() - started
+    if len(latencies) > 1:
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+        p50, p99 = cuts[49], cuts[98]
+    else:
+        p50 = p99 = latencies[0]
+    return {
+        "turns": len(latencies),
+        "elapsed_s": elapsed,
+        "turns_per_s": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": p50 * 1000,
+        "p99_ms": p99 * 1000,
+    }
@@ -0,0 +1,136 @@
+"""Two-tier cache for LLM responses: an in-memory LRU backed by SQLite."""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Iterable
+
+from .config import LLM_CACHE_MAX_ROWS, LLM_CACHE_SIZE, LLM_CACHE_TTL
+from .storage import Storage
+
+
+def cache_key(model: str, system_prompt: str, user_prompt: str) -> str:
+    digest = hashlib.sha256()
+    for part in (model, system_prompt, user_prompt):
+        digest.update(hashlib.sha256(part.encode("utf-8")).digest())
+    return digest.hexdigest()
+
+
+@dataclass(slots=True)
+class CacheStats:
+    memory_hits: int = 0
+    db_hits: int = 0
+    misses: int = 0
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.db_hits
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ResponseCache:
+    """Caches responses keyed on model plus prompt hashes.
+
+    Entries expire after ``ttl`` seconds. The memory tier keeps the
+    ``max_entries`` most recently used responses; the SQLite tier (only when
+    a ``storage`` is given) keeps ``max_rows`` and survives restarts. Schema
+    triggers drop a stored response as soon as a knowledge entry or task it
+    cited is updated or deleted, so memory hits are confirmed against the
+    table with a primary-key probe before being served.
+    """
+
+    def __init__(
+        self,
+        storage: Storage | None = None,
+        *,
+        max_entries: int = LLM_CACHE_SIZE,
+        max_rows: int = LLM_CACHE_MAX_ROWS,
+        ttl: float = LLM_CACHE_TTL,
+    ):
+        self.storage = storage
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._entries: OrderedDict[str, tuple[float, str, frozenset[str]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        fresh_after = now - self.ttl
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > fresh_after:
+                    self._entries.move_to_end(key)
+                else:
+                    del self._entries[key]
+                    entry = None
+        if entry is not None:
+            if self.storage is None or self.storage.has_cached_response(key, fresh_after):
+                with self._lock:
+                    self.stats.memory_hits += 1
+                return entry[1]
+            self._forget(key)
+        if self.storage is not None:
+            response = self.storage.fetch_cached_response(key, fresh_after, now)
+            if response is not None:
+                with self._lock:
+                    self.stats.db_hits += 1
+                    self._remember(key, now, response, frozenset())
+                return response
+        with self._lock:
+            self.stats.misses += 1
+        return None
+
+    def put(self, key: str, model: str, response: str, ref_ids: Iterable[str] = ()) -> None:
+        """Store ``response``; it is dropped once any of ``ref_ids`` is written."""
+        now = time.time()
+        ref_ids = frozenset(ref_ids)
+        with self._lock:
+            self._remember(key, now, response, ref_ids)
+        if self.storage is not None:
+            self.storage.save_cached_response(
+                key,
+                model,
+                response,
+                ref_ids,
+                now=now,
+                fresh_after=now - self.ttl,
+                max_rows=self.max_rows,
+            )
+
+    def invalidate(self, ref_ids: Iterable[str]) -> int:
+        """Drop memory entries citing any of ``ref_ids``; return how many.
+
+        Only needed without a storage tier; with one, the schema triggers
+        already remove the stored rows.
+        """
+        ref_ids = set(ref_ids)
+        with self._lock:
+            stale = [key for key, entry in self._entries.items() if entry[2] & ref_ids]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _remember(self, key: str, now: float, response: str, ref_ids: frozenset[str]) -> None:
+        self._entries[key] = (now, response, ref_ids)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _forget(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
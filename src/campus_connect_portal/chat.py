@@ -2,15 +2,20 @@
 
 from __future__ import annotations
 
-import textwrap
+from typing import Callable
 from uuid import uuid4
 
 from .agents import AgentResult, CampusConnectAgent, KnowledgeAgent, TaskAgent
+from .cache import ResponseCache
 from .llm import LLMClient
+from .memory import ConversationMemory
 from .pkms import KnowledgeBase
 from .storage import Storage
 from .tasks import TaskManager
 
+WIDTH = 88
+PREFIX = "assistant> "
+
 
 class ChatSession:
     def __init__(
@@ -18,20 +23,26 @@ class ChatSession:
         *,
         agent: CampusConnectAgent | None = None,
         storage: Storage | None = None,
+        session_id: str | None = None,
     ):
-        storage = storage or Storage()
+        storage = storage or Storage(persistent=True)
         knowledge_agent = KnowledgeAgent(knowledge_base=KnowledgeBase(storage=storage))
         task_agent = TaskAgent(task_manager=TaskManager(storage=storage))
         self.agent = agent or CampusConnectAgent(
             knowledge_agent=knowledge_agent,
             task_agent=task_agent,
-            llm_client=LLMClient(),
+            llm_client=LLMClient(cache=ResponseCache(storage)),
         )
         self.storage = storage
-        self.session_id = str(uuid4())
+        if session_id:
+            self.session_id = session_id
+            self.memory = ConversationMemory(session_id, storage)
+        else:
+            self.session_id = str(uuid4())
+            self.memory = ConversationMemory(self.session_id)
 
     def interact(self) -> None:
-        print("Campus Connect chat ready. Type 'quit' to exit.")
+        print(f"Campus Connect chat ready (session {self.session_id}). Type 'quit' to exit.")
         while True:
             try:
                 prompt = input("you> ").strip()
@@ -44,19 +55,48 @@ class ChatSession:
             if not prompt:
                 continue
             self._log("user", prompt)
-            result = self.agent.answer(prompt)
+            result = self.agent.answer(
+                prompt, on_token=self._writer(), history=self.memory.lines()
+            )
             self._display(result)
             self._log("assistant", result.answer, result.citations)
+            self.memory.add("user", prompt)
+            self.memory.add("assistant", result.answer)
+
+    def _writer(self) -> Callable[[str], None]:
+        """Return a callback that prints deltas as they arrive, wrapped at ``WIDTH``."""
+        column = None
+
+        def write(delta: str) -> None:
+            nonlocal column
+            if column is None:
+                print(f"\n{PREFIX}", end="")
+                column = len(PREFIX)
+                delta = delta.lstrip()
+            elif column + len(delta) > WIDTH:
+                print()
+                column = 0
+                delta = delta.lstrip()
+            print(delta, end="", flush=True)
+            column += len(delta)
+
+        return write
 
     def _display(self, result: AgentResult) -> None:
-        wrapped = textwrap.fill(result.answer, width=88)
-        print(f"\nassistant> {wrapped}")
+        if "first_token" not in result.timings:  # nothing was streamed
+            print(f"\n{PREFIX}{result.answer}".rstrip(), end="")
+        print()
         if result.suggested_actions:
             print("actions:")
             for action in result.suggested_actions:
                 print(f"  - {action}")
         if result.citations:
             print(f"citations: {', '.join(result.citations)}")
+        if "first_token" in result.timings:
+            print(
+                f"timing: first token {result.timings['first_token']:.0f} ms after asking, "
+                f"generation {result.timings['llm']:.0f} ms"
+            )
         print("")
 
     def _log(self, role: str, content: str, citations: list[str] | None = None) -> None:
@@ -1,18 +1,24 @@
-"""Command-line interface for the Campus Connect assistant."""
+"""Command-line interface for the Campus Connect assistant.
+
+Handlers import their subsystem (PKMS, tasks, chat, sync) on first use so
+short commands such as ``list-tasks`` do not pay for the chat and LLM stack.
+"""
 
 from __future__ import annotations
 
 import argparse
-import json
 from pathlib import Path
 import sys
-from typing import Any
+from typing import TYPE_CHECKING, Any, Iterable
+
+from .config import SEED_CHUNK_SIZE
+
+if TYPE_CHECKING:
+    from .storage import Storage
 
-from .chat import ChatSession
-from .models import PortalRecord
-from .pkms import KnowledgeBase
-from .storage import Storage
-from .tasks import TaskManager
+# Commands that must run in the invoking process instead of the daemon. A
+# seed runs locally so the serial daemon stays free for quick commands.
+LOCAL_COMMANDS = {"chat", "daemon", "load-test", "seed"}
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -33,11 +39,12 @@ def build_parser() -> argparse.ArgumentParser:
     add_note.add_argument("--source", help="e.g., Campus Connect > Grades > Fall 2025.")
 
     list_notes = sub.add_parser("list-notes", help="List stored knowledge entries.")
-    list_notes.add_argument("--limit", type=int, default=10)
+    list_notes.add_argument("--limit", type=_positive_int, default=10)
+    _add_paging_arguments(list_notes)
 
     search_notes = sub.add_parser("search-notes", help="Search within knowledge entries.")
     search_notes.add_argument("--query", required=True)
-    search_notes.add_argument("--limit", type=int, default=3)
+    search_notes.add_argument("--limit", type=_positive_int, default=3)
 
     add_task = sub.add_parser("add-task", help="Create a task.")
     add_task.add_argument("--title", required=True)
@@ -49,7 +56,13 @@ def build_parser() -> argparse.ArgumentParser:
 
     list_tasks = sub.add_parser("list-tasks", help="List tasks.")
     list_tasks.add_argument("--status", choices=["todo", "in_progress", "blocked", "done"])
-    list_tasks.add_argument("--limit", type=int, default=10)
+    list_tasks.add_argument("--limit", type=_positive_int, default=10)
+    _add_paging_arguments(list_tasks)
+
+    next_tasks = sub.add_parser(
+        "next-tasks", help="Show open tasks ranked by priority, due date and status."
+    )
+    next_tasks.add_argument("--limit", type=_positive_int, default=5)
 
     update_task = sub.add_parser("update-task", help="Update a task.")
     update_task.add_argument("task_id")
@@ -59,20 +72,65 @@ def build_parser() -> argparse.ArgumentParser:
     update_task.add_argument("--priority")
     update_task.add_argument("--due-date")
 
-    sub.add_parser("chat", help="Start the terminal chat interface.")
+    bulk_update = sub.add_parser(
+        "bulk-update-tasks",
+        help="Update every task matching the filters in one statement.",
+    )
+    bulk_update.add_argument("--id", dest="ids", action="append", help="Task id (repeatable).")
+    bulk_update.add_argument("--ids-file", type=Path, help="File with one task id per line.")
+    bulk_update.add_argument("--where-status", choices=["todo", "in_progress", "blocked", "done"])
+    bulk_update.add_argument("--where-priority", choices=["low", "medium", "high", "critical"])
+    bulk_update.add_argument("--due-from", help="Earliest due date to match (YYYY-MM-DD).")
+    bulk_update.add_argument("--due-to", help="Latest due date to match (YYYY-MM-DD).")
+    bulk_update.add_argument("--set-status")
+    bulk_update.add_argument("--set-priority")
+    bulk_update.add_argument("--set-due-date", help="New due date; pass '' to clear it.")
+
+    chat = sub.add_parser("chat", help="Start the terminal chat interface.")
+    chat.add_argument("--session", help="Resume an earlier session by id.")
+
+    load_test = sub.add_parser(
+        "load-test",
+        help="Simulate concurrent chat sessions and report turn latency.",
+    )
+    load_test.add_argument("--sessions", type=_positive_int, default=20)
+    load_test.add_argument("--turns", type=_positive_int, default=5)
+    load_test.add_argument("--workers", type=_positive_int, help="SQLite worker threads.")
+
+    daemon = sub.add_parser(
+        "daemon",
+        help="Serve other CLI invocations from a warm process over a Unix socket.",
+    )
+    daemon.add_argument("--socket", type=Path, help="Socket path (default: state dir).")
 
     seed = sub.add_parser("seed", help="Import Campus Connect sample data.")
-    seed.add_argument("--file", type=Path, help="Path to JSON file exported from Campus Connect.")
+    seed.add_argument(
+        "--file",
+        type=Path,
+        help="Path to a JSON array or NDJSON file exported from Campus Connect.",
+    )
     seed.add_argument(
         "--sample",
         action="store_true",
         help="Load the built-in sample dataset instead of providing a file.",
     )
+    seed.add_argument(
+        "--chunk-size",
+        type=int,
+        default=SEED_CHUNK_SIZE,
+        help="Records written per transaction while streaming the import.",
+    )
+    seed.add_argument(
+        "--full-snapshot",
+        action="store_true",
+        help="Treat the export as the complete portal state and remove records missing from it.",
+    )
 
     return parser
 
 
 def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
     parser = build_parser()
     args = parser.parse_args(argv)
     command = args.command
@@ -84,18 +142,29 @@ def main(argv: list[str] | None = None) -> int:
     except KeyError:
         parser.error(f"Unknown command: {command}")
         return 1
-    return handler(args)
+    if command not in LOCAL_COMMANDS:
+        from .daemon import forward
+
+        code = forward(argv)
+        if code is not None:
+            return code
+    from .storage import Storage
+
+    with Storage(persistent=True) as storage:
+        return handler(args, storage)
 
 
-def cmd_init_db(_: argparse.Namespace) -> int:
-    Storage()  # instantiation ensures migrations run
-    print("Database ready at ~/.campus_connect_portal/state.db")
+def cmd_init_db(_: argparse.Namespace, storage: Storage) -> int:
+    # constructing the shared Storage in main() already ran the migrations
+    print(f"Database ready at {storage.db_path}")
     return 0
 
 
-def cmd_add_note(args: argparse.Namespace) -> int:
+def cmd_add_note(args: argparse.Namespace, storage: Storage) -> int:
+    from .pkms import KnowledgeBase
+
     content = _resolve_content(args)
-    kb = KnowledgeBase()
+    kb = KnowledgeBase(storage=storage)
     entry = kb.add_entry(
         title=args.title,
         content=content,
@@ -107,19 +176,68 @@ def cmd_add_note(args: argparse.Namespace) -> int:
     return 0
 
 
-def cmd_list_notes(args: argparse.Namespace) -> int:
-    kb = KnowledgeBase()
-    entries = kb.list_entries(limit=args.limit)
-    if not entries:
-        print("No knowledge entries yet. Add one with `add-note`.")
-        return 0
-    for entry in entries:
+def _add_paging_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--all", action="store_true", help="Stream every row, oldest first, ignoring --limit."
+    )
+    parser.add_argument(
+        "--after",
+        metavar="CURSOR",
+        help="Page oldest first from a cursor printed by a previous page (or a timestamp).",
+    )
+
+
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def _paged(items: Iterable[Any], args: argparse.Namespace) -> Iterable[Any]:
+    """Yield up to --limit items (every one with --all), then print the next cursor."""
+    from .storage import format_cursor
+
+    last = None
+    for count, item in enumerate(items):
+        if not args.all and count == args.limit:
+            print(f"Next page: --after {format_cursor(last.updated_at, last.id)}")
+            return
+        last = item
+        yield item
+
+
+def _cursor(args: argparse.Namespace) -> tuple[str, str] | None:
+    from .storage import parse_cursor
+
+    if args.after is None:
+        return None
+    try:
+        return parse_cursor(args.after)
+    except ValueError as exc:
+        raise SystemExit(str(exc)) from None
+
+
+def cmd_list_notes(args: argparse.Namespace, storage: Storage) -> int:
+    from .pkms import KnowledgeBase
+
+    kb = KnowledgeBase(storage=storage)
+    if args.all or args.after:
+        entries = _paged(kb.iter_entries(after=_cursor(args)), args)
+    else:
+        entries = kb.list_entries(limit=args.limit)
+    shown = 0
+    for shown, entry in enumerate(entries, start=1):
         print(f"[{entry.id}] {entry.title} — tags: {', '.join(entry.tags) or 'untagged'}")
+    if not shown:
+        print("No knowledge entries yet. Add one with `add-note`.")
     return 0
 
 
-def cmd_search_notes(args: argparse.Namespace) -> int:
-    kb = KnowledgeBase()
+def cmd_search_notes(args: argparse.Namespace, storage: Storage) -> int:
+    from .pkms import KnowledgeBase
+
+    kb = KnowledgeBase(storage=storage)
     entries = kb.search(args.query, limit=args.limit)
     if not entries:
         print("No matching knowledge entries. Try adding more context.")
@@ -130,8 +248,10 @@ def cmd_search_notes(args: argparse.Namespace) -> int:
     return 0
 
 
-def cmd_add_task(args: argparse.Namespace) -> int:
-    manager = TaskManager()
+def cmd_add_task(args: argparse.Namespace, storage: Storage) -> int:
+    from .tasks import TaskManager
+
+    manager = TaskManager(storage=storage)
     task = manager.add_task(
         title=args.title,
         description=args.description,
@@ -144,22 +264,45 @@ def cmd_add_task(args: argparse.Namespace) -> int:
     return 0
 
 
-def cmd_list_tasks(args: argparse.Namespace) -> int:
-    manager = TaskManager()
-    tasks = manager.list_tasks(status=args.status, limit=args.limit)
-    if not tasks:
-        print("No tasks found.")
-        return 0
-    for task in tasks:
+def cmd_list_tasks(args: argparse.Namespace, storage: Storage) -> int:
+    from .tasks import TaskManager
+
+    manager = TaskManager(storage=storage)
+    if args.all or args.after:
+        tasks = _paged(manager.iter_tasks(status=args.status, after=_cursor(args)), args)
+    else:
+        tasks = manager.list_tasks(status=args.status, limit=args.limit)
+    shown = 0
+    for shown, task in enumerate(tasks, start=1):
         print(
             f"[{task.id}] {task.title} — {task.status} / {task.priority}"
             + (f" (due {task.due_date})" if task.due_date else "")
         )
+    if not shown:
+        print("No tasks found.")
+    return 0
+
+
+def cmd_next_tasks(args: argparse.Namespace, storage: Storage) -> int:
+    from .scheduler import describe_due
+    from .tasks import TaskManager
+
+    tasks = TaskManager(storage=storage).next_tasks(limit=args.limit)
+    if not tasks:
+        print("Nothing open. Add a task with `add-task`.")
+        return 0
+    for position, task in enumerate(tasks, start=1):
+        print(
+            f"{position}. [{task.id}] {task.title} — {task.status} / {task.priority}"
+            f" ({describe_due(task.due_date)})"
+        )
     return 0
 
 
-def cmd_update_task(args: argparse.Namespace) -> int:
-    manager = TaskManager()
+def cmd_update_task(args: argparse.Namespace, storage: Storage) -> int:
+    from .tasks import TaskManager
+
+    manager = TaskManager(storage=storage)
     task = manager.update_task(
         task_id=args.task_id,
         title=args.title,
@@ -172,32 +315,91 @@ def cmd_update_task(args: argparse.Namespace) -> int:
     return 0
 
 
-def cmd_chat(_: argparse.Namespace) -> int:
-    session = ChatSession()
+def cmd_bulk_update_tasks(args: argparse.Namespace, storage: Storage) -> int:
+    import time
+
+    from .tasks import TaskManager
+
+    ids = list(args.ids) if args.ids else None
+    if args.ids_file:
+        lines = args.ids_file.read_text(encoding="utf-8").splitlines()
+        ids = (ids or []) + [line.strip() for line in lines if line.strip()]
+    started = time.perf_counter()
+    try:
+        updated = TaskManager(storage=storage).bulk_update(
+            ids=ids,
+            where_status=args.where_status,
+            where_priority=args.where_priority,
+            due_from=args.due_from,
+            due_to=args.due_to,
+            status=args.set_status,
+            priority=args.set_priority,
+            due_date=args.set_due_date,
+        )
+    except ValueError as exc:
+        raise SystemExit(str(exc)) from None
+    elapsed = time.perf_counter() - started
+    print(f"Updated {updated} tasks in {elapsed:.2f}s.")
+    return 0
+
+
+def cmd_chat(args: argparse.Namespace, storage: Storage) -> int:
+    from .chat import ChatSession
+
+    session = ChatSession(storage=storage, session_id=args.session)
     session.interact()
     return 0
 
 
-def cmd_seed(args: argparse.Namespace) -> int:
-    data = _load_seed_data(args)
-    records = [PortalRecord.from_dict(item) for item in data]
-    storage = Storage()
-    storage.upsert_portal_records(record.to_row() for record in records)
-    kb = KnowledgeBase(storage=storage)
-    manager = TaskManager(storage=storage)
-    for record in records:
-        kb.add_entry(
-            title=f"{record.component} ({record.campus_area})",
-            content=record.notes or "Imported from Campus Connect snapshot.",
-            tags=[
-                slugify(record.campus_area),
-                slugify(record.course or "general"),
-            ],
-            campus_area=record.campus_area,
-            source="Campus Connect import",
-        )
-    created_tasks = manager.ensure_follow_up_tasks(records)
-    print(f"Imported {len(records)} records and created {len(created_tasks)} tasks.")
+def cmd_load_test(args: argparse.Namespace, storage: Storage) -> int:
+    import asyncio
+
+    from .aio import AsyncStorage, run_load_test
+    from .config import ASYNC_DB_WORKERS
+
+    async def run() -> dict[str, float]:
+        async_storage = AsyncStorage(storage, max_workers=args.workers or ASYNC_DB_WORKERS)
+        try:
+            return await run_load_test(async_storage, sessions=args.sessions, turns=args.turns)
+        finally:
+            async_storage.executor.shutdown(wait=True)
+
+    stats = asyncio.run(run())
+    print(
+        f"{stats['turns']} turns across {args.sessions} sessions in {stats['elapsed_s']:.2f}s "
+        f"({stats['turns_per_s']:.1f} turns/sec); "
+        f"p50 {stats['p50_ms']:.1f} ms, p99 {stats['p99_ms']:.1f} ms"
+    )
+    return 0
+
+
+def cmd_daemon(args: argparse.Namespace, storage: Storage) -> int:
+    from .config import DAEMON_SOCKET
+    from .daemon import serve
+
+    serve(storage, args.socket or DAEMON_SOCKET)
+    return 0
+
+
+def cmd_seed(args: argparse.Namespace, storage: Storage) -> int:
+    import time
+
+    from .models import PortalRecord
+    from .sync import import_stream
+
+    started = time.perf_counter()
+    records = map(PortalRecord.from_dict, _load_seed_data(args))
+    result = import_stream(
+        storage, records, chunk_size=args.chunk_size, full_snapshot=args.full_snapshot
+    )
+    elapsed = time.perf_counter() - started
+    rate = result.records / elapsed if elapsed else 0.0
+    print(
+        f"Imported {result.records} records ({result.written} new or changed) "
+        f"and created {result.tasks} tasks "
+        f"in {elapsed:.2f}s ({rate:,.0f} records/sec)."
+    )
+    print(f"Changes: {result.summary()}.")
     return 0
 
 
@@ -209,21 +411,20 @@ def _resolve_content(args: argparse.Namespace) -> str:
     raise SystemExit("Either --content or --from-file must be provided.")
 
 
-def _load_seed_data(args: argparse.Namespace) -> list[dict[str, Any]]:
+def _load_seed_data(args: argparse.Namespace) -> Iterable[dict[str, Any]]:
     if args.sample:
         import importlib.resources as resources
+        import json
 
         sample = resources.files("campus_connect_portal.sample_data").joinpath(
             "campus_connect_sample.json"
         )
         return json.loads(sample.read_text(encoding="utf-8"))
     if args.file and args.file.exists():
-        return json.loads(args.file.read_text(encoding="utf-8"))
-    raise SystemExit("Provide --file PATH or --sample.")
+        from .sync import iter_payloads
 
-
-def slugify(value: str) -> str:
-    return value.lower().replace(" ", "-")
+        return iter_payloads(args.file)
+    raise SystemExit("Provide --file PATH or --sample.")
 
 
 COMMANDS = {
@@ -233,8 +434,12 @@ COMMANDS = {
     "search-notes": cmd_search_notes,
     "add-task": cmd_add_task,
     "list-tasks": cmd_list_tasks,
+    "next-tasks": cmd_next_tasks,
     "update-task": cmd_update_task,
+    "bulk-update-tasks": cmd_bulk_update_tasks,
     "chat": cmd_chat,
+    "load-test": cmd_load_test,
+    "daemon": cmd_daemon,
     "seed": cmd_seed,
 }
 
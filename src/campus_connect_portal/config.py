@@ -7,15 +7,74 @@ import os
 
 APP_NAME = "campus_connect_portal"
 
+# Created lazily by Storage on first use; importing config has no side effects.
 STATE_DIR = Path(
     os.getenv("CAMPUS_CONNECT_STATE_DIR", Path.home() / ".campus_connect_portal")
 )
-STATE_DIR.mkdir(parents=True, exist_ok=True)
 
 DB_PATH = STATE_DIR / "state.db"
+DAEMON_SOCKET = Path(os.getenv("CAMPUS_CONNECT_DAEMON_SOCKET", STATE_DIR / "daemon.sock"))
+
+# SQLite tuning applied to every connection. All profiles use WAL so chat
+# reads are never blocked by a running seed; they differ in how much
+# durability they trade for write throughput.
+DB_PROFILES = {
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -8_000,
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+    },
+    "fast": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -32_000,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+    },
+    "bulk": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -128_000,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+    },
+}
+DB_PROFILE = os.getenv("CAMPUS_CONNECT_DB_PROFILE", "durable")
+# Threads AsyncStorage may use for SQLite work (one connection each).
+ASYNC_DB_WORKERS = int(os.getenv("CAMPUS_CONNECT_ASYNC_DB_WORKERS", "4"))
+
+# Agent retrieval fan-out: pool size and per-answer budget in seconds.
+RETRIEVAL_WORKERS = int(os.getenv("CAMPUS_CONNECT_RETRIEVAL_WORKERS", "4"))
+RETRIEVAL_TIMEOUT = float(os.getenv("CAMPUS_CONNECT_RETRIEVAL_TIMEOUT", "2.0"))
+
+# LLM response cache: in-memory entries, SQLite rows, and lifetime in seconds.
+LLM_CACHE_SIZE = int(os.getenv("CAMPUS_CONNECT_LLM_CACHE_SIZE", "256"))
+LLM_CACHE_MAX_ROWS = int(os.getenv("CAMPUS_CONNECT_LLM_CACHE_MAX_ROWS", "5000"))
+LLM_CACHE_TTL = float(os.getenv("CAMPUS_CONNECT_LLM_CACHE_TTL", str(24 * 60 * 60)))
+
+SEED_CHUNK_SIZE = int(os.getenv("CAMPUS_CONNECT_SEED_CHUNK_SIZE", "5000"))
+# Rows fetched per query when streaming a table page by page.
+PAGE_SIZE = int(os.getenv("CAMPUS_CONNECT_PAGE_SIZE", "500"))
 
 DEFAULT_CHAT_MODEL = os.getenv("CAMPUS_CONNECT_CHAT_MODEL", "gpt-4o-mini")
+# Parallel LLM requests for batch answering.
+LLM_CONCURRENCY = int(os.getenv("CAMPUS_CONNECT_LLM_CONCURRENCY", "4"))
+# OpenAI request policy: per-request timeout and retries (seconds), and the
+# circuit breaker that skips the API after repeated failures.
+LLM_TIMEOUT = float(os.getenv("CAMPUS_CONNECT_LLM_TIMEOUT", "20"))
+LLM_MAX_RETRIES = int(os.getenv("CAMPUS_CONNECT_LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE = float(os.getenv("CAMPUS_CONNECT_LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX = float(os.getenv("CAMPUS_CONNECT_LLM_BACKOFF_MAX", "8"))
+LLM_BREAKER_THRESHOLD = int(os.getenv("CAMPUS_CONNECT_LLM_BREAKER_THRESHOLD", "5"))
+LLM_BREAKER_COOLDOWN = float(os.getenv("CAMPUS_CONNECT_LLM_BREAKER_COOLDOWN", "30"))
+# Chat turns kept verbatim in the prompt; older ones are folded into a
+# summary of at most CHAT_SUMMARY_CHARS characters.
 MAX_CHAT_CONTEXT = int(os.getenv("CAMPUS_CONNECT_MAX_CHAT_CONTEXT", "5"))
+CHAT_SUMMARY_CHARS = int(os.getenv("CAMPUS_CONNECT_CHAT_SUMMARY_CHARS", "600"))
+# Estimated tokens (system plus user prompt) the agent may send per question.
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CAMPUS_CONNECT_CONTEXT_TOKEN_BUDGET", "1200"))
 
 TASK_STATUSES = ("todo", "in_progress", "blocked", "done")
 TASK_PRIORITIES = ("low", "medium", "high", "critical")
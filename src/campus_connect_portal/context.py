@@ -0,0 +1,203 @@
+"""Token-budgeted prompt assembly for the Campus Connect agent."""
+
+from __future__ import annotations
+
+import re
+import textwrap
+from dataclasses import dataclass, field
+from typing import Sequence
+
+from .config import CONTEXT_TOKEN_BUDGET
+from .models import KnowledgeEntry, Task
+
+SYSTEM_PROMPT = (
+    "You are a helpful academic success coach for DePaul University students. "
+    "Use the provided knowledge entries and tasks to answer user questions. "
+    "Cite concrete action items and stay concise."
+)
+INSTRUCTIONS = (
+    "Respond with 2-3 sentences highlighting risks, upcoming deadlines, and a suggested next step."
+)
+
+SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+WORD_RE = re.compile(r"\w+")
+# Longer sentences are shortened so one run-on paragraph cannot evict an item.
+MAX_SENTENCE_CHARS = 320
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough GPT-style token count: about four characters per token."""
+    return (len(text) + 3) // 4
+
+
+@dataclass(slots=True)
+class PromptContext:
+    system_prompt: str
+    user_prompt: str
+    tokens: int
+    knowledge: list[KnowledgeEntry] = field(default_factory=list)
+    tasks: list[Task] = field(default_factory=list)
+
+
+@dataclass(slots=True, eq=False)
+class _Snippet:
+    item: KnowledgeEntry | Task
+    head: str
+    sentences: list[str]
+    order: list[int]  # sentence indexes, most query-relevant first
+    chosen: int = 0
+    admitted: bool = False
+
+    def render(self) -> str:
+        picked = sorted(self.order[: self.chosen])
+        body = " ".join(self.sentences[index] for index in picked)
+        if picked and picked[-1] < len(self.sentences) - 1:
+            body += " [...]"
+        return f"{self.head}{body}"
+
+
+class ContextBuilder:
+    """Fit retrieved notes and tasks into ``budget`` prompt tokens.
+
+    Items are admitted in retrieval rank order, knowledge and tasks
+    interleaved, each with its header and most query-relevant sentence; the
+    lowest-ranked ones are dropped when even that does not fit. Leftover
+    budget is then spent one sentence per item per round, so no single long
+    note crowds out the rest.
+    """
+
+    def __init__(self, budget: int = CONTEXT_TOKEN_BUDGET):
+        self.budget = budget
+
+    def build(
+        self,
+        prompt: str,
+        knowledge_hits: Sequence[KnowledgeEntry],
+        task_hits: Sequence[Task],
+        history: Sequence[str] = (),
+    ) -> PromptContext:
+        """``history`` lines (oldest first) get up to a third of the budget;
+        the oldest are dropped when they do not fit."""
+        history = self._fit_history(history, self.budget // 3)
+        query_terms = {word for word in WORD_RE.findall(prompt.lower()) if len(word) >= 3}
+        knowledge = [
+            self._snippet(
+                entry,
+                f"- [{entry.id}] {entry.title} ({', '.join(entry.tags) or 'untagged'}): ",
+                entry.content,
+                query_terms,
+            )
+            for entry in knowledge_hits
+        ]
+        tasks = [
+            self._snippet(
+                task,
+                f"- [{task.id}] {task.title} (status={task.status}, priority={task.priority}) — ",
+                task.description,
+                query_terms,
+            )
+            for task in task_hits
+        ]
+        ranked = _interleave(knowledge, tasks)
+        remaining = self.budget - estimate_tokens(
+            SYSTEM_PROMPT + self._render(prompt, [], [], history)
+        )
+        admitted: list[_Snippet] = []
+        for snippet in ranked:
+            snippet.chosen = 1 if snippet.sentences else 0
+            cost = estimate_tokens(snippet.render()) + 3  # newline and a "[...]" marker
+            if cost > remaining:
+                continue
+            snippet.admitted = True
+            admitted.append(snippet)
+            remaining -= cost
+        grew = True
+        while grew:
+            grew = False
+            for snippet in admitted:
+                if snippet.chosen >= len(snippet.sentences):
+                    continue
+                # one more sentence plus its joining space; "[...]" is already paid for
+                extra = estimate_tokens(snippet.sentences[snippet.order[snippet.chosen]]) + 1
+                if extra > remaining:
+                    continue
+                snippet.chosen += 1
+                remaining -= extra
+                grew = True
+        kept_knowledge = [snippet for snippet in knowledge if snippet.admitted]
+        kept_tasks = [snippet for snippet in tasks if snippet.admitted]
+        user_prompt = self._render(prompt, kept_knowledge, kept_tasks, history)
+        return PromptContext(
+            system_prompt=SYSTEM_PROMPT,
+            user_prompt=user_prompt,
+            tokens=estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(user_prompt),
+            knowledge=[snippet.item for snippet in kept_knowledge],
+            tasks=[snippet.item for snippet in kept_tasks],
+        )
+
+    def _snippet(
+        self,
+        item: KnowledgeEntry | Task,
+        head: str,
+        text: str,
+        query_terms: set[str],
+    ) -> _Snippet:
+        sentences = []
+        for part in SENTENCE_RE.split(text):
+            part = part.strip()
+            if len(part) > MAX_SENTENCE_CHARS:
+                part = textwrap.shorten(part, width=MAX_SENTENCE_CHARS, placeholder=" [...]")
+            if part:
+                sentences.append(part)
+        relevance = [
+            len(query_terms & set(WORD_RE.findall(sentence.lower()))) for sentence in sentences
+        ]
+        order = sorted(range(len(sentences)), key=lambda index: (-relevance[index], index))
+        return _Snippet(item=item, head=head, sentences=sentences, order=order)
+
+    def _fit_history(self, history: Sequence[str], budget: int) -> list[str]:
+        kept: list[str] = []
+        for line in reversed(history):
+            cost = estimate_tokens(line) + 1
+            if cost > budget:
+                if not kept:  # always keep a shortened last message
+                    width = max(budget * 4 - 8, 40)
+                    kept.append(textwrap.shorten(line, width=width, placeholder=" [...]"))
+                break
+            kept.append(line)
+            budget -= cost
+        kept.reverse()
+        return kept
+
+    def _render(
+        self,
+        prompt: str,
+        knowledge: Sequence[_Snippet],
+        tasks: Sequence[_Snippet],
+        history: Sequence[str] = (),
+    ) -> str:
+        conversation = ""
+        if history:
+            conversation = "Conversation so far:\n" + "\n".join(history) + "\n\n"
+        knowledge_block = "\n".join(snippet.render() for snippet in knowledge) or (
+            "No knowledge entries yet."
+        )
+        task_block = "\n".join(snippet.render() for snippet in tasks) or "No tasks found."
+        return (
+            f"{conversation}"
+            f"Question: {prompt}\n\n"
+            f"Knowledge entries:\n{knowledge_block}\n\n"
+            f"Tasks:\n{task_block}\n\n"
+            f"{INSTRUCTIONS}"
+        )
+
+
+def _interleave(*ranked: Sequence[_Snippet]) -> list[_Snippet]:
+    """Merge ranked lists: first of each, then second of each, and so on."""
+    rounds = max((len(items) for items in ranked), default=0)
+    return [
+        items[position]
+        for position in range(rounds)
+        for items in ranked
+        if position < len(items)
+    ]
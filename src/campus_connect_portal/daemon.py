@@ -0,0 +1,201 @@
+"""Local daemon that keeps a warm Storage so CLI calls skip process setup.
+
+``campus-connect-cli daemon`` listens on a Unix socket. Other CLI
+invocations send their argv there as one JSON line and relay the output as
+it is produced, falling back to running in-process when no daemon answers.
+
+Protocol, one JSON object per line: the daemon greets a connection with
+``{"ready": true}`` once it is free to serve it, the client sends
+``{"argv": [...], "cwd": ...}``, and the daemon streams ``{"stdout": text}``
+/ ``{"stderr": text}`` chunks followed by ``{"code": n}``.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import io
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import traceback
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO
+
+from .config import DAEMON_SOCKET
+
+if TYPE_CHECKING:
+    from .storage import Storage
+
+CONNECT_TIMEOUT = 0.5
+# How long to wait for a daemon busy with another command before running locally.
+READY_TIMEOUT = 2.0
+# Output is sent in chunks of about this many bytes.
+RELAY_BUFFER = 64 * 1024
+
+
+def forward(argv: list[str], socket_path: Path = DAEMON_SOCKET) -> int | None:
+    """Run ``argv`` on the daemon and return its exit code.
+
+    ``None`` means nothing was sent (no daemon, or it stayed busy past
+    ``READY_TIMEOUT``) and the caller should run the command itself. Once
+    the request is sent it is never retried locally: a daemon that hangs up
+    before reporting an exit code is an error.
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.settimeout(CONNECT_TIMEOUT)
+        try:
+            client.connect(str(socket_path))
+            client.settimeout(READY_TIMEOUT)
+            reader = client.makefile("rb")
+            if not reader.readline():
+                return None
+        except OSError:  # includes the ready timeout
+            return None
+        client.settimeout(None)
+        request = {"argv": argv, "cwd": os.getcwd()}
+        client.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        for line in reader:
+            message = json.loads(line)
+            if "stdout" in message:
+                sys.stdout.write(message["stdout"])
+            elif "stderr" in message:
+                sys.stderr.write(message["stderr"])
+            elif "code" in message:
+                return message["code"]
+    finally:
+        client.close()
+    print(
+        "The daemon closed the connection before the command finished; "
+        "it may have been partly applied.",
+        file=sys.stderr,
+    )
+    return 1
+
+
+def serve(storage: Storage, socket_path: Path = DAEMON_SOCKET) -> None:
+    """Answer forwarded commands with ``storage`` until interrupted."""
+    if not hasattr(socket, "AF_UNIX"):
+        raise SystemExit("The daemon needs Unix domain sockets, which this platform lacks.")
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+    if socket_path.exists():
+        if _is_listening(socket_path):
+            raise SystemExit(f"A daemon is already listening on {socket_path}.")
+        socket_path.unlink()  # left behind by a daemon that did not shut down cleanly
+
+    class Handler(socketserver.StreamRequestHandler):
+        wbufsize = RELAY_BUFFER
+
+        def handle(self) -> None:
+            try:
+                self.wfile.write(b'{"ready": true}\n')
+                self.wfile.flush()
+            except OSError:  # liveness probe, or a client that gave up waiting
+                return
+            line = self.rfile.readline()
+            if not line:
+                return
+            relay = _Relay(self.wfile)
+            code = _run(json.loads(line), storage, relay)
+            relay.send({"code": code})
+
+        def finish(self) -> None:
+            with contextlib.suppress(OSError):  # the client already hung up
+                super().finish()
+
+    # Requests are served one at a time: handlers print to a redirected
+    # sys.stdout, which is process-global. Clients queue until greeted.
+    signal.signal(signal.SIGTERM, _stop)
+    with socketserver.UnixStreamServer(str(socket_path), Handler) as server:
+        print(f"Campus Connect daemon listening on {socket_path} (Ctrl+C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            socket_path.unlink(missing_ok=True)
+
+
+def _stop(signum, frame) -> None:
+    raise KeyboardInterrupt
+
+
+def _is_listening(socket_path: Path) -> bool:
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    probe.settimeout(CONNECT_TIMEOUT)
+    try:
+        probe.connect(str(socket_path))
+    except OSError:
+        return False
+    finally:
+        probe.close()
+    return True
+
+
+class _Relay:
+    """Forwards handler output to the client as JSON lines.
+
+    Once the client has gone away further output is dropped, and the write
+    that noticed raises ``BrokenPipeError`` so a long listing stops early.
+    """
+
+    def __init__(self, wfile: BinaryIO):
+        self.wfile = wfile
+        self.broken = False
+        self.stdout = _RelayStream(self, "stdout")
+        self.stderr = _RelayStream(self, "stderr")
+
+    def send(self, message: dict) -> None:
+        if self.broken:
+            return
+        try:
+            self.wfile.write(json.dumps(message).encode("utf-8") + b"\n")
+        except OSError:
+            self.broken = True
+            raise BrokenPipeError("CLI client disconnected") from None
+
+
+class _RelayStream(io.TextIOBase):
+    def __init__(self, relay: _Relay, name: str):
+        self.relay = relay
+        self.name = name
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        if text:
+            self.relay.send({self.name: text})
+        return len(text)
+
+
+def _run(request: dict, storage: Storage, relay: _Relay) -> int:
+    from .cli import COMMANDS, build_parser
+
+    code = 0
+    with contextlib.redirect_stdout(relay.stdout), contextlib.redirect_stderr(relay.stderr):
+        try:
+            args = build_parser().parse_args(request["argv"])
+            handler = COMMANDS.get(args.command)
+            if handler is None:
+                raise SystemExit(2)
+            for name, value in vars(args).items():
+                if isinstance(value, Path) and not value.is_absolute():
+                    setattr(args, name, Path(request["cwd"]) / value)
+            code = handler(args, storage)
+        except SystemExit as exc:
+            if isinstance(exc.code, str):
+                print(exc.code, file=relay.stderr)
+                code = 1
+            else:
+                code = exc.code or 0
+        except Exception:
+            if not relay.broken:
+                traceback.print_exc(file=relay.stderr)
+            code = 1
+    return code
@@ -2,50 +2,373 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
+import random
+import re
 import textwrap
-from typing import Any
+import threading
+import time
+from concurrent.futures import Executor
+from dataclasses import asdict, dataclass
+from functools import partial
+from typing import Any, Iterable, Iterator
 
-from .config import DEFAULT_CHAT_MODEL
+from .cache import ResponseCache, cache_key
+from .config import (
+    DEFAULT_CHAT_MODEL,
+    LLM_BACKOFF_BASE,
+    LLM_BACKOFF_MAX,
+    LLM_BREAKER_COOLDOWN,
+    LLM_BREAKER_THRESHOLD,
+    LLM_MAX_RETRIES,
+    LLM_TIMEOUT,
+)
 
 LOGGER = logging.getLogger(__name__)
 
 
+# HTTP statuses worth retrying: timeouts, conflicts, rate limits, server errors.
+RETRYABLE_STATUSES = frozenset({408, 409, 429, 500, 502, 503, 504})
+
+
+@dataclass(slots=True)
+class LLMStats:
+    requests: int = 0
+    successes: int = 0
+    failures: int = 0
+    retries: int = 0
+    short_circuits: int = 0
+
+
+class CircuitBreaker:
+    """Stops calling the API for ``cooldown`` seconds after ``threshold``
+    consecutive failed requests.
+
+    Once the cool-down passes a single trial request is let through
+    (half-open); its success closes the breaker, its failure reopens it. A
+    trial that never reports back (an abandoned stream, an interrupt) counts
+    as failed, and a half-open breaker starts a fresh trial once another
+    cool-down has passed, so it can never stay half-open for good.
+    """
+
+    def __init__(self, threshold: int = LLM_BREAKER_THRESHOLD, cooldown: float = LLM_BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.times_opened = 0
+        self._since = 0.0  # when the breaker opened or its trial started
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if time.monotonic() - self._since >= self.cooldown:
+                self.state = "half_open"
+                self._since = time.monotonic()
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != "closed":
+                LOGGER.warning("OpenAI circuit breaker closed")
+            self.state = "closed"
+            self.consecutive_failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == "half_open" or self.consecutive_failures >= self.threshold:
+                self._open()
+
+    def record_abandoned(self) -> None:
+        """Settle a request that ended without a result; only a trial counts."""
+        with self._lock:
+            if self.state == "half_open":
+                self.consecutive_failures += 1
+                self._open()
+
+    def retry_in(self) -> float:
+        """Seconds until an open breaker lets a trial request through."""
+        with self._lock:
+            if self.state != "open":
+                return 0.0
+            return max(0.0, self.cooldown - (time.monotonic() - self._since))
+
+    def _open(self) -> None:
+        if self.state != "open":
+            self.times_opened += 1
+            LOGGER.warning(
+                "OpenAI circuit breaker open for %.0fs after %d failures",
+                self.cooldown,
+                self.consecutive_failures,
+            )
+        self.state = "open"
+        self._since = time.monotonic()
+
+
+def _retry_delay(exc: Exception, attempt: int, retryable: tuple[type[BaseException], ...]) -> float | None:
+    """Seconds to wait before retrying ``exc``, or ``None`` if it is not retryable.
+
+    ``Retry-After`` is honoured when the server sends it; otherwise the delay
+    is drawn uniformly from ``[0, base * 2**attempt]`` (full jitter), capped at
+    ``LLM_BACKOFF_MAX``.
+    """
+    status = getattr(exc, "status_code", None)
+    if status is None and not isinstance(exc, retryable):
+        return None
+    if status is not None and status not in RETRYABLE_STATUSES:
+        return None
+    response = getattr(exc, "response", None)
+    retry_after = getattr(response, "headers", {}).get("retry-after")
+    try:
+        return min(float(retry_after), LLM_BACKOFF_MAX)
+    except (TypeError, ValueError):
+        return random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2**attempt))
+
+
+def _chunks(text: str) -> Iterator[str]:
+    """Split ``text`` into word-sized deltas, each keeping its leading whitespace."""
+    yield from re.findall(r"\s*\S+", text)
+
+
 class LLMClient:
     """Thin wrapper around OpenAI's Responses API with a heuristic fallback."""
 
-    def __init__(self, model: str | None = None):
+    def __init__(
+        self,
+        model: str | None = None,
+        *,
+        cache: ResponseCache | None = None,
+        timeout: float = LLM_TIMEOUT,
+        max_retries: int = LLM_MAX_RETRIES,
+        breaker: CircuitBreaker | None = None,
+    ):
         self.model = model or DEFAULT_CHAT_MODEL
         self.api_key = os.getenv("OPENAI_API_KEY")
+        self.cache = cache
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.breaker = breaker or CircuitBreaker()
+        self.stats = LLMStats()
+        # Connection-level errors worth retrying; the SDK's own are added below.
+        self._retryable: tuple[type[BaseException], ...] = (TimeoutError, ConnectionError)
         self._client = self._build_openai_client()
+        self._resume_at = 0.0
+        self._rate_limit_lock = threading.Lock()
 
     def _build_openai_client(self):
         if not self.api_key:
             return None
         try:
-            from openai import OpenAI  # type: ignore
+            import openai  # type: ignore
 
-            return OpenAI(api_key=self.api_key)
+            self._retryable += (openai.APIConnectionError,)
+            # Retries are handled here so they share the breaker and backoff.
+            return openai.OpenAI(api_key=self.api_key, timeout=self.timeout, max_retries=0)
         except Exception as exc:  # pragma: no cover - optional dependency
             LOGGER.warning("Unable to initialize OpenAI client: %s", exc)
             return None
 
-    def respond(self, system_prompt: str, user_prompt: str) -> str:
-        if self._client:
+    def status(self) -> dict[str, Any]:
+        """Breaker state and request counters, for monitoring."""
+        return {
+            "breaker": self.breaker.state,
+            "breaker_retry_in": round(self.breaker.retry_in(), 1),
+            "consecutive_failures": self.breaker.consecutive_failures,
+            "times_opened": self.breaker.times_opened,
+            **asdict(self.stats),
+        }
+
+    def respond(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        *,
+        ref_ids: Iterable[str] = (),
+    ) -> str:
+        """Answer the prompt, reusing a cached model response when possible.
+
+        ``ref_ids`` names the knowledge entries and tasks quoted in the prompt;
+        writing any of them invalidates the cached response. Fallback answers
+        are cheap and never cached.
+        """
+        if not self._client:
+            return self._fallback_response(user_prompt)
+        key = None
+        if self.cache is not None:
+            key = cache_key(self.model, system_prompt, user_prompt)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        answer = self._request(system_prompt, user_prompt)
+        if answer is None:
+            return self._fallback_response(user_prompt)
+        if key is not None:
+            self.cache.put(key, self.model, answer, ref_ids)
+        return answer
+
+    def stream(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        *,
+        ref_ids: Iterable[str] = (),
+    ) -> Iterator[str]:
+        """Yield the answer as text deltas while it is generated.
+
+        Cached and fallback answers are yielded word by word so callers render
+        every source the same way. A completed model answer is cached like
+        :meth:`respond` does.
+        """
+        if not self._client:
+            yield from _chunks(self._fallback_response(user_prompt))
+            return
+        key = None
+        if self.cache is not None:
+            key = cache_key(self.model, system_prompt, user_prompt)
+            cached = self.cache.get(key)
+            if cached is not None:
+                yield from _chunks(cached)
+                return
+        if not self.breaker.allow():
+            self._count("short_circuits")
+            yield from _chunks(self._fallback_response(user_prompt))
+            return
+        self._count("requests")
+        parts: list[str] = []
+        settled = False
+        try:
             try:
-                response = self._client.responses.create(
+                events = self._client.responses.create(
                     model=self.model,
                     input=[
                         {"role": "system", "content": system_prompt},
                         {"role": "user", "content": user_prompt},
                     ],
                     temperature=0.2,
+                    stream=True,
                 )
-                return self._extract_text(response)
-            except Exception as exc:  # pragma: no cover - network failure
+                for event in events:
+                    if getattr(event, "type", None) == "response.output_text.delta":
+                        parts.append(event.delta)
+                        yield event.delta
+            except Exception as exc:
+                settled = True
+                self._count("failures")
+                self.breaker.record_failure()
+                if parts:
+                    LOGGER.warning("OpenAI stream interrupted: %s", exc)
+                    return
                 LOGGER.warning("OpenAI request failed, falling back to heuristic mode: %s", exc)
-        return self._fallback_response(user_prompt)
+                yield from _chunks(self._fallback_response(user_prompt))
+                return
+            settled = True
+            self._count("successes")
+            self.breaker.record_success()
+        finally:
+            if not settled:  # the caller closed the stream or was interrupted
+                self.breaker.record_abandoned()
+        if key is not None and parts:
+            self.cache.put(key, self.model, "".join(parts), ref_ids)
+
+    def _request(self, system_prompt: str, user_prompt: str) -> str | None:
+        """Call the API with retries; ``None`` means use the fallback.
+
+        Retryable errors (timeouts, connection errors, 408/409/429/5xx) are
+        retried up to ``max_retries`` times with jittered exponential backoff.
+        A 429 pauses every request made through this client, so concurrent
+        callers slow down together. While the circuit breaker is open the
+        API is not called at all.
+        """
+        if not self.breaker.allow():
+            self._count("short_circuits")
+            return None
+        self._count("requests")
+        settled = False
+        try:
+            for attempt in range(self.max_retries + 1):
+                self._wait_for_rate_limit()
+                try:
+                    response = self._client.responses.create(
+                        model=self.model,
+                        input=[
+                            {"role": "system", "content": system_prompt},
+                            {"role": "user", "content": user_prompt},
+                        ],
+                        temperature=0.2,
+                    )
+                except Exception as exc:
+                    delay = _retry_delay(exc, attempt, self._retryable)
+                    if delay is None or attempt == self.max_retries:
+                        LOGGER.warning(
+                            "OpenAI request failed, falling back to heuristic mode: %s", exc
+                        )
+                        break
+                    LOGGER.info("OpenAI request failed (%s); retrying in %.1fs", exc, delay)
+                    self._count("retries")
+                    if getattr(exc, "status_code", None) == 429:
+                        with self._rate_limit_lock:
+                            self._resume_at = max(self._resume_at, time.monotonic() + delay)
+                    else:
+                        time.sleep(delay)
+                    continue
+                settled = True
+                self._count("successes")
+                self.breaker.record_success()
+                return self._extract_text(response)
+            settled = True
+            self._count("failures")
+            self.breaker.record_failure()
+            return None
+        finally:
+            if not settled:  # interrupted mid-request or mid-backoff
+                self.breaker.record_abandoned()
+
+    def _count(self, name: str) -> None:
+        with self._rate_limit_lock:
+            setattr(self.stats, name, getattr(self.stats, name) + 1)
+
+    def _wait_for_rate_limit(self) -> None:
+        delay = self._resume_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def respond_async(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        *,
+        ref_ids: Iterable[str] = (),
+        executor: Executor | None = None,
+    ) -> str:
+        """Awaitable :meth:`respond`; the blocking SDK call runs on a worker thread.
+
+        Cache lookups and stores run on ``executor`` (pass ``AsyncStorage.executor``
+        so they reuse its bounded set of SQLite connections); only the network
+        request goes to the default thread pool.
+        """
+        if not self._client:
+            return self._fallback_response(user_prompt)
+        loop = asyncio.get_running_loop()
+        key = None
+        if self.cache is not None:
+            key = cache_key(self.model, system_prompt, user_prompt)
+            cached = await loop.run_in_executor(executor, self.cache.get, key)
+            if cached is not None:
+                return cached
+        answer = await asyncio.to_thread(self._request, system_prompt, user_prompt)
+        if answer is None:
+            return self._fallback_response(user_prompt)
+        if key is not None:
+            await loop.run_in_executor(
+                executor, partial(self.cache.put, key, self.model, answer, ref_ids)
+            )
+        return answer
 
     def _extract_text(self, response: Any) -> str:
         """Handle OpenAI Responses output shape."""
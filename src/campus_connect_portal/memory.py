@@ -0,0 +1,62 @@
+"""Bounded conversation memory for chat sessions."""
+
+from __future__ import annotations
+
+import textwrap
+from collections import deque
+
+from .config import CHAT_SUMMARY_CHARS, MAX_CHAT_CONTEXT
+from .storage import Storage
+
+# Characters kept from each message once it is folded into the summary.
+SUMMARY_SNIPPET_CHARS = 120
+
+
+class ConversationMemory:
+    """Last ``max_turns`` turns verbatim plus a rolling summary of older ones.
+
+    The window is read once from ``chat_messages`` (an indexed lookup on
+    ``session_id, created_at``) and then kept in memory, so later turns
+    never touch the database. Messages that leave the window are shortened
+    into a summary capped at ``summary_chars``, dropping the oldest first, so
+    the rendered history has a fixed upper bound however long the chat runs.
+    """
+
+    def __init__(
+        self,
+        session_id: str,
+        storage: Storage | None = None,
+        *,
+        max_turns: int = MAX_CHAT_CONTEXT,
+        summary_chars: int = CHAT_SUMMARY_CHARS,
+    ):
+        self.session_id = session_id
+        self.max_messages = max_turns * 2  # a turn is a question and its answer
+        self.summary_chars = summary_chars
+        self._window: deque[tuple[str, str]] = deque()
+        self._summary: deque[str] = deque()
+        self._summary_length = 0
+        if storage is not None:
+            rows = storage.fetch_chat_history(session_id, limit=self.max_messages)
+            for row in reversed(rows):
+                self.add(row["role"], row["content"])
+
+    def add(self, role: str, content: str) -> None:
+        self._window.append((role, content))
+        while len(self._window) > self.max_messages:
+            self._fold(*self._window.popleft())
+
+    def lines(self) -> list[str]:
+        """History rendered for the prompt, oldest first."""
+        lines = []
+        if self._summary:
+            lines.append(f"Earlier: {' '.join(self._summary)}")
+        lines.extend(f"{role}: {content}" for role, content in self._window)
+        return lines
+
+    def _fold(self, role: str, content: str) -> None:
+        snippet = f"{role}: {textwrap.shorten(content, width=SUMMARY_SNIPPET_CHARS, placeholder=' [...]')}"
+        self._summary.append(snippet)
+        self._summary_length += len(snippet) + 1
+        while self._summary_length > self.summary_chars and len(self._summary) > 1:
+            self._summary_length -= len(self._summary.popleft()) + 1
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import json
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from typing import Sequence
@@ -125,6 +126,17 @@ class ChatMessage:
             self.created_at,
         )
 
+    @classmethod
+    def from_row(cls, row) -> "ChatMessage":
+        return cls(
+            id=row["id"],
+            session_id=row["session_id"],
+            role=row["role"],
+            content=row["content"],
+            citations=[c for c in (row["citations"] or "").split(",") if c],
+            created_at=row["created_at"],
+        )
+
 
 @dataclass(slots=True)
 class PortalRecord:
@@ -141,6 +153,25 @@ class PortalRecord:
     updated_at: str = field(default_factory=_now_iso)
     id: str = field(default_factory=lambda: str(uuid4()))
 
+    @property
+    def content_hash(self) -> str:
+        """Fingerprint of the portal-visible fields, ignoring ids and timestamps."""
+        import hashlib  # only needed by sync; keeps CLI startup lean
+
+        payload = json.dumps(
+            [
+                self.record_id,
+                self.course,
+                self.component,
+                self.grade,
+                self.points,
+                self.campus_area,
+                self.needs_follow_up,
+                self.notes,
+            ]
+        )
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
     def to_row(self) -> tuple:
         return (
             self.id,
@@ -153,6 +184,7 @@ class PortalRecord:
             int(self.needs_follow_up),
             self.notes,
             self.updated_at,
+            self.content_hash,
         )
 
     @classmethod
@@ -2,11 +2,26 @@
 
 from __future__ import annotations
 
-from difflib import SequenceMatcher
-from typing import Iterable
+import threading
+from pathlib import Path
+from typing import Iterable, Iterator
 
 from .models import KnowledgeEntry
-from .storage import Storage
+from .search_index import InvertedIndex
+from .storage import Storage, fts_match_query
+
+
+TITLE_WEIGHT = 3.0
+TAG_WEIGHT = 2.0
+CAMPUS_AREA_WEIGHT = 1.0
+BOOSTED_CAMPUS_AREAS = ("Grades", "Financial Aid")
+SEARCH_CANDIDATES = 200
+INDEX_NAME = "knowledge"
+
+# Indexes already loaded in this process, keyed by database path, so every
+# KnowledgeBase (and a long-running CLI daemon) reuses a warm copy.
+_LOADED_INDEXES: dict[Path, InvertedIndex] = {}
+_INDEX_LOCK = threading.Lock()
 
 
 class KnowledgeBase:
@@ -14,6 +29,7 @@ class KnowledgeBase:
 
     def __init__(self, storage: Storage | None = None):
         self.storage = storage or Storage()
+        self._index: InvertedIndex | None = None
 
     def add_entry(
         self,
@@ -32,30 +48,118 @@ class KnowledgeBase:
             source=source,
         )
         self.storage.upsert_knowledge(entry.to_row())
+        if self._index is not None:
+            with _INDEX_LOCK:
+                self._index_entry(self._index, entry)
         return entry
 
+    def add_entries(self, entries: Iterable[KnowledgeEntry]) -> list[KnowledgeEntry]:
+        """Store prebuilt entries with one ``executemany``."""
+        entries = list(entries)
+        self.storage.upsert_knowledge_many(entry.to_row() for entry in entries)
+        if self._index is not None:
+            with _INDEX_LOCK:
+                for entry in entries:
+                    self._index_entry(self._index, entry)
+        return entries
+
+    def remove_entries(self, ids: Iterable[str]) -> int:
+        ids = list(ids)
+        removed = self.storage.delete_knowledge(ids)
+        if self._index is not None:
+            with _INDEX_LOCK:
+                for entry_id in ids:
+                    self._index.remove(entry_id)
+        return removed
+
     def list_entries(self, limit: int = 20) -> list[KnowledgeEntry]:
         rows = self.storage.fetch_knowledge(limit=limit)
         return [KnowledgeEntry.from_row(row) for row in rows]
 
+    def iter_entries(self, *, after: tuple[str, str] | None = None) -> Iterator[KnowledgeEntry]:
+        """Every entry oldest first, fetched page by page and built lazily."""
+        return map(KnowledgeEntry.from_row, self.storage.iter_knowledge(after=after))
+
     def search(self, query: str, limit: int = 3) -> list[KnowledgeEntry]:
         query = query.strip()
         if not query:
             return []
-        rows = self.storage.fetch_knowledge(limit=200)
-        scored: list[tuple[float, KnowledgeEntry]] = []
-        for row in rows:
-            entry = KnowledgeEntry.from_row(row)
-            score = self._score_entry(entry, query)
-            if score > 0:
-                scored.append((score, entry))
+        if self.storage.has_fts:
+            return self._search_fts(query, limit)
+        return self._search_index(query, limit)
+
+    def _search_fts(self, query: str, limit: int) -> list[KnowledgeEntry]:
+        match_query = fts_match_query(query)
+        if not match_query:
+            return []
+        rows = self.storage.search_knowledge_fts(
+            match_query,
+            query.lower(),
+            limit=limit,
+            title_weight=TITLE_WEIGHT,
+            tag_weight=TAG_WEIGHT,
+            area_weight=CAMPUS_AREA_WEIGHT,
+            boosted_areas=BOOSTED_CAMPUS_AREAS,
+        )
+        return [KnowledgeEntry.from_row(row) for row in rows]
+
+    def _search_index(self, query: str, limit: int) -> list[KnowledgeEntry]:
+        index = self._get_index()
+        with _INDEX_LOCK:  # writers update and compact the shared index in place
+            hits = index.search(query, SEARCH_CANDIDATES)
+        if not hits:
+            return []
+        bm25 = dict(hits)
+        rows = self.storage.fetch_knowledge_by_ids([doc_id for doc_id, _ in hits])
+        scored = [
+            (bm25[entry.id] + self._bonus(entry, query), entry)
+            for entry in map(KnowledgeEntry.from_row, rows)
+        ]
         scored.sort(key=lambda item: item[0], reverse=True)
         return [entry for _, entry in scored[:limit]]
 
-    def _score_entry(self, entry: KnowledgeEntry, query: str) -> float:
-        title_hit = 3.0 if query.lower() in entry.title.lower() else 0.0
-        tag_hit = 2.0 if any(query.lower() in tag.lower() for tag in entry.tags) else 0.0
-        matcher = SequenceMatcher(None, entry.content.lower(), query.lower())
-        fuzz = matcher.ratio() * 2.0
-        campus_bonus = 1.0 if entry.campus_area in ("Grades", "Financial Aid") else 0.0
-        return title_hit + tag_hit + fuzz + campus_bonus
+    def _get_index(self) -> InvertedIndex:
+        """Load the index lazily and catch it up with rows written since.
+
+        A copy already loaded in this process is preferred over the persisted
+        one; either way only rows newer than its watermark are indexed.
+        """
+        with _INDEX_LOCK:
+            if self._index is not None:
+                return self._index
+            index = _LOADED_INDEXES.get(self.storage.db_path)
+            if index is None:
+                payload = self.storage.load_search_index(INDEX_NAME)
+                index = InvertedIndex.from_bytes(payload) if payload else None
+            if index is None:
+                index = InvertedIndex()
+            changed = False
+            for row in self.storage.fetch_knowledge_updated_since(index.watermark):
+                self._index_entry(index, KnowledgeEntry.from_row(row))
+                changed = True
+            if len(index) != self.storage.count_knowledge():
+                # rows were deleted behind our back; start over
+                index = InvertedIndex()
+                for row in self.storage.fetch_knowledge_updated_since(""):
+                    self._index_entry(index, KnowledgeEntry.from_row(row))
+                changed = True
+            if changed:
+                self.storage.save_search_index(INDEX_NAME, index.to_bytes(), index.watermark)
+            _LOADED_INDEXES[self.storage.db_path] = index
+            self._index = index
+            return index
+
+    def _index_entry(self, index: InvertedIndex, entry: KnowledgeEntry) -> None:
+        index.add(
+            entry.id,
+            title=entry.title,
+            content=entry.content,
+            tags=",".join(entry.tags),
+            updated_at=entry.updated_at,
+        )
+
+    def _bonus(self, entry: KnowledgeEntry, query: str) -> float:
+        title_hit = TITLE_WEIGHT if query.lower() in entry.title.lower() else 0.0
+        tag_hit = TAG_WEIGHT if any(query.lower() in tag.lower() for tag in entry.tags) else 0.0
+        campus_bonus = CAMPUS_AREA_WEIGHT if entry.campus_area in BOOSTED_CAMPUS_AREAS else 0.0
+        return title_hit + tag_hit + campus_bonus
@@ -0,0 +1,93 @@
+"""Due-date aware ordering of open tasks ("what should I do next")."""
+
+from __future__ import annotations
+
+from datetime import date, datetime
+from functools import lru_cache
+
+from .config import TASK_PRIORITIES
+
+# Days of lead time each priority earns: a critical task due in two weeks
+# ranks alongside a low-priority one due today.
+PRIORITY_LEAD_DAYS = {"low": 0, "medium": 3, "high": 7, "critical": 14}
+# Work already started comes first; blocked work is pushed back a week.
+# Done tasks are not scheduled at all.
+STATUS_LEAD_DAYS = {"in_progress": 2, "todo": 0, "blocked": -7}
+# A task without a (parseable) due date counts as due this long after creation.
+UNDATED_DUE_DAYS = 14
+
+DUE_DATE_FORMATS = (
+    "%Y-%m-%d",
+    "%Y/%m/%d",
+    "%m/%d/%Y",
+    "%m/%d/%y",
+    "%b %d, %Y",
+    "%b %d %Y",
+    "%B %d, %Y",
+    "%B %d %Y",
+    "%d %b %Y",
+    "%d %B %Y",
+)
+
+
+@lru_cache(maxsize=4096)
+def normalize_due_date(value: str | None) -> str | None:
+    """Parse a free-form due date into ``YYYY-MM-DD``; ``None`` if unparseable.
+
+    ISO dates and timestamps are tried first, then US-style and spelled-out
+    month formats (``11/30/2025``, ``Nov 30, 2025``, ``30 November 2025``).
+    """
+    if not value:
+        return None
+    text = " ".join(value.split())
+    try:
+        return date.fromisoformat(text[:10]).isoformat()
+    except ValueError:
+        pass
+    for fmt in DUE_DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+def schedule_key(
+    due_date: str | None, priority: str, status: str, created_at: str
+) -> int | None:
+    """Sort key for the next-up order (lower comes first); ``None`` when done.
+
+    The key is the task's effective due day (its due date, or creation date
+    plus ``UNDATED_DUE_DAYS``, minus priority and status lead days) with ties
+    going to the higher priority. Urgency grows by one per day for every
+    task alike, so the order never depends on today's date and the key is
+    only recomputed when the task itself is written.
+    """
+    if status not in STATUS_LEAD_DAYS:
+        return None
+    due = normalize_due_date(due_date)
+    if due is not None:
+        day = date.fromisoformat(due).toordinal()
+    else:
+        try:
+            day = date.fromisoformat(created_at[:10]).toordinal() + UNDATED_DUE_DAYS
+        except (TypeError, ValueError):
+            day = date.max.toordinal()
+    day -= PRIORITY_LEAD_DAYS.get(priority, 0) + STATUS_LEAD_DAYS[status]
+    rank = TASK_PRIORITIES.index(priority) if priority in TASK_PRIORITIES else 0
+    return day * len(TASK_PRIORITIES) + len(TASK_PRIORITIES) - 1 - rank
+
+
+def describe_due(due_date: str | None, today: date | None = None) -> str:
+    """Human label such as ``due 2025-11-30, in 3 days`` or ``no due date``."""
+    due = normalize_due_date(due_date)
+    if due is None:
+        return f"due {due_date}, unparsed" if due_date else "no due date"
+    days = (date.fromisoformat(due) - (today or date.today())).days
+    if days < 0:
+        when = f"{-days} day{'s' if days != -1 else ''} overdue"
+    elif days == 0:
+        when = "today"
+    else:
+        when = f"in {days} day{'s' if days != 1 else ''}"
+    return f"due {due}, {when}"
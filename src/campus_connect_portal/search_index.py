@@ -0,0 +1,193 @@
+"""Pure-Python inverted index used for note search when SQLite lacks FTS5."""
+
+from __future__ import annotations
+
+import marshal
+import math
+import re
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from typing import Iterable
+
+TOKEN_RE = re.compile(r"\w+")
+FORMAT_VERSION = 1
+
+# Per-field term frequency multipliers, mirroring the FTS5 bm25() weights.
+FIELD_WEIGHTS = (("title", 3), ("content", 1), ("tags", 2))
+
+
+def tokenize(text: str | None) -> list[str]:
+    return TOKEN_RE.findall(text.lower()) if text else []
+
+
+class InvertedIndex:
+    """BM25-scored index whose postings are stored as compact ``array`` columns.
+
+    Each document gets a dense number; every term maps to two parallel arrays
+    of document numbers and weighted term frequencies. Re-indexing a document
+    tombstones its old number, and the index compacts itself once half of the
+    numbers are dead. ``watermark`` is the newest ``updated_at`` indexed so a
+    persisted copy can be caught up instead of rebuilt.
+    """
+
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self) -> None:
+        self.doc_ids: list[str | None] = []
+        self.doc_lengths = array("I")
+        self.postings: dict[str, tuple[array, array]] = {}
+        self.live: dict[str, int] = {}
+        self.total_length = 0
+        self.watermark = ""
+        self._sorted_terms: list[str] | None = None
+
+    def __len__(self) -> int:
+        return len(self.live)
+
+    def add(
+        self,
+        doc_id: str,
+        *,
+        title: str,
+        content: str,
+        tags: str | None,
+        updated_at: str,
+    ) -> None:
+        self.remove(doc_id)
+        fields = {"title": title, "content": content, "tags": tags}
+        freqs: Counter[str] = Counter()
+        for name, weight in FIELD_WEIGHTS:
+            for token in tokenize(fields[name]):
+                freqs[token] += weight
+        number = len(self.doc_ids)
+        self.doc_ids.append(doc_id)
+        length = sum(freqs.values())
+        self.doc_lengths.append(length)
+        self.total_length += length
+        self.live[doc_id] = number
+        for term, freq in freqs.items():
+            posting = self.postings.get(term)
+            if posting is None:
+                posting = self.postings[term] = (array("I"), array("I"))
+                self._sorted_terms = None
+            posting[0].append(number)
+            posting[1].append(freq)
+        if updated_at > self.watermark:
+            self.watermark = updated_at
+
+    def remove(self, doc_id: str) -> None:
+        number = self.live.pop(doc_id, None)
+        if number is None:
+            return
+        self.doc_ids[number] = None
+        self.total_length -= self.doc_lengths[number]
+        if len(self.doc_ids) > 64 and len(self.live) * 2 < len(self.doc_ids):
+            self.compact()
+
+    def compact(self) -> None:
+        """Renumber live documents and drop tombstoned postings."""
+        renumber = array("i", [-1]) * len(self.doc_ids)
+        doc_ids: list[str | None] = []
+        doc_lengths = array("I")
+        for number, doc_id in enumerate(self.doc_ids):
+            if doc_id is not None:
+                renumber[number] = len(doc_ids)
+                doc_ids.append(doc_id)
+                doc_lengths.append(self.doc_lengths[number])
+        postings: dict[str, tuple[array, array]] = {}
+        for term, (numbers, freqs) in self.postings.items():
+            new_numbers, new_freqs = array("I"), array("I")
+            for number, freq in zip(numbers, freqs):
+                if renumber[number] >= 0:
+                    new_numbers.append(renumber[number])
+                    new_freqs.append(freq)
+            if new_numbers:
+                postings[term] = (new_numbers, new_freqs)
+        self.doc_ids = doc_ids
+        self.doc_lengths = doc_lengths
+        self.postings = postings
+        self.live = {doc_id: number for number, doc_id in enumerate(doc_ids)}
+        self._sorted_terms = None
+
+    def search(self, query: str, limit: int) -> list[tuple[str, float]]:
+        """Return up to ``limit`` ``(doc_id, bm25)`` pairs, best first.
+
+        Query words of three or more letters also match as prefixes, like the
+        FTS5 search path.
+        """
+        if not self.live:
+            return []
+        doc_count = len(self.live)
+        avg_length = self.total_length / doc_count or 1.0
+        scores: dict[int, float] = {}
+        for term in self._expand(tokenize(query)):
+            numbers, freqs = self.postings[term]
+            # Tombstoned postings are skipped, including for the document frequency.
+            live = [
+                (number, freq)
+                for number, freq in zip(numbers, freqs)
+                if self.doc_ids[number] is not None
+            ]
+            idf = math.log(1 + (doc_count - len(live) + 0.5) / (len(live) + 0.5))
+            for number, freq in live:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[number] / avg_length)
+                scores[number] = scores.get(number, 0.0) + idf * freq * (self.k1 + 1) / (freq + norm)
+        best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [(self.doc_ids[number], score) for number, score in best]
+
+    def _expand(self, tokens: Iterable[str]) -> set[str]:
+        terms: set[str] = set()
+        for token in tokens:
+            if len(token) < 3:
+                if token in self.postings:
+                    terms.add(token)
+                continue
+            if self._sorted_terms is None:
+                self._sorted_terms = sorted(self.postings)
+            start = bisect_left(self._sorted_terms, token)
+            for term in self._sorted_terms[start:]:
+                if not term.startswith(token):
+                    break
+                terms.add(term)
+        return terms
+
+    # Persistence -----------------------------------------------------
+
+    def to_bytes(self) -> bytes:
+        self.compact()
+        terms = list(self.postings)
+        return marshal.dumps(
+            {
+                "version": FORMAT_VERSION,
+                "watermark": self.watermark,
+                "doc_ids": self.doc_ids,
+                "doc_lengths": self.doc_lengths.tobytes(),
+                "terms": terms,
+                "numbers": [self.postings[term][0].tobytes() for term in terms],
+                "freqs": [self.postings[term][1].tobytes() for term in terms],
+            }
+        )
+
+    @classmethod
+    def from_bytes(cls, payload: bytes) -> "InvertedIndex | None":
+        """Restore a persisted index, or ``None`` if the payload is unusable."""
+        try:
+            state = marshal.loads(payload)
+        except (EOFError, ValueError, TypeError):
+            return None
+        if not isinstance(state, dict) or state.get("version") != FORMAT_VERSION:
+            return None
+        index = cls()
+        index.watermark = state["watermark"]
+        index.doc_ids = list(state["doc_ids"])
+        index.doc_lengths.frombytes(state["doc_lengths"])
+        for term, numbers, freqs in zip(state["terms"], state["numbers"], state["freqs"]):
+            posting = (array("I"), array("I"))
+            posting[0].frombytes(numbers)
+            posting[1].frombytes(freqs)
+            index.postings[term] = posting
+        index.live = {doc_id: number for number, doc_id in enumerate(index.doc_ids)}
+        index.total_length = sum(index.doc_lengths)
+        return index
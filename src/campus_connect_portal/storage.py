@@ -2,105 +2,476 @@
 
 from __future__ import annotations
 
+import json
+import re
 import sqlite3
+import threading
 from contextlib import contextmanager
 from pathlib import Path
-from typing import Iterable, Iterator, Sequence
+from typing import Callable, Iterable, Iterator, Sequence
 
-from .config import DB_PATH
+from .config import DB_PATH, DB_PROFILE, DB_PROFILES, PAGE_SIZE
+from .scheduler import normalize_due_date, schedule_key
+
+
+def fts_match_query(query: str) -> str:
+    """Turn free text into an FTS5 OR-query; longer words also match as prefixes."""
+    terms = []
+    for token in re.findall(r"\w+", query.lower()):
+        terms.append(f'"{token}"*' if len(token) >= 3 else f'"{token}"')
+    return " OR ".join(terms)
+
+
+def format_cursor(timestamp: str, row_id: str) -> str:
+    """Encode a keyset position as ``TIMESTAMP,ID`` for the ``--after`` flags."""
+    return f"{timestamp},{row_id}"
+
+
+def parse_cursor(cursor: str) -> tuple[str, str]:
+    """Inverse of :func:`format_cursor`.
+
+    A bare timestamp (or date) starts at that time: ids are never empty, so
+    ``(timestamp, "")`` sorts before every row stamped then or later.
+    """
+    timestamp, _, row_id = cursor.partition(",")
+    if not timestamp:
+        raise ValueError(f"Invalid cursor {cursor!r}; expected TIMESTAMP[,ID]")
+    return timestamp, row_id
+
+
+def _fts5_available(conn: sqlite3.Connection) -> bool:
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(body);")
+    except sqlite3.OperationalError:
+        return False
+    conn.execute("DROP TABLE temp.fts5_probe;")
+    return True
+
+
+def _create_knowledge_fts(conn: sqlite3.Connection) -> None:
+    """Index knowledge title/content/tags with FTS5 when the build supports it."""
+    if not _fts5_available(conn):
+        return
+    for statement in (
+        """
+        CREATE VIRTUAL TABLE knowledge_fts USING fts5(
+            title, content, tags, content='knowledge_entries'
+        )
+        """,
+        """
+        CREATE TRIGGER knowledge_fts_ai AFTER INSERT ON knowledge_entries BEGIN
+            INSERT INTO knowledge_fts(rowid, title, content, tags)
+            VALUES (new.rowid, new.title, new.content, new.tags);
+        END
+        """,
+        """
+        CREATE TRIGGER knowledge_fts_ad AFTER DELETE ON knowledge_entries BEGIN
+            INSERT INTO knowledge_fts(knowledge_fts, rowid, title, content, tags)
+            VALUES ('delete', old.rowid, old.title, old.content, old.tags);
+        END
+        """,
+        """
+        CREATE TRIGGER knowledge_fts_au AFTER UPDATE ON knowledge_entries BEGIN
+            INSERT INTO knowledge_fts(knowledge_fts, rowid, title, content, tags)
+            VALUES ('delete', old.rowid, old.title, old.content, old.tags);
+            INSERT INTO knowledge_fts(rowid, title, content, tags)
+            VALUES (new.rowid, new.title, new.content, new.tags);
+        END
+        """,
+        "INSERT INTO knowledge_fts(knowledge_fts) VALUES ('rebuild')",
+    ):
+        conn.execute(statement)
+
+
+def _create_tasks_fts(conn: sqlite3.Connection) -> None:
+    """Index task title/description with FTS5 when the build supports it."""
+    if not _fts5_available(conn):
+        return
+    for statement in (
+        """
+        CREATE VIRTUAL TABLE tasks_fts USING fts5(
+            title, description, content='tasks'
+        )
+        """,
+        """
+        CREATE TRIGGER tasks_fts_ai AFTER INSERT ON tasks BEGIN
+            INSERT INTO tasks_fts(rowid, title, description)
+            VALUES (new.rowid, new.title, new.description);
+        END
+        """,
+        """
+        CREATE TRIGGER tasks_fts_ad AFTER DELETE ON tasks BEGIN
+            INSERT INTO tasks_fts(tasks_fts, rowid, title, description)
+            VALUES ('delete', old.rowid, old.title, old.description);
+        END
+        """,
+        """
+        CREATE TRIGGER tasks_fts_au AFTER UPDATE OF title, description ON tasks BEGIN
+            INSERT INTO tasks_fts(tasks_fts, rowid, title, description)
+            VALUES ('delete', old.rowid, old.title, old.description);
+            INSERT INTO tasks_fts(rowid, title, description)
+            VALUES (new.rowid, new.title, new.description);
+        END
+        """,
+        "INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')",
+    ):
+        conn.execute(statement)
+
+
+# Numbered schema migrations. Entry N (1-based) upgrades a database from
+# ``user_version`` N-1 to N inside one transaction; append new entries, never
+# edit applied ones. Callables run against the open transaction and are used
+# for steps that depend on what the SQLite build supports.
+MIGRATIONS: tuple[str | Callable[[sqlite3.Connection], None], ...] = (
+    # 1: base schema
+    """
+    CREATE TABLE IF NOT EXISTS knowledge_entries (
+        id TEXT PRIMARY KEY,
+        title TEXT NOT NULL,
+        content TEXT NOT NULL,
+        tags TEXT,
+        campus_area TEXT,
+        source TEXT,
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL
+    );
+
+    CREATE TABLE IF NOT EXISTS tasks (
+        id TEXT PRIMARY KEY,
+        title TEXT NOT NULL,
+        description TEXT NOT NULL,
+        status TEXT NOT NULL,
+        priority TEXT NOT NULL,
+        due_date TEXT,
+        related_entry_id TEXT,
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL,
+        FOREIGN KEY (related_entry_id) REFERENCES knowledge_entries(id) ON DELETE SET NULL
+    );
+
+    CREATE TABLE IF NOT EXISTS chat_messages (
+        id TEXT PRIMARY KEY,
+        session_id TEXT NOT NULL,
+        role TEXT NOT NULL,
+        content TEXT NOT NULL,
+        citations TEXT,
+        created_at TEXT NOT NULL
+    );
+
+    CREATE TABLE IF NOT EXISTS portal_records (
+        id TEXT PRIMARY KEY,
+        record_id TEXT NOT NULL,
+        course TEXT,
+        component TEXT NOT NULL,
+        grade TEXT,
+        points TEXT,
+        campus_area TEXT,
+        needs_follow_up INTEGER NOT NULL DEFAULT 0,
+        notes TEXT,
+        updated_at TEXT NOT NULL
+    );
+    """,
+    # 2: indexes backing the ORDER BY / WHERE clauses of the fetch helpers
+    """
+    CREATE INDEX IF NOT EXISTS idx_knowledge_updated_at
+        ON knowledge_entries(updated_at);
+    CREATE INDEX IF NOT EXISTS idx_tasks_updated_at ON tasks(updated_at);
+    CREATE INDEX IF NOT EXISTS idx_tasks_status_updated_at ON tasks(status, updated_at);
+    CREATE INDEX IF NOT EXISTS idx_tasks_title ON tasks(title);
+    CREATE INDEX IF NOT EXISTS idx_chat_messages_session_created
+        ON chat_messages(session_id, created_at);
+    """,
+    # 3: full-text index over knowledge entries (skipped without FTS5)
+    _create_knowledge_fts,
+    # 4: persisted in-process search indexes for builds without FTS5
+    """
+    CREATE TABLE IF NOT EXISTS search_indexes (
+        name TEXT PRIMARY KEY,
+        payload BLOB NOT NULL,
+        updated_at TEXT NOT NULL
+    );
+    """,
+    # 5: portal records are keyed on record_id; keep the newest duplicate
+    """
+    ALTER TABLE portal_records ADD COLUMN content_hash TEXT;
+    DELETE FROM portal_records WHERE rowid NOT IN (
+        SELECT rowid FROM (
+            SELECT rowid, ROW_NUMBER() OVER (
+                PARTITION BY record_id ORDER BY updated_at DESC, rowid DESC
+            ) AS position
+            FROM portal_records
+        )
+        WHERE position = 1
+    );
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_portal_records_record_id
+        ON portal_records(record_id);
+    """,
+    # 6: LLM response cache; writing a cited entry or task drops its answers
+    """
+    CREATE TABLE IF NOT EXISTS llm_responses (
+        key TEXT PRIMARY KEY,
+        model TEXT NOT NULL,
+        response TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        last_used REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_llm_responses_last_used ON llm_responses(last_used);
+    CREATE TABLE IF NOT EXISTS llm_response_refs (
+        ref_id TEXT NOT NULL,
+        key TEXT NOT NULL REFERENCES llm_responses(key) ON DELETE CASCADE,
+        PRIMARY KEY (ref_id, key)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_llm_response_refs_key ON llm_response_refs(key);
+    CREATE TRIGGER llm_responses_knowledge_au AFTER UPDATE ON knowledge_entries BEGIN
+        DELETE FROM llm_responses
+        WHERE key IN (SELECT key FROM llm_response_refs WHERE ref_id = old.id);
+    END;
+    CREATE TRIGGER llm_responses_knowledge_ad AFTER DELETE ON knowledge_entries BEGIN
+        DELETE FROM llm_responses
+        WHERE key IN (SELECT key FROM llm_response_refs WHERE ref_id = old.id);
+    END;
+    CREATE TRIGGER llm_responses_tasks_au AFTER UPDATE ON tasks BEGIN
+        DELETE FROM llm_responses
+        WHERE key IN (SELECT key FROM llm_response_refs WHERE ref_id = old.id);
+    END;
+    CREATE TRIGGER llm_responses_tasks_ad AFTER DELETE ON tasks BEGIN
+        DELETE FROM llm_responses
+        WHERE key IN (SELECT key FROM llm_response_refs WHERE ref_id = old.id);
+    END;
+    """,
+    # 7: full-text index over tasks (skipped without FTS5)
+    _create_tasks_fts,
+    # 8: keyset pagination walks (timestamp, id); widen the timestamp indexes
+    """
+    DROP INDEX IF EXISTS idx_knowledge_updated_at;
+    CREATE INDEX idx_knowledge_updated_at ON knowledge_entries(updated_at, id);
+    DROP INDEX IF EXISTS idx_tasks_updated_at;
+    CREATE INDEX idx_tasks_updated_at ON tasks(updated_at, id);
+    DROP INDEX IF EXISTS idx_tasks_status_updated_at;
+    CREATE INDEX idx_tasks_status_updated_at ON tasks(status, updated_at, id);
+    DROP INDEX IF EXISTS idx_chat_messages_session_created;
+    CREATE INDEX idx_chat_messages_session_created
+        ON chat_messages(session_id, created_at, id);
+    """,
+    # 9: normalized due dates and the next-up order (see scheduler.py); the
+    # task_* functions are registered on every connection by Storage._connect
+    """
+    ALTER TABLE tasks ADD COLUMN due_key TEXT;
+    ALTER TABLE tasks ADD COLUMN schedule_key INTEGER;
+    UPDATE tasks SET
+        due_key = task_due_key(due_date),
+        schedule_key = task_schedule_key(due_date, priority, status, created_at);
+    CREATE INDEX idx_tasks_due_key ON tasks(due_key);
+    CREATE INDEX idx_tasks_schedule ON tasks(schedule_key, id)
+        WHERE schedule_key IS NOT NULL;
+    """,
+)
+SCHEMA_VERSION = len(MIGRATIONS)
+
+# Databases already migrated by this process, keyed by resolved path and
+# mapped to the FTS5 tables they carry.
+_MIGRATED: dict[Path, frozenset[str]] = {}
+_SCHEMA_LOCK = threading.Lock()
+
+
+def _split_statements(script: str) -> Iterator[str]:
+    buffer = ""
+    for line in script.splitlines(keepends=True):
+        buffer += line
+        if sqlite3.complete_statement(buffer):
+            yield buffer
+            buffer = ""
+    if buffer.strip():
+        yield buffer
+
+
+def _schema_state(conn: sqlite3.Connection) -> tuple[int, frozenset[str]]:
+    """Read ``user_version`` and the FTS5 tables present in one statement."""
+    row = conn.execute(
+        """
+        SELECT user_version, (
+            SELECT group_concat(name) FROM sqlite_master
+            WHERE type = 'table' AND name IN ('knowledge_fts', 'tasks_fts')
+        )
+        FROM pragma_user_version
+        """
+    ).fetchone()
+    return row[0], frozenset((row[1] or "").split(",")) - {""}
+
+
+_UPSERT_KNOWLEDGE_SQL = """
+    INSERT INTO knowledge_entries (
+        id, title, content, tags, campus_area, source, created_at, updated_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET
+        title=excluded.title,
+        content=excluded.content,
+        tags=excluded.tags,
+        campus_area=excluded.campus_area,
+        source=excluded.source,
+        created_at=excluded.created_at,
+        updated_at=excluded.updated_at;
+"""
+
+_UPSERT_TASK_SQL = """
+    INSERT INTO tasks (
+        id, title, description, status, priority, due_date,
+        related_entry_id, created_at, updated_at, due_key, schedule_key
+    ) VALUES (
+        ?1, ?2, ?3, ?4, ?5, ?6, ?7, ?8, ?9,
+        task_due_key(?6), task_schedule_key(?6, ?5, ?4, ?8)
+    )
+    ON CONFLICT(id) DO UPDATE SET
+        title=excluded.title,
+        description=excluded.description,
+        status=excluded.status,
+        priority=excluded.priority,
+        due_date=excluded.due_date,
+        related_entry_id=excluded.related_entry_id,
+        created_at=excluded.created_at,
+        updated_at=excluded.updated_at,
+        due_key=excluded.due_key,
+        schedule_key=excluded.schedule_key;
+"""
 
 
 class Storage:
-    """Lightweight wrapper around SQLite with helper queries."""
+    """Lightweight wrapper around SQLite with helper queries.
 
-    def __init__(self, db_path: Path | str = DB_PATH):
+    By default every helper opens and closes its own connection. Pass
+    ``persistent=True`` to keep one long-lived connection per thread instead;
+    call :meth:`close` (or use the storage as a context manager) when done.
+    Nested ``connection()`` blocks on the same thread share one connection and
+    one transaction in either mode. ``profile`` selects one of
+    ``config.DB_PROFILES`` and defaults to ``CAMPUS_CONNECT_DB_PROFILE``.
+    """
+
+    def __init__(
+        self,
+        db_path: Path | str = DB_PATH,
+        *,
+        persistent: bool = False,
+        profile: str | None = None,
+    ):
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        self._migrate()
+        self.persistent = persistent
+        self.profile = profile or DB_PROFILE
+        if self.profile not in DB_PROFILES:
+            raise ValueError(f"DB profile must be one of {tuple(DB_PROFILES)}")
+        self._local = threading.local()
+        self._open_connections: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._ensure_schema()
 
-    @contextmanager
-    def connection(self) -> Iterator[sqlite3.Connection]:
-        conn = sqlite3.connect(self.db_path)
+    def __enter__(self) -> "Storage":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=not self.persistent)
         conn.row_factory = sqlite3.Row
+        conn.create_function("task_due_key", 1, normalize_due_date, deterministic=True)
+        conn.create_function("task_schedule_key", 4, schedule_key, deterministic=True)
         conn.execute("PRAGMA foreign_keys = ON;")
+        for pragma, value in DB_PROFILES[self.profile].items():
+            conn.execute(f"PRAGMA {pragma} = {value};")
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        local = self._local
+        if getattr(local, "depth", 0):
+            local.depth += 1
+            try:
+                yield local.conn
+            finally:
+                local.depth -= 1
+            return
+        conn = getattr(local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            local.conn = conn
+            if self.persistent:
+                with self._lock:
+                    self._open_connections.append(conn)
+        local.depth = 1
         try:
             yield conn
             conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
         finally:
+            local.depth = 0
+            if not self.persistent:
+                local.conn = None
+                conn.close()
+
+    def close(self) -> None:
+        """Close every pooled connection opened by this storage."""
+        with self._lock:
+            connections, self._open_connections = self._open_connections, []
+        for conn in connections:
             conn.close()
+        self._local = threading.local()
+
+    def _ensure_schema(self) -> None:
+        """Migrate the database once per process; later instances reuse the result."""
+        key = self.db_path.resolve()
+        with _SCHEMA_LOCK:
+            fts_tables = _MIGRATED.get(key)
+            if fts_tables is None or not self.db_path.exists():
+                fts_tables = self._migrate()
+                _MIGRATED[key] = fts_tables
+        self.has_fts = "knowledge_fts" in fts_tables
+        self.has_task_fts = "tasks_fts" in fts_tables
+
+    def _migrate(self) -> frozenset[str]:
+        """Apply pending ``MIGRATIONS`` and record progress in ``user_version``.
 
-    def _migrate(self) -> None:
+        An up-to-date database costs a single ``user_version`` read (which
+        also lists the FTS5 tables). Each pending
+        step re-reads the version under ``BEGIN IMMEDIATE`` so concurrent
+        processes never apply the same migration twice. Returns the names of
+        the FTS5 tables present.
+        """
         with self.connection() as conn:
-            conn.executescript(
-                """
-                CREATE TABLE IF NOT EXISTS knowledge_entries (
-                    id TEXT PRIMARY KEY,
-                    title TEXT NOT NULL,
-                    content TEXT NOT NULL,
-                    tags TEXT,
-                    campus_area TEXT,
-                    source TEXT,
-                    created_at TEXT NOT NULL,
-                    updated_at TEXT NOT NULL
-                );
-
-                CREATE TABLE IF NOT EXISTS tasks (
-                    id TEXT PRIMARY KEY,
-                    title TEXT NOT NULL,
-                    description TEXT NOT NULL,
-                    status TEXT NOT NULL,
-                    priority TEXT NOT NULL,
-                    due_date TEXT,
-                    related_entry_id TEXT,
-                    created_at TEXT NOT NULL,
-                    updated_at TEXT NOT NULL,
-                    FOREIGN KEY (related_entry_id) REFERENCES knowledge_entries(id) ON DELETE SET NULL
-                );
-
-                CREATE TABLE IF NOT EXISTS chat_messages (
-                    id TEXT PRIMARY KEY,
-                    session_id TEXT NOT NULL,
-                    role TEXT NOT NULL,
-                    content TEXT NOT NULL,
-                    citations TEXT,
-                    created_at TEXT NOT NULL
-                );
-
-                CREATE TABLE IF NOT EXISTS portal_records (
-                    id TEXT PRIMARY KEY,
-                    record_id TEXT NOT NULL,
-                    course TEXT,
-                    component TEXT NOT NULL,
-                    grade TEXT,
-                    points TEXT,
-                    campus_area TEXT,
-                    needs_follow_up INTEGER NOT NULL DEFAULT 0,
-                    notes TEXT,
-                    updated_at TEXT NOT NULL
-                );
-                """
-            )
+            version, fts_tables = _schema_state(conn)
+            if version == SCHEMA_VERSION:
+                return fts_tables
+            while version < SCHEMA_VERSION:
+                conn.execute("BEGIN IMMEDIATE;")
+                version = conn.execute("PRAGMA user_version;").fetchone()[0]
+                if version >= SCHEMA_VERSION:
+                    conn.commit()
+                    break
+                migration = MIGRATIONS[version]
+                if callable(migration):
+                    migration(conn)
+                else:
+                    for statement in _split_statements(migration):
+                        conn.execute(statement)
+                version += 1
+                conn.execute(f"PRAGMA user_version = {version};")
+                conn.commit()
+            if version > SCHEMA_VERSION:
+                raise RuntimeError(
+                    f"{self.db_path} uses schema v{version}; this build supports v{SCHEMA_VERSION}"
+                )
+            return _schema_state(conn)[1]
 
     # Knowledge helpers -------------------------------------------------
 
     def upsert_knowledge(self, entry_row: Sequence) -> None:
         with self.connection() as conn:
-            conn.execute(
-                """
-                INSERT INTO knowledge_entries (
-                    id, title, content, tags, campus_area, source, created_at, updated_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT(id) DO UPDATE SET
-                    title=excluded.title,
-                    content=excluded.content,
-                    tags=excluded.tags,
-                    campus_area=excluded.campus_area,
-                    source=excluded.source,
-                    created_at=excluded.created_at,
-                    updated_at=excluded.updated_at;
-                """,
-                entry_row,
-            )
+            conn.execute(_UPSERT_KNOWLEDGE_SQL, entry_row)
+
+    def upsert_knowledge_many(self, entry_rows: Iterable[Sequence]) -> None:
+        with self.connection() as conn:
+            conn.executemany(_UPSERT_KNOWLEDGE_SQL, entry_rows)
 
     def fetch_knowledge(self, limit: int = 50) -> list[sqlite3.Row]:
         with self.connection() as conn:
@@ -114,6 +485,92 @@ class Storage:
             )
             return list(cur.fetchall())
 
+    def iter_knowledge(
+        self, *, after: tuple[str, str] | None = None, chunk_size: int = PAGE_SIZE
+    ) -> Iterator[sqlite3.Row]:
+        """Stream every entry ordered by ``(updated_at, id)``; see :meth:`_iter_keyset`."""
+        return self._iter_keyset(
+            "knowledge_entries", "updated_at", after=after, chunk_size=chunk_size
+        )
+
+    def search_knowledge_fts(
+        self,
+        match_query: str,
+        needle: str,
+        *,
+        limit: int,
+        title_weight: float,
+        tag_weight: float,
+        area_weight: float,
+        boosted_areas: Sequence[str],
+        candidates: int = 200,
+    ) -> list[sqlite3.Row]:
+        """Rank FTS5 matches by BM25 plus title/tag/campus-area bonuses.
+
+        The best ``candidates`` rows by BM25 are picked inside the FTS index
+        first, so only those are joined and re-scored. ``needle`` is the
+        lower-cased raw query used for the substring bonuses; the combined
+        score is returned in the ``score`` column.
+        """
+        area_placeholders = ",".join("?" for _ in boosted_areas) or "NULL"
+        with self.connection() as conn:
+            cur = conn.execute(
+                f"""
+                SELECT k.*, (
+                    -hits.rank
+                    + CASE WHEN instr(lower(k.title), ?) > 0 THEN ? ELSE 0 END
+                    + CASE WHEN instr(lower(coalesce(k.tags, '')), ?) > 0 THEN ? ELSE 0 END
+                    + CASE WHEN k.campus_area IN ({area_placeholders}) THEN ? ELSE 0 END
+                ) AS score
+                FROM (
+                    SELECT rowid, bm25(knowledge_fts, 3.0, 1.0, 2.0) AS rank
+                    FROM knowledge_fts
+                    WHERE knowledge_fts MATCH ?
+                    ORDER BY rank
+                    LIMIT ?
+                ) AS hits
+                JOIN knowledge_entries AS k ON k.rowid = hits.rowid
+                ORDER BY score DESC
+                LIMIT ?
+                """,
+                (
+                    needle,
+                    title_weight,
+                    needle,
+                    tag_weight,
+                    *boosted_areas,
+                    area_weight,
+                    match_query,
+                    max(candidates, limit),
+                    limit,
+                ),
+            )
+            return list(cur.fetchall())
+
+    def fetch_knowledge_updated_since(self, watermark: str) -> list[sqlite3.Row]:
+        with self.connection() as conn:
+            cur = conn.execute(
+                """
+                SELECT * FROM knowledge_entries
+                WHERE updated_at > ?
+                ORDER BY updated_at
+                """,
+                (watermark,),
+            )
+            return list(cur.fetchall())
+
+    def count_knowledge(self) -> int:
+        with self.connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM knowledge_entries").fetchone()[0]
+
+    def delete_knowledge(self, ids: Iterable[str]) -> int:
+        with self.connection() as conn:
+            cur = conn.executemany(
+                "DELETE FROM knowledge_entries WHERE id = ?",
+                ((entry_id,) for entry_id in ids),
+            )
+            return max(cur.rowcount, 0)
+
     def fetch_knowledge_by_ids(self, ids: Sequence[str]) -> list[sqlite3.Row]:
         if not ids:
             return []
@@ -127,29 +584,38 @@ class Storage:
         rows_by_id = {row["id"]: row for row in rows}
         return [rows_by_id[row_id] for row_id in ids if row_id in rows_by_id]
 
-    # Task helpers ------------------------------------------------------
+    # Search index persistence -----------------------------------------
 
-    def upsert_task(self, task_row: Sequence) -> None:
+    def load_search_index(self, name: str) -> bytes | None:
+        with self.connection() as conn:
+            row = conn.execute(
+                "SELECT payload FROM search_indexes WHERE name = ?",
+                (name,),
+            ).fetchone()
+        return row["payload"] if row else None
+
+    def save_search_index(self, name: str, payload: bytes, updated_at: str) -> None:
         with self.connection() as conn:
             conn.execute(
                 """
-                INSERT INTO tasks (
-                    id, title, description, status, priority, due_date,
-                    related_entry_id, created_at, updated_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT(id) DO UPDATE SET
-                    title=excluded.title,
-                    description=excluded.description,
-                    status=excluded.status,
-                    priority=excluded.priority,
-                    due_date=excluded.due_date,
-                    related_entry_id=excluded.related_entry_id,
-                    created_at=excluded.created_at,
+                INSERT INTO search_indexes (name, payload, updated_at) VALUES (?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET
+                    payload=excluded.payload,
                     updated_at=excluded.updated_at;
                 """,
-                task_row,
+                (name, payload, updated_at),
             )
 
+    # Task helpers ------------------------------------------------------
+
+    def upsert_task(self, task_row: Sequence) -> None:
+        with self.connection() as conn:
+            conn.execute(_UPSERT_TASK_SQL, task_row)
+
+    def upsert_tasks(self, task_rows: Iterable[Sequence]) -> None:
+        with self.connection() as conn:
+            conn.executemany(_UPSERT_TASK_SQL, task_rows)
+
     def fetch_tasks(self, status: str | None = None, limit: int = 50) -> list[sqlite3.Row]:
         query = """
             SELECT * FROM tasks
@@ -164,6 +630,36 @@ class Storage:
             cur = conn.execute(query, tuple(params))
             return list(cur.fetchall())
 
+    def iter_tasks(
+        self,
+        status: str | None = None,
+        *,
+        after: tuple[str, str] | None = None,
+        chunk_size: int = PAGE_SIZE,
+    ) -> Iterator[sqlite3.Row]:
+        """Stream tasks ordered by ``(updated_at, id)``; see :meth:`_iter_keyset`."""
+        return self._iter_keyset(
+            "tasks",
+            "updated_at",
+            where={"status": status} if status else None,
+            after=after,
+            chunk_size=chunk_size,
+        )
+
+    def fetch_next_tasks(self, limit: int = 5) -> list[sqlite3.Row]:
+        """Open tasks in next-up order, read off the ``schedule_key`` index."""
+        with self.connection() as conn:
+            cur = conn.execute(
+                """
+                SELECT * FROM tasks
+                WHERE schedule_key IS NOT NULL
+                ORDER BY schedule_key, id
+                LIMIT ?
+                """,
+                (limit,),
+            )
+            return list(cur.fetchall())
+
     def fetch_task(self, task_id: str):
         with self.connection() as conn:
             cur = conn.execute(
@@ -180,6 +676,194 @@ class Storage:
             )
             return cur.fetchone()
 
+    def search_tasks_fts(
+        self,
+        match_query: str,
+        needle: str,
+        *,
+        limit: int,
+        title_weight: float,
+        description_weight: float,
+        open_boost: float,
+        candidates: int = 200,
+    ) -> list[sqlite3.Row]:
+        """Rank FTS5 task matches by BM25 plus substring and open-status bonuses.
+
+        Like :meth:`search_knowledge_fts`, the best ``candidates`` by BM25
+        are chosen inside the index so cost does not grow with the table.
+        """
+        with self.connection() as conn:
+            cur = conn.execute(
+                """
+                SELECT t.*, (
+                    -hits.rank
+                    + CASE WHEN instr(lower(t.title), ?) > 0 THEN ? ELSE 0 END
+                    + CASE WHEN instr(lower(t.description), ?) > 0 THEN ? ELSE 0 END
+                    + CASE WHEN t.status != 'done' THEN ? ELSE 0 END
+                ) AS score
+                FROM (
+                    SELECT rowid, bm25(tasks_fts, ?, ?) AS rank
+                    FROM tasks_fts
+                    WHERE tasks_fts MATCH ?
+                    ORDER BY rank
+                    LIMIT ?
+                ) AS hits
+                JOIN tasks AS t ON t.rowid = hits.rowid
+                ORDER BY score DESC
+                LIMIT ?
+                """,
+                (
+                    needle,
+                    title_weight,
+                    needle,
+                    description_weight,
+                    open_boost,
+                    title_weight,
+                    description_weight,
+                    match_query,
+                    max(candidates, limit),
+                    limit,
+                ),
+            )
+            return list(cur.fetchall())
+
+    def search_tasks_scan(
+        self,
+        terms: Sequence[str],
+        *,
+        limit: int,
+        title_weight: float,
+        description_weight: float,
+        open_boost: float,
+    ) -> list[sqlite3.Row]:
+        """Score every task in SQL by per-term substring hits; used without FTS5."""
+        if not terms:
+            return []
+        title_hits = " + ".join("(instr(lower(title), ?) > 0)" for _ in terms)
+        description_hits = " + ".join("(instr(lower(description), ?) > 0)" for _ in terms)
+        with self.connection() as conn:
+            cur = conn.execute(
+                f"""
+                SELECT * FROM (
+                    SELECT *, (
+                        ({title_hits}) * ?
+                        + ({description_hits}) * ?
+                    ) AS relevance
+                    FROM tasks
+                )
+                WHERE relevance > 0
+                ORDER BY relevance + CASE WHEN status != 'done' THEN ? ELSE 0 END DESC,
+                    updated_at DESC
+                LIMIT ?
+                """,
+                (*terms, title_weight, *terms, description_weight, open_boost, limit),
+            )
+            return list(cur.fetchall())
+
+    def fetch_recent_tasks(
+        self, limit: int, exclude: Iterable[str] = (), *, open_only: bool = False
+    ) -> list[sqlite3.Row]:
+        """Most recently updated tasks not in ``exclude``, walked via the
+        ``updated_at`` index."""
+        query = """
+            SELECT * FROM tasks
+            WHERE id NOT IN (SELECT value FROM json_each(?))
+        """
+        if open_only:
+            query += " AND status != 'done'"
+        query += " ORDER BY updated_at DESC LIMIT ?"
+        with self.connection() as conn:
+            cur = conn.execute(query, (json.dumps(list(exclude)), limit))
+            return list(cur.fetchall())
+
+    def update_tasks_where(
+        self,
+        changes: dict[str, str | None],
+        *,
+        updated_at: str,
+        ids: Sequence[str] | None = None,
+        status: str | None = None,
+        priority: str | None = None,
+        due_from: str | None = None,
+        due_to: str | None = None,
+    ) -> int:
+        """Apply ``changes`` to every matching task in one ``UPDATE``.
+
+        Rows that already hold the new values are left alone, so the
+        returned count is the number of tasks actually changed.
+        """
+        unknown = set(changes) - {"status", "priority", "due_date"}
+        if unknown or not changes:
+            raise ValueError(f"Unsupported task fields: {sorted(unknown) or 'none given'}")
+        params: dict = {f"new_{column}": value for column, value in changes.items()}
+        params["updated_at"] = updated_at
+        new = {
+            column: f":new_{column}" if column in changes else column
+            for column in ("due_date", "priority", "status")
+        }
+        assignments = [f"{column} = :new_{column}" for column in changes]
+        assignments.append("updated_at = :updated_at")
+        if "due_date" in changes:
+            assignments.append("due_key = task_due_key(:new_due_date)")
+        assignments.append(
+            f"schedule_key = task_schedule_key("
+            f"{new['due_date']}, {new['priority']}, {new['status']}, created_at)"
+        )
+        changed = " OR ".join(f"{column} IS NOT :new_{column}" for column in changes)
+        conditions = [f"({changed})"]
+        if ids is not None:
+            conditions.append("id IN (SELECT value FROM json_each(:ids))")
+            params["ids"] = json.dumps(list(ids))
+        if status is not None:
+            conditions.append("status = :status")
+            params["status"] = status
+        if priority is not None:
+            conditions.append("priority = :priority")
+            params["priority"] = priority
+        if due_from is not None:
+            conditions.append("due_key >= :due_from")
+            params["due_from"] = due_from
+        if due_to is not None:
+            conditions.append("due_key <= :due_to")
+            params["due_to"] = due_to
+        with self.connection() as conn:
+            cur = conn.execute(
+                f"UPDATE tasks SET {', '.join(assignments)} WHERE {' AND '.join(conditions)}",
+                params,
+            )
+            return cur.rowcount
+
+    def insert_tasks_with_new_titles(self, task_rows: Sequence[Sequence]) -> set[str]:
+        """Insert the rows whose title no task has yet; return the inserted ids.
+
+        Existing titles are looked up once and the rest written with one
+        ``executemany``, both under ``BEGIN IMMEDIATE`` so another process
+        creating the same follow-ups cannot slip in between. Of rows sharing
+        a title, the first wins.
+        """
+        if not task_rows:
+            return set()
+        with self.connection() as conn:
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE;")
+            taken = self.fetch_existing_task_titles(row[1] for row in task_rows)
+            new_rows = []
+            for row in task_rows:
+                if row[1] not in taken:
+                    taken.add(row[1])
+                    new_rows.append(row)
+            conn.executemany(_UPSERT_TASK_SQL, new_rows)
+            return {row[0] for row in new_rows}
+
+    def fetch_existing_task_titles(self, titles: Iterable[str]) -> set[str]:
+        """Return which of ``titles`` already exist, in a single query."""
+        with self.connection() as conn:
+            cur = conn.execute(
+                "SELECT title FROM tasks WHERE title IN (SELECT value FROM json_each(?))",
+                (json.dumps(list(titles)),),
+            )
+            return {row["title"] for row in cur}
+
     # Chat logging ------------------------------------------------------
 
     def insert_chat_message(self, message_row: Sequence) -> None:
@@ -206,19 +890,132 @@ class Storage:
             )
             return list(cur.fetchall())
 
+    def iter_chat_history(
+        self,
+        session_id: str,
+        *,
+        after: tuple[str, str] | None = None,
+        chunk_size: int = PAGE_SIZE,
+    ) -> Iterator[sqlite3.Row]:
+        """Stream a session oldest first, ordered by ``(created_at, id)``."""
+        return self._iter_keyset(
+            "chat_messages",
+            "created_at",
+            where={"session_id": session_id},
+            after=after,
+            chunk_size=chunk_size,
+        )
+
+    def _iter_keyset(
+        self,
+        table: str,
+        timestamp_column: str,
+        *,
+        where: dict[str, str] | None = None,
+        after: tuple[str, str] | None = None,
+        chunk_size: int,
+    ) -> Iterator[sqlite3.Row]:
+        """Yield rows of ``table`` in ``(timestamp_column, id)`` order.
+
+        Each chunk is one indexed range query starting after the last key
+        seen, so memory stays at ``chunk_size`` rows whatever the table size
+        and no transaction is held between chunks. A row rewritten during
+        the walk moves to the end and may be yielded again.
+        """
+        filters = [f"{column} = ?" for column in where or {}]
+        base_params = list((where or {}).values())
+        while True:
+            conditions = list(filters)
+            params = list(base_params)
+            if after is not None:
+                conditions.append(f"({timestamp_column}, id) > (?, ?)")
+                params.extend(after)
+            query = f"SELECT * FROM {table}"
+            if conditions:
+                query += " WHERE " + " AND ".join(conditions)
+            query += f" ORDER BY {timestamp_column}, id LIMIT ?"
+            params.append(chunk_size)
+            with self.connection() as conn:
+                rows = conn.execute(query, params).fetchall()
+            yield from rows
+            if len(rows) < chunk_size:
+                return
+            after = (rows[-1][timestamp_column], rows[-1]["id"])
+
+    # LLM response cache ------------------------------------------------
+
+    def fetch_cached_response(self, key: str, fresh_after: float, now: float) -> str | None:
+        """Return an unexpired cached response and bump its ``last_used``."""
+        with self.connection() as conn:
+            row = conn.execute(
+                "SELECT response FROM llm_responses WHERE key = ? AND created_at > ?",
+                (key, fresh_after),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE llm_responses SET last_used = ? WHERE key = ?", (now, key))
+            return row["response"]
+
+    def has_cached_response(self, key: str, fresh_after: float) -> bool:
+        with self.connection() as conn:
+            return (
+                conn.execute(
+                    "SELECT 1 FROM llm_responses WHERE key = ? AND created_at > ?",
+                    (key, fresh_after),
+                ).fetchone()
+                is not None
+            )
+
+    def save_cached_response(
+        self,
+        key: str,
+        model: str,
+        response: str,
+        ref_ids: Iterable[str],
+        *,
+        now: float,
+        fresh_after: float,
+        max_rows: int,
+    ) -> None:
+        """Store a response, then drop expired rows and the least recently used
+        ones beyond ``max_rows``."""
+        with self.connection() as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO llm_responses (key, model, response, created_at, last_used)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (key, model, response, now, now),
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO llm_response_refs (ref_id, key) VALUES (?, ?)",
+                ((ref_id, key) for ref_id in ref_ids),
+            )
+            conn.execute("DELETE FROM llm_responses WHERE created_at <= ?", (fresh_after,))
+            conn.execute(
+                """
+                DELETE FROM llm_responses WHERE key IN (
+                    SELECT key FROM llm_responses ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (max_rows,),
+            )
+
     # Portal sync -------------------------------------------------------
 
     def upsert_portal_records(self, record_rows: Iterable[Sequence]) -> int:
-        count = 0
+        """Upsert rows keyed on ``record_id``; return how many were written.
+
+        Rows whose ``content_hash`` matches the stored one are skipped.
+        """
         with self.connection() as conn:
-            conn.executemany(
+            cur = conn.executemany(
                 """
                 INSERT INTO portal_records (
                     id, record_id, course, component, grade, points,
-                    campus_area, needs_follow_up, notes, updated_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT(id) DO UPDATE SET
-                    record_id=excluded.record_id,
+                    campus_area, needs_follow_up, notes, updated_at, content_hash
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(record_id) DO UPDATE SET
                     course=excluded.course,
                     component=excluded.component,
                     grade=excluded.grade,
@@ -226,9 +1023,57 @@ class Storage:
                     campus_area=excluded.campus_area,
                     needs_follow_up=excluded.needs_follow_up,
                     notes=excluded.notes,
-                    updated_at=excluded.updated_at;
+                    updated_at=excluded.updated_at,
+                    content_hash=excluded.content_hash
+                WHERE portal_records.content_hash IS NOT excluded.content_hash;
+                """,
+                record_rows,
+            )
+            return max(cur.rowcount, 0)
+
+    def fetch_portal_records(self, record_ids: Iterable[str]) -> list[sqlite3.Row]:
+        with self.connection() as conn:
+            cur = conn.execute(
+                """
+                SELECT * FROM portal_records
+                WHERE record_id IN (SELECT value FROM json_each(?))
                 """,
-                list(record_rows),
+                (json.dumps(list(record_ids)),),
+            )
+            return list(cur.fetchall())
+
+    # The snapshot helpers share a TEMP table, so call them inside one
+    # ``connection()`` block.
+
+    def begin_portal_snapshot(self) -> None:
+        with self.connection() as conn:
+            conn.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS portal_snapshot_ids (record_id TEXT PRIMARY KEY)"
+            )
+            conn.execute("DELETE FROM temp.portal_snapshot_ids")
+
+    def mark_portal_snapshot(self, record_ids: Iterable[str]) -> None:
+        with self.connection() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO temp.portal_snapshot_ids (record_id) VALUES (?)",
+                ((record_id,) for record_id in record_ids),
+            )
+
+    def delete_portal_records_not_in_snapshot(self) -> list[str]:
+        """Delete records missing from the marked snapshot; return their ids."""
+        with self.connection() as conn:
+            removed = [
+                row["record_id"]
+                for row in conn.execute(
+                    """
+                    SELECT record_id FROM portal_records
+                    WHERE record_id NOT IN (SELECT record_id FROM temp.portal_snapshot_ids)
+                    """
+                )
+            ]
+            conn.executemany(
+                "DELETE FROM portal_records WHERE record_id = ?",
+                ((record_id,) for record_id in removed),
             )
-            count = conn.total_changes
-        return count
+            conn.execute("DROP TABLE temp.portal_snapshot_ids")
+        return removed
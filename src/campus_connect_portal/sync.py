@@ -0,0 +1,258 @@
+"""Bulk import of Campus Connect snapshots into the local database."""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+from collections import Counter
+from dataclasses import dataclass, field
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator, NoReturn, Sequence, TextIO
+from uuid import NAMESPACE_URL, uuid5
+
+from .config import SEED_CHUNK_SIZE
+from .models import KnowledgeEntry, PortalRecord
+from .pkms import KnowledgeBase
+from .storage import Storage
+from .tasks import TaskManager
+
+
+READ_SIZE = 1 << 16
+
+# PortalRecord fields reported in the change summary, with display labels.
+TRACKED_FIELDS = {
+    "course": "course",
+    "component": "component",
+    "grade": "grade",
+    "points": "points",
+    "campus_area": "campus area",
+    "needs_follow_up": "follow-up flag",
+    "notes": "notes",
+}
+
+
+@dataclass(slots=True)
+class ImportResult:
+    records: int = 0
+    new: int = 0
+    changed: int = 0
+    removed: int = 0
+    written: int = 0
+    entries: int = 0
+    tasks: int = 0
+    field_changes: Counter[str] = field(default_factory=Counter)
+
+    @property
+    def unchanged(self) -> int:
+        return self.records - self.new - self.changed
+
+    def add(self, other: "ImportResult") -> None:
+        self.records += other.records
+        self.new += other.new
+        self.changed += other.changed
+        self.removed += other.removed
+        self.written += other.written
+        self.entries += other.entries
+        self.tasks += other.tasks
+        self.field_changes.update(other.field_changes)
+
+    def summary(self) -> str:
+        """Human-readable change summary, e.g. ``3 changed (grade: 3)``."""
+        changed = f"{self.changed} changed"
+        if self.field_changes:
+            details = ", ".join(
+                f"{TRACKED_FIELDS[name]}: {count}"
+                for name, count in self.field_changes.most_common()
+            )
+            changed += f" ({details})"
+        return (
+            f"{self.new} new, {changed}, {self.removed} removed, "
+            f"{self.unchanged} unchanged"
+        )
+
+
+def slugify(value: str) -> str:
+    return value.lower().replace(" ", "-")
+
+
+def knowledge_entry_id(record_id: str) -> str:
+    """Stable knowledge entry id for a portal record, so reseeding overwrites it."""
+    return str(uuid5(NAMESPACE_URL, f"campus-connect:portal-record:{record_id}"))
+
+
+def knowledge_entry_for(record: PortalRecord) -> KnowledgeEntry:
+    return KnowledgeEntry(
+        id=knowledge_entry_id(record.record_id),
+        title=f"{record.component} ({record.campus_area})",
+        content=record.notes or "Imported from Campus Connect snapshot.",
+        tags=[slugify(record.campus_area), slugify(record.course or "general")],
+        campus_area=record.campus_area,
+        source="Campus Connect import",
+    )
+
+
+def import_records(storage: Storage, records: Sequence[PortalRecord]) -> ImportResult:
+    """Write new or changed records, their notes and follow-ups in one transaction.
+
+    Records are matched on ``record_id`` and compared with the stored
+    ``content_hash`` fingerprint; unchanged ones are skipped entirely, so
+    writes scale with the number of changes, not the size of the snapshot.
+    """
+    latest = {record.record_id: record for record in records}
+    kb = KnowledgeBase(storage=storage)
+    manager = TaskManager(storage=storage)
+    result = ImportResult(records=len(latest))
+    with storage.connection():
+        stored = {row["record_id"]: row for row in storage.fetch_portal_records(latest)}
+        changed: list[PortalRecord] = []
+        for record_id, record in latest.items():
+            previous = stored.get(record_id)
+            if previous is None:
+                result.new += 1
+            elif previous["content_hash"] != record.content_hash:
+                result.changed += 1
+                result.field_changes.update(_changed_fields(previous, record))
+            else:
+                continue
+            changed.append(record)
+        result.written = storage.upsert_portal_records(record.to_row() for record in changed)
+        result.entries = len(kb.add_entries(knowledge_entry_for(record) for record in changed))
+        result.tasks = len(manager.ensure_follow_up_tasks(changed))
+    return result
+
+
+def import_stream(
+    storage: Storage,
+    records: Iterable[PortalRecord],
+    chunk_size: int = SEED_CHUNK_SIZE,
+    *,
+    full_snapshot: bool = False,
+) -> ImportResult:
+    """Import ``records`` in chunks, committing after each chunk.
+
+    Only one chunk is materialized at a time, so memory stays flat no
+    matter how long the stream is. With ``full_snapshot`` the stream is
+    treated as the complete portal state: stored records that never appear
+    in it are deleted together with their imported notes. Follow-up tasks
+    are left alone since they may already carry the student's own edits.
+    """
+    total = ImportResult()
+    iterator = iter(records)
+    with storage.connection() as conn:
+        if full_snapshot:
+            storage.begin_portal_snapshot()
+        while chunk := list(islice(iterator, chunk_size)):
+            total.add(import_records(storage, chunk))
+            if full_snapshot:
+                storage.mark_portal_snapshot(record.record_id for record in chunk)
+            conn.commit()
+        if full_snapshot:
+            removed = storage.delete_portal_records_not_in_snapshot()
+            KnowledgeBase(storage=storage).remove_entries(map(knowledge_entry_id, removed))
+            total.removed = len(removed)
+    return total
+
+
+def _changed_fields(previous: sqlite3.Row, record: PortalRecord) -> list[str]:
+    changed = []
+    for name in TRACKED_FIELDS:
+        value = getattr(record, name)
+        if name == "needs_follow_up":
+            value = int(value)
+        if previous[name] != value:
+            changed.append(name)
+    return changed
+
+
+def iter_payloads(path: Path) -> Iterator[dict]:
+    """Yield record payloads from NDJSON or a top-level JSON array.
+
+    The file is read incrementally in both cases; it is never loaded whole.
+    A UTF-8 byte order mark is ignored.
+    """
+    with path.open(encoding="utf-8-sig") as handle:
+        head = handle.read(READ_SIZE)
+        while head and not head.strip():  # the format shows at the first non-blank
+            chunk = handle.read(READ_SIZE)
+            if not chunk:
+                break
+            head += chunk
+        stripped = head.lstrip()
+        if stripped.startswith("["):
+            offset = len(head) - len(stripped) + 1
+            yield from _iter_json_array(handle, stripped[1:], offset)
+            return
+        pending = ""
+        while head:
+            lines = (pending + head).split("\n")
+            pending = lines.pop()
+            for line in lines:
+                if line.strip():
+                    yield json.loads(line)
+            head = handle.read(READ_SIZE)
+        if pending.strip():
+            yield json.loads(pending)
+
+
+# Longest prefix of a JSON token that can fail to parse only because it is
+# cut off ("-Infinit", a partial "\uXXXX" escape).
+_PARTIAL_TOKEN_CHARS = 9
+
+
+def _iter_json_array(handle: TextIO, buffer: str, offset: int = 0) -> Iterator[dict]:
+    """Yield the items of a JSON array whose ``[`` has already been read.
+
+    More input is read only while the item at hand may be cut off at the end
+    of ``buffer``; any other syntax error is raised at once with its
+    character ``offset`` in the file, so a bad export is not read to the end.
+    """
+    decoder = json.JSONDecoder()
+    eof = False
+    pos = 0
+    expect = "first"  # "first" after "[", "value" after ",", "separator" after an item
+    while True:
+        while pos < len(buffer) and buffer[pos] in " \t\r\n":
+            pos += 1
+        item = end = None
+        if pos < len(buffer):
+            char = buffer[pos]
+            if expect == "separator":
+                if char == "]":
+                    return
+                if char != ",":
+                    _malformed("expected ',' or ']'", offset + pos)
+                expect = "value"
+                pos += 1
+                continue
+            if char == "]" and expect == "first":
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as exc:
+                if eof or not _may_be_truncated(exc, len(buffer)):
+                    _malformed(exc.msg, offset + exc.pos)
+        # a value ending exactly at the buffer edge may be truncated; read on
+        if end is None or (end == len(buffer) and not eof):
+            if eof:
+                break
+            chunk = handle.read(READ_SIZE)
+            eof = not chunk
+            offset += pos
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+        yield item
+        pos = end
+        expect = "separator"
+    raise ValueError("Truncated JSON array in Campus Connect export.")
+
+
+def _may_be_truncated(exc: json.JSONDecodeError, length: int) -> bool:
+    return exc.msg.startswith("Unterminated string") or exc.pos >= length - _PARTIAL_TOKEN_CHARS
+
+
+def _malformed(message: str, position: int) -> NoReturn:
+    raise ValueError(
+        f"Malformed JSON array in Campus Connect export at character {position}: {message}"
+    )
@@ -2,18 +2,34 @@
 
 from __future__ import annotations
 
-from datetime import datetime, timezone
-from typing import Iterable
+import re
+from datetime import date, datetime, timezone
+from typing import Iterable, Iterator
 
 from .config import TASK_PRIORITIES, TASK_STATUSES
 from .models import PortalRecord, Task
-from .storage import Storage
+from .storage import Storage, fts_match_query
+
+
+TITLE_WEIGHT = 2.5
+DESCRIPTION_WEIGHT = 1.5
+OPEN_TASK_BOOST = 1.0
+# The scan path matches substrings, so shorter words ("a", "do") hit nearly
+# every task; FTS matches them as whole words and keeps them.
+MIN_SCAN_TERM_LENGTH = 3
 
 
 def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
+def _validate_iso_date(value: str) -> None:
+    try:
+        date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Expected an ISO date (YYYY-MM-DD), got {value!r}") from None
+
+
 class TaskManager:
     """CRUD and automation around Campus Connect follow-up tasks."""
 
@@ -47,6 +63,64 @@ class TaskManager:
         rows = self.storage.fetch_tasks(status=status, limit=limit)
         return [Task.from_row(row) for row in rows]
 
+    def iter_tasks(
+        self, status: str | None = None, *, after: tuple[str, str] | None = None
+    ) -> Iterator[Task]:
+        """Every task oldest first, fetched page by page and built lazily."""
+        return map(Task.from_row, self.storage.iter_tasks(status=status, after=after))
+
+    def next_tasks(self, limit: int = 5) -> list[Task]:
+        """Open tasks ranked by priority, due-date urgency and status.
+
+        See :mod:`campus_connect_portal.scheduler` for the ordering; it is
+        kept in an index, so this is a top-``limit`` read, not a scan.
+        """
+        return [Task.from_row(row) for row in self.storage.fetch_next_tasks(limit)]
+
+    def search_tasks(self, query: str, limit: int = 3) -> list[Task]:
+        """Rank every task against ``query`` inside SQLite.
+
+        Matches score on title/description relevance with a boost for open
+        tasks. Remaining slots are filled with the most recently updated open
+        tasks, then any tasks, so the agent always has something to suggest.
+        """
+        if self.storage.has_task_fts:
+            match_query = fts_match_query(query)
+            rows = (
+                self.storage.search_tasks_fts(
+                    match_query,
+                    query.lower().strip(),
+                    limit=limit,
+                    title_weight=TITLE_WEIGHT,
+                    description_weight=DESCRIPTION_WEIGHT,
+                    open_boost=OPEN_TASK_BOOST,
+                )
+                if match_query
+                else []
+            )
+        else:
+            terms = [
+                term
+                for term in dict.fromkeys(re.findall(r"\w+", query.lower()))
+                if len(term) >= MIN_SCAN_TERM_LENGTH
+            ]
+            rows = self.storage.search_tasks_scan(
+                terms,
+                limit=limit,
+                title_weight=TITLE_WEIGHT,
+                description_weight=DESCRIPTION_WEIGHT,
+                open_boost=OPEN_TASK_BOOST,
+            )
+        tasks = [Task.from_row(row) for row in rows]
+        for open_only in (True, False):
+            if len(tasks) >= limit:
+                break
+            rows = self.storage.fetch_recent_tasks(
+                limit - len(tasks), [task.id for task in tasks], open_only=open_only
+            )
+            tasks.extend(Task.from_row(row) for row in rows)
+        return tasks
+
     def update_task(
         self,
         task_id: str,
@@ -77,26 +151,86 @@ class TaskManager:
         self.storage.upsert_task(task.to_row())
         return task
 
+    def bulk_update(
+        self,
+        *,
+        ids: Iterable[str] | None = None,
+        where_status: str | None = None,
+        where_priority: str | None = None,
+        due_from: str | None = None,
+        due_to: str | None = None,
+        status: str | None = None,
+        priority: str | None = None,
+        due_date: str | None = None,
+    ) -> int:
+        """Update every task matching the filters with one SQL ``UPDATE``.
+
+        Filters combine with AND; the due-date range is inclusive, expects ISO
+        dates and matches normalized due dates, so ``11/30/2025`` counts.
+        Everything is validated before the database is touched. Returns how
+        many tasks changed.
+        """
+        changes: dict[str, str | None] = {}
+        if status is not None:
+            self._validate_status(status)
+            changes["status"] = status
+        if priority is not None:
+            self._validate_priority(priority)
+            changes["priority"] = priority
+        if due_date is not None:
+            changes["due_date"] = due_date or None
+        if not changes:
+            raise ValueError("Nothing to update; pass a status, priority or due date")
+        if where_status is not None:
+            self._validate_status(where_status)
+        if where_priority is not None:
+            self._validate_priority(where_priority)
+        for bound in (due_from, due_to):
+            if bound is not None:
+                _validate_iso_date(bound)
+        if ids is not None:
+            ids = list(ids)
+        if ids is None and not any((where_status, where_priority, due_from, due_to)):
+            raise ValueError("Refusing to update every task; pass at least one filter")
+        return self.storage.update_tasks_where(
+            changes,
+            updated_at=_now_iso(),
+            ids=ids,
+            status=where_status,
+            priority=where_priority,
+            due_from=due_from,
+            due_to=due_to,
+        )
+
     def ensure_follow_up_tasks(self, records: Iterable[PortalRecord]) -> list[Task]:
-        """Create TODOs for portal records that require action."""
-        created: list[Task] = []
+        """Create TODOs for portal records that require action.
+
+        Candidates are deduplicated by title in Python and existing titles are
+        looked up with one query, so reseeding builds no tasks at all. The
+        rest are written with one ``executemany`` in a write transaction that
+        re-checks titles (via ``idx_tasks_title``) in case another process
+        created them since.
+        """
+        candidates: dict[str, PortalRecord] = {}
         for record in records:
-            if not record.needs_follow_up:
-                continue
-            title = f"Follow up: {record.component}"
-            existing = self.storage.fetch_task_by_title(title)
-            if existing:
-                continue
-            description = record.notes or f"Review {record.course or 'record'} in Campus Connect."
-            task = Task(
-                title=title,
-                description=description,
-                status="todo",
-                priority="high" if record.campus_area == "Financial Aid" else "medium",
-            )
-            self.storage.upsert_task(task.to_row())
-            created.append(task)
-        return created
+            if record.needs_follow_up:
+                candidates.setdefault(f"Follow up: {record.component}", record)
+        if not candidates:
+            return []
+        with self.storage.connection():
+            existing = self.storage.fetch_existing_task_titles(candidates)
+            tasks = [
+                Task(
+                    title=title,
+                    description=record.notes or f"Review {record.course or 'record'} in Campus Connect.",
+                    status="todo",
+                    priority="high" if record.campus_area == "Financial Aid" else "medium",
+                )
+                for title, record in candidates.items()
+                if title not in existing
+            ]
+            inserted = self.storage.insert_tasks_with_new_titles([task.to_row() for task in tasks])
+        return [task for task in tasks if task.id in inserted]
 
     def _validate_status(self, value: str) -> None:
         if value not in TASK_STATUSES:
@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+import pytest
+
+from campus_connect_portal.storage import Storage
+
+
+@pytest.fixture
+def storage(tmp_path):
+    store = Storage(tmp_path / "state.db", persistent=True)
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def fake_openai():
+    from fake_openai import FakeOpenAIServer
+
+    server = FakeOpenAIServer()
+    yield server
+    server.close()
@@ -0,0 +1,97 @@
+"""Local stand-in for the OpenAI Responses endpoint, driven by a script."""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+
+@dataclass
+class Reply:
+    status: int = 200
+    text: str = "served"
+    headers: dict[str, str] = field(default_factory=dict)
+    delay: float = 0.0
+
+
+class StatusError(Exception):
+    """Shaped like ``openai.APIStatusError``: ``status_code`` plus ``response.headers``."""
+
+    def __init__(self, status: int, headers: dict[str, str]):
+        super().__init__(f"HTTP {status}")
+        self.status_code = status
+        self.response = SimpleNamespace(headers={k.lower(): v for k, v in headers.items()})
+
+
+class FakeOpenAIServer:
+    """Serves queued :class:`Reply` objects in order, then ``default``."""
+
+    def __init__(self):
+        self.replies: deque[Reply] = deque()
+        self.default = Reply()
+        self.hits = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers["content-length"]))
+                with server.lock:
+                    server.hits += 1
+                    reply = server.replies.popleft() if server.replies else server.default
+                time.sleep(reply.delay)
+                body = json.dumps({"output_text": reply.text}).encode()
+                self.send_response(reply.status)
+                for name, value in reply.headers.items():
+                    self.send_header(name, value)
+                self.send_header("content-length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._httpd.server_port}/v1/responses"
+        threading.Thread(
+            target=self._httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        ).start()
+
+    def queue(self, *replies: Reply) -> None:
+        self.replies.extend(replies)
+
+    def client(self, timeout: float) -> SimpleNamespace:
+        """An object with the ``responses.create`` surface LLMClient uses."""
+        return SimpleNamespace(responses=SimpleNamespace(create=self._creator(timeout)))
+
+    def close(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _creator(self, timeout: float):
+        def create(*, stream: bool = False, **payload):
+            request = urllib.request.Request(
+                self.url, data=json.dumps(payload).encode(), method="POST"
+            )
+            try:
+                with urllib.request.urlopen(request, timeout=timeout) as response:
+                    text = json.loads(response.read())["output_text"]
+            except urllib.error.HTTPError as exc:
+                raise StatusError(exc.code, dict(exc.headers)) from None
+            except urllib.error.URLError as exc:
+                raise ConnectionError(str(exc.reason)) from None
+            if not stream:
+                return SimpleNamespace(output=[], output_text=text)
+            return (
+                SimpleNamespace(type="response.output_text.delta", delta=word)
+                for word in text.split(" ")
+            )
+
+        return create
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from campus_connect_portal.agents import CampusConnectAgent, KnowledgeAgent, TaskAgent
+from campus_connect_portal.llm import LLMClient
+from campus_connect_portal.pkms import KnowledgeBase
+from campus_connect_portal.storage import Storage
+from campus_connect_portal.tasks import TaskManager
+
+
+def offline_llm() -> LLMClient:
+    client = LLMClient()
+    client._client = None
+    return client
+
+
+def test_missing_agent_is_built_on_the_given_storage(tmp_path):
+    storage = Storage(tmp_path / "state.db")
+    agent = CampusConnectAgent(task_agent=TaskAgent(TaskManager(storage)), llm_client=offline_llm())
+    assert agent.knowledge_agent.knowledge_base.storage is storage
+
+    agent = CampusConnectAgent(
+        knowledge_agent=KnowledgeAgent(KnowledgeBase(storage)), llm_client=offline_llm()
+    )
+    assert agent.task_agent.task_manager.storage is storage
+
+
+def test_injected_agents_keep_their_storages(tmp_path):
+    path = tmp_path / "state.db"
+    knowledge_storage, task_storage = Storage(path), Storage(path, persistent=True)
+    task_manager = TaskManager(task_storage)
+    CampusConnectAgent(
+        knowledge_agent=KnowledgeAgent(KnowledgeBase(knowledge_storage)),
+        task_agent=TaskAgent(task_manager),
+        llm_client=offline_llm(),
+    )
+    assert task_manager.storage is task_storage
+    task_storage.close()
+
+
+def test_answer_many_reads_one_snapshot(tmp_path):
+    path = tmp_path / "state.db"
+    storage = Storage(path)
+    knowledge_base = KnowledgeBase(storage)
+    knowledge_base.add_entry(title="FAFSA", content="Submit the FAFSA form", tags=[])
+    TaskManager(storage).add_task(title="Existing", description="old task")
+    agent = CampusConnectAgent(
+        knowledge_agent=KnowledgeAgent(knowledge_base),
+        task_agent=TaskAgent(TaskManager(storage)),
+        llm_client=offline_llm(),
+    )
+    writer = TaskManager(Storage(path))
+
+    def knowledge_then_write(query: str, limit: int):
+        hits = knowledge_base.search(query, limit=limit)
+        writer.add_task(title="Late arrival", description="written mid-batch")
+        return hits
+
+    agent.register_retriever("knowledge", knowledge_then_write, kind="knowledge")
+    [result] = agent.answer_many(["FAFSA"])
+    assert [task.title for task in result.tasks] == ["Existing"]
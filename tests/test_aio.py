@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+from campus_connect_portal.aio import AsyncChatSession, AsyncStorage, build_agent, run_load_test
+from campus_connect_portal.llm import LLMClient
+from campus_connect_portal.pkms import KnowledgeBase
+
+
+def offline_llm() -> LLMClient:
+    client = LLMClient()
+    client._client = None
+    return client
+
+
+@pytest.fixture
+def async_storage(storage):
+    wrapper = AsyncStorage(storage, max_workers=2)
+    yield wrapper
+    wrapper.executor.shutdown(wait=True)
+
+
+def test_ask_logs_both_turns_and_remembers_them(async_storage):
+    KnowledgeBase(async_storage.storage).add_entry(title="FAFSA", content="Due March 1")
+    agent = build_agent(async_storage.storage, offline_llm())
+    session = AsyncChatSession(async_storage, agent=agent)
+
+    result = asyncio.run(session.ask("When is the FAFSA due?"))
+    assert result.answer.startswith("Knowledge insights")
+    rows = async_storage.storage.fetch_chat_history(session.session_id)
+    assert sorted(row["role"] for row in rows) == ["assistant", "user"]
+    assert len(session.memory.lines()) == 2
+
+
+def test_answer_async_degrades_slow_and_failing_retrievers(async_storage):
+    agent = build_agent(async_storage.storage, offline_llm())
+
+    def slow(query: str, limit: int) -> list:
+        time.sleep(0.5)
+        return []
+
+    def broken(query: str, limit: int) -> list:
+        raise RuntimeError("index offline")
+
+    agent.register_retriever("slow", slow, kind="knowledge")
+    agent.register_retriever("broken", broken, kind="tasks")
+
+    async def ask():
+        started = time.perf_counter()
+        result = await agent.answer_async(
+            "What is due?", executor=async_storage.executor, timeout=0.1
+        )
+        return result, time.perf_counter() - started
+
+    result, elapsed = asyncio.run(ask())
+    assert sorted(result.degraded) == ["broken", "slow"]
+    assert {"knowledge", "tasks", "next_tasks"} <= set(result.timings)
+    assert result.answer  # the healthy retrievers and the fallback still answer
+    assert elapsed < 0.5
+
+
+def test_load_test_reports_every_turn(async_storage, monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)  # run_load_test builds its own client
+    stats = asyncio.run(run_load_test(async_storage, sessions=3, turns=2))
+    assert stats["turns"] == 6
+    assert stats["p50_ms"] <= stats["p99_ms"]
+    with async_storage.storage.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM chat_messages").fetchone()[0] == 12
+
+
+@pytest.mark.parametrize("sessions, turns", [(0, 1), (1, 0)])
+def test_load_test_rejects_empty_runs(async_storage, sessions, turns):
+    with pytest.raises(ValueError, match="at least 1"):
+        asyncio.run(run_load_test(async_storage, sessions=sessions, turns=turns))
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+
+from campus_connect_portal import cache as cache_module
+from campus_connect_portal.cache import ResponseCache
+from campus_connect_portal.pkms import KnowledgeBase
+from campus_connect_portal.tasks import TaskManager
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(value=1_000_000.0)
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(time=lambda: now.value))
+    return now
+
+
+@pytest.fixture
+def cited(storage):
+    note = KnowledgeBase(storage).add_entry(title="FAFSA", content="Due March 1")
+    task = TaskManager(storage).add_task(title="Submit FAFSA", description="Before March")
+    return note, task
+
+
+def update_note(storage, note, task):
+    storage.upsert_knowledge(note.to_row())
+
+
+def delete_note(storage, note, task):
+    storage.delete_knowledge([note.id])
+
+
+def update_task(storage, note, task):
+    TaskManager(storage).update_task(task.id, status="in_progress")
+
+
+def delete_task(storage, note, task):
+    with storage.connection() as conn:
+        conn.execute("DELETE FROM tasks WHERE id = ?", (task.id,))
+
+
+@pytest.mark.parametrize("write", [update_note, delete_note, update_task, delete_task])
+def test_writing_a_cited_row_drops_the_answer(storage, cited, write):
+    note, task = cited
+    cache = ResponseCache(storage)
+    cache.put("k", "model", "answer", [note.id, task.id])
+    cache.put("other", "model", "unrelated", ["someone-else"])
+    assert cache.get("k") == "answer"
+    assert cache.stats.memory_hits == 1
+
+    write(storage, note, task)
+    assert cache.get("k") is None  # the memory copy is refused, not served stale
+    assert cache.stats.memory_hits == 1
+    assert cache.get("other") == "unrelated"
+    assert ResponseCache(storage).get("k") is None
+
+
+def test_entries_expire_after_ttl(storage, clock):
+    cache = ResponseCache(storage, ttl=60)
+    cache.put("k", "model", "answer")
+    clock.value += 59
+    assert cache.get("k") == "answer"
+    assert ResponseCache(storage, ttl=60).get("k") == "answer"
+    clock.value += 2
+    assert cache.get("k") is None
+    assert ResponseCache(storage, ttl=60).get("k") is None
+
+
+def test_memory_tier_evicts_least_recently_used(storage):
+    cache = ResponseCache(storage, max_entries=2)
+    cache.put("a", "model", "A")
+    cache.put("b", "model", "B")
+    assert cache.get("a") == "A"
+    cache.put("c", "model", "C")  # evicts b from memory; the table still has it
+    assert cache.get("b") == "B"
+    assert (cache.stats.memory_hits, cache.stats.db_hits) == (1, 1)
+
+
+def test_table_evicts_least_recently_used_rows(storage, clock):
+    cache = ResponseCache(storage, max_rows=2)
+    cache.put("a", "model", "A")
+    clock.value += 1
+    cache.put("b", "model", "B")
+    clock.value += 1
+    assert ResponseCache(storage).get("a") == "A"  # a table hit bumps last_used
+    clock.value += 1
+    cache.put("c", "model", "C")
+    fresh = ResponseCache(storage)
+    assert [fresh.get(key) for key in ("a", "b", "c")] == ["A", None, "C"]
+
+
+def test_invalidate_without_storage():
+    cache = ResponseCache()
+    cache.put("k", "model", "answer", ["note-1"])
+    cache.put("other", "model", "kept", ["note-2"])
+    assert cache.invalidate(["note-1"]) == 1
+    assert cache.get("k") is None
+    assert cache.get("other") == "kept"
@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from campus_connect_portal.chat import ChatSession
+
+
+def chat(session: ChatSession, monkeypatch, *lines: str) -> None:
+    answers = iter([*lines, "quit"])
+    monkeypatch.setattr("builtins.input", lambda _: next(answers))
+    session.interact()
+
+
+def test_streamed_answer_reports_time_to_first_token(storage, monkeypatch, capsys):
+    session = ChatSession(storage=storage)
+    session.agent.llm_client._client = None  # offline fallback, streamed word by word
+    chat(session, monkeypatch, "What is due?")
+    out = capsys.readouterr().out
+    assert "\nassistant> No stored knowledge" in out
+    assert "timing: first token " in out
+
+
+def test_answer_without_deltas_still_gets_a_prefix(storage, monkeypatch, capsys):
+    session = ChatSession(storage=storage)
+    session.agent.llm_client.stream = lambda *args, **kwargs: iter(())
+    chat(session, monkeypatch, "What is due?")
+    out = capsys.readouterr().out
+    assert "\nassistant>\n" in out
+    assert "timing:" not in out
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import campus_connect_portal
+
+SRC = Path(campus_connect_portal.__file__).resolve().parents[1]
+# Generous against CI noise; pulling in the chat/LLM stack costs far more.
+LIST_TASKS_IMPORT_BUDGET_MS = 300
+
+
+def _env(tmp_path: Path) -> dict[str, str]:
+    return {
+        **os.environ,
+        "PYTHONPATH": str(SRC),
+        "CAMPUS_CONNECT_STATE_DIR": str(tmp_path),
+        "CAMPUS_CONNECT_DAEMON_SOCKET": str(tmp_path / "no-daemon.sock"),
+    }
+
+
+def _run(tmp_path: Path, *argv: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-m", "campus_connect_portal.cli", *argv],
+        env=_env(tmp_path),
+        capture_output=True,
+        text=True,
+    )
+
+
+def _cli(tmp_path: Path, *argv: str) -> str:
+    proc = _run(tmp_path, *argv)
+    assert proc.returncode == 0, proc.stderr
+    return proc.stdout
+
+
+def _import_times(tmp_path: Path, *argv: str) -> dict[str, tuple[int, int, int]]:
+    """Run the CLI under ``-X importtime``; map module -> (self us, cumulative us, depth)."""
+    env = _env(tmp_path)
+    code = (
+        "import sys; from campus_connect_portal.cli import main; "
+        f"sys.exit(main({list(argv)!r}))"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2  # one space, then two per level
+        modules[name.strip()] = (int(self_us), int(cumulative_us), depth)
+    return modules
+
+
+def test_list_tasks_skips_chat_stack(tmp_path):
+    modules = _import_times(tmp_path, "list-tasks")
+    assert "campus_connect_portal.cli" in modules
+    for heavy in (
+        "campus_connect_portal.chat",
+        "campus_connect_portal.agents",
+        "campus_connect_portal.llm",
+        "campus_connect_portal.pkms",
+        "difflib",
+    ):
+        assert heavy not in modules, heavy
+    # top-level package imports: the CLI itself plus what list-tasks loads lazily
+    startup_us = sum(
+        cumulative
+        for name, (_, cumulative, depth) in modules.items()
+        if depth == 0 and name.startswith("campus_connect_portal")
+    )
+    assert startup_us / 1000 < LIST_TASKS_IMPORT_BUDGET_MS
+
+
+def test_seed_prunes_only_with_full_snapshot(tmp_path):
+    export = tmp_path / "export.ndjson"
+    rows = [{"record_id": f"r{n}", "component": f"Quiz {n}", "grade": "A"} for n in range(3)]
+    export.write_text("\n".join(map(json.dumps, rows)), encoding="utf-8")
+    assert "Changes: 3 new, 0 changed, 0 removed, 0 unchanged." in _cli(
+        tmp_path, "seed", "--file", str(export)
+    )
+
+    export.write_text(json.dumps(rows[0]), encoding="utf-8")
+    assert "0 removed, 1 unchanged." in _cli(tmp_path, "seed", "--file", str(export))
+    assert "0 new, 0 changed, 2 removed, 1 unchanged." in _cli(
+        tmp_path, "seed", "--file", str(export), "--full-snapshot"
+    )
+
+
+def test_list_tasks_pages_with_cursors(tmp_path):
+    for n in range(3):
+        _cli(tmp_path, "add-task", "--title", f"Task {n}", "--description", "d")
+    first = _cli(tmp_path, "list-tasks", "--after", "2000-01-01", "--limit", "2").splitlines()
+    assert [line.split("] ")[1].split(" —")[0] for line in first[:2]] == ["Task 0", "Task 1"]
+    assert first[2].startswith("Next page: --after ")
+    cursor = first[2].removeprefix("Next page: --after ")
+    rest = _cli(tmp_path, "list-tasks", "--after", cursor, "--limit", "2").splitlines()
+    assert len(rest) == 1 and "Task 2" in rest[0]
+
+
+@pytest.mark.parametrize("limit", ["0", "-1"])
+def test_list_limit_must_be_positive(tmp_path, limit):
+    proc = _run(tmp_path, "list-tasks", "--after", "2020", "--limit", limit)
+    assert proc.returncode == 2
+    assert "must be at least 1" in proc.stderr
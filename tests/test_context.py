@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import pytest
+
+from campus_connect_portal.context import (
+    MAX_SENTENCE_CHARS,
+    ContextBuilder,
+    estimate_tokens,
+)
+from campus_connect_portal.models import KnowledgeEntry, Task
+
+PROMPT = "When is the scholarship essay due?"
+FILLER = "Bring a pen and a student ID card to the front desk before noon."
+
+
+def note(number: int, content: str = FILLER) -> KnowledgeEntry:
+    return KnowledgeEntry(title=f"Note {number}", content=content, id=f"note-{number}")
+
+
+def task(number: int, description: str = FILLER) -> Task:
+    return Task(title=f"Task {number}", description=description, id=f"task-{number}")
+
+
+def fitting(knowledge, tasks, history=()) -> int:
+    """The smallest budget that admits exactly these items, one sentence each."""
+    builder = ContextBuilder(budget=10_000)
+    empty = builder.build(PROMPT, [], [], history)
+    full = builder.build(PROMPT, knowledge, tasks, history).user_prompt.splitlines()
+    ids = [item.id for item in [*knowledge, *tasks]]
+    lines = [line for line in full if any(line.startswith(f"- [{id_}]") for id_ in ids)]
+    return empty.tokens + sum(estimate_tokens(line) + 3 for line in lines)
+
+
+def test_prompt_stays_within_budget():
+    notes = [note(number, " ".join([FILLER] * 6)) for number in range(8)]
+    tasks = [task(number, " ".join([FILLER] * 6)) for number in range(8)]
+    history = [f"user: question {number} " + FILLER for number in range(20)]
+    for budget in (150, 300, 600, 1200):
+        context = ContextBuilder(budget=budget).build(PROMPT, notes, tasks, history)
+        assert context.tokens <= budget
+        assert context.tokens == estimate_tokens(context.system_prompt) + estimate_tokens(
+            context.user_prompt
+        )
+
+
+def test_lowest_ranked_items_are_dropped_first():
+    notes = [note(number) for number in range(5)]
+    budget = fitting(notes[:2], [])
+    context = ContextBuilder(budget=budget).build(PROMPT, notes, [])
+    assert [entry.id for entry in context.knowledge] == ["note-0", "note-1"]
+    assert "note-2" not in context.user_prompt
+
+
+def test_knowledge_and_tasks_are_admitted_interleaved():
+    notes, tasks = [note(0), note(1)], [task(0), task(1)]
+    budget = fitting(notes, tasks[:1])  # k0, t0, k1 fit; t1 comes last
+    context = ContextBuilder(budget=budget).build(PROMPT, notes, tasks)
+    assert [entry.id for entry in context.knowledge] == ["note-0", "note-1"]
+    assert [item.id for item in context.tasks] == ["task-0"]
+
+
+def test_nothing_fits():
+    context = ContextBuilder(budget=10).build(PROMPT, [note(0)], [task(0)])
+    assert (context.knowledge, context.tasks) == ([], [])
+    assert "No knowledge entries yet." in context.user_prompt
+    assert "No tasks found." in context.user_prompt
+
+
+def test_most_relevant_sentence_is_kept_first():
+    content = f"{FILLER} The scholarship essay is due Friday. {FILLER}"
+    # room for the one sentence and its " [...]" marker, not for the filler
+    budget = fitting([note(0, "The scholarship essay is due Friday.")], []) + 2
+    context = ContextBuilder(budget=budget).build(PROMPT, [note(0, content)], [])
+    assert "- [note-0] Note 0 (untagged): The scholarship essay is due Friday. [...]" in (
+        context.user_prompt
+    )
+    assert FILLER not in context.user_prompt
+
+
+def test_sentences_keep_document_order_when_there_is_room():
+    content = f"{FILLER} The scholarship essay is due Friday. {FILLER}"
+    context = ContextBuilder(budget=10_000).build(PROMPT, [note(0, content)], [])
+    assert f"(untagged): {content}\n" in context.user_prompt
+    assert "[...]" not in context.user_prompt
+
+
+def test_leftover_budget_is_shared_between_items():
+    sentences = [f"Sentence {number} about campus parking permits." for number in range(20)]
+    long_note = note(0, " ".join(sentences))
+    short_note = note(1, " ".join(sentences[:4]))
+    budget = fitting([note(0, " ".join(sentences[:6])), short_note], [])
+    context = ContextBuilder(budget=budget).build(PROMPT, [long_note, short_note], [])
+    lines = context.user_prompt.splitlines()
+    [long_line] = [line for line in lines if line.startswith("- [note-0]")]
+    [short_line] = [line for line in lines if line.startswith("- [note-1]")]
+    assert long_line.endswith("[...]")
+    assert short_line.endswith(sentences[3])  # the long note did not crowd it out
+
+
+def test_run_on_sentences_are_shortened():
+    run_on = " ".join(["word"] * 400)
+    context = ContextBuilder(budget=10_000).build(PROMPT, [note(0, run_on)], [])
+    [line] = [line for line in context.user_prompt.splitlines() if line.startswith("- [note-0]")]
+    body = line.split("(untagged): ", 1)[1]
+    assert len(body) <= MAX_SENTENCE_CHARS
+    assert body.endswith(" [...]")
+
+
+@pytest.mark.parametrize("budget", [300, 900])
+def test_history_gets_at_most_a_third_of_the_budget(budget):
+    history = [f"user: question {number:02d} " + FILLER for number in range(40)]
+    context = ContextBuilder(budget=budget).build(PROMPT, [], [], history)
+    kept = context.user_prompt.split("Conversation so far:\n", 1)[1].split("\n\n", 1)[0]
+    kept_lines = kept.splitlines()
+    assert sum(estimate_tokens(line) + 1 for line in kept_lines) <= budget // 3
+    assert kept_lines == history[-len(kept_lines) :]  # the oldest lines are dropped
+    assert len(kept_lines) < len(history)
+
+
+def test_oversized_last_message_is_shortened_not_dropped():
+    message = "user: " + " ".join([FILLER] * 30)
+    context = ContextBuilder(budget=300).build(PROMPT, [], [], ["user: earlier", message])
+    kept = context.user_prompt.split("Conversation so far:\n", 1)[1].split("\n\n", 1)[0]
+    assert "user: earlier" not in kept
+    assert kept.startswith("user: Bring a pen")
+    assert kept.endswith(" [...]")
+    assert estimate_tokens(kept) <= 300 // 3
+
+
+def test_no_history_section_without_history():
+    context = ContextBuilder().build(PROMPT, [], [])
+    assert "Conversation so far" not in context.user_prompt
+    assert context.user_prompt.startswith(f"Question: {PROMPT}\n")
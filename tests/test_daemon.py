@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import os
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from campus_connect_portal import daemon
+from campus_connect_portal.storage import Storage
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs Unix sockets")
+
+SRC = Path(daemon.__file__).resolve().parents[1]
+
+
+def _fake_daemon(socket_path: Path, handle) -> socketserver.UnixStreamServer:
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self) -> None:
+            handle(self)
+
+    server = socketserver.UnixStreamServer(str(socket_path), Handler)
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    # AF_UNIX paths are limited to ~100 bytes; pytest's tmp_path can exceed that.
+    path = Path(f"/tmp/cc-test-{os.getpid()}-{time.monotonic_ns()}.sock")
+    yield path
+    path.unlink(missing_ok=True)
+
+
+def test_no_daemon_falls_back(socket_path):
+    assert daemon.forward(["list-tasks"], socket_path) is None
+
+
+def test_busy_daemon_falls_back_without_sending(socket_path, monkeypatch):
+    monkeypatch.setattr(daemon, "READY_TIMEOUT", 0.1)
+    release = threading.Event()
+    received = []
+
+    def handle(handler):
+        release.wait(5)  # busy: never greets this client in time
+        received.append(handler.rfile.readline())
+
+    server = _fake_daemon(socket_path, handle)
+    try:
+        assert daemon.forward(["add-task", "--title", "x"], socket_path) is None
+        release.set()
+        time.sleep(0.1)
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert received == [b""]
+
+
+def test_hangup_after_sending_is_an_error(socket_path, capsys):
+    def handle(handler):
+        handler.wfile.write(b'{"ready": true}\n')
+        handler.rfile.readline()  # take the request, then drop the connection
+
+    server = _fake_daemon(socket_path, handle)
+    try:
+        code = daemon.forward(["add-task", "--title", "x"], socket_path)
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert code == 1
+    assert "before the command finished" in capsys.readouterr().err
+
+
+def test_forwarded_commands_run_once_and_stream_output(tmp_path, socket_path):
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(SRC),
+        "CAMPUS_CONNECT_STATE_DIR": str(tmp_path),
+        "CAMPUS_CONNECT_DAEMON_SOCKET": str(socket_path),
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "campus_connect_portal.cli", "daemon"],
+        env=env,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        assert "listening" in server.stdout.readline()
+        for n in range(3):
+            args = ["add-task", "--title", f"Task {n}", "--description", "d"]
+            assert daemon.forward(args, socket_path) == 0
+        listing = subprocess.run(
+            [sys.executable, "-m", "campus_connect_portal.cli", "list-tasks", "--all"],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    finally:
+        server.terminate()
+        server.wait(5)
+    assert listing.stdout.count("Task ") == 3
+    with Storage(tmp_path / "state.db") as storage:
+        assert len(storage.fetch_tasks()) == 3
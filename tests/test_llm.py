@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from campus_connect_portal import llm
+from campus_connect_portal.aio import AsyncStorage
+from campus_connect_portal.cache import ResponseCache
+from campus_connect_portal.llm import CircuitBreaker, LLMClient
+from fake_openai import Reply
+
+PROMPT = "Question: what next?\n\nKnowledge entries:\n- [k1] FAFSA due soon\n"
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(llm, "LLM_BACKOFF_BASE", 0.001)
+
+
+def make_client(server, *, max_retries=2, threshold=3, cooldown=0.2, timeout=1.0) -> LLMClient:
+    client = LLMClient(
+        timeout=timeout,
+        max_retries=max_retries,
+        breaker=CircuitBreaker(threshold=threshold, cooldown=cooldown),
+    )
+    client._client = server.client(timeout)
+    return client
+
+
+def trip(client: LLMClient, server) -> None:
+    server.default = Reply(status=503)
+    for _ in range(client.breaker.threshold):
+        client.respond("system", PROMPT)
+    assert client.breaker.state == "open"
+
+
+def test_retries_503_then_succeeds(fake_openai):
+    fake_openai.queue(Reply(status=503), Reply(status=503))
+    client = make_client(fake_openai)
+    assert client.respond("system", PROMPT) == "served"
+    assert fake_openai.hits == 3
+    assert client.stats.retries == 2
+    assert client.breaker.state == "closed"
+
+
+def test_non_retryable_status_falls_back_immediately(fake_openai):
+    fake_openai.queue(Reply(status=400))
+    client = make_client(fake_openai)
+    assert client.respond("system", PROMPT).startswith("Knowledge insights")
+    assert fake_openai.hits == 1
+
+
+@pytest.mark.parametrize("status", [503, 429])
+def test_retry_after_is_honoured(fake_openai, status):
+    fake_openai.queue(Reply(status=status, headers={"Retry-After": "0.3"}))
+    client = make_client(fake_openai)
+    started = time.perf_counter()
+    assert client.respond("system", PROMPT) == "served"
+    assert time.perf_counter() - started >= 0.3
+    assert fake_openai.hits == 2
+
+
+def test_breaker_opens_after_threshold_and_short_circuits(fake_openai):
+    client = make_client(fake_openai, max_retries=0, threshold=3, cooldown=30)
+    trip(client, fake_openai)
+    assert fake_openai.hits == 3
+    assert client.breaker.times_opened == 1
+
+    started = time.perf_counter()
+    answer = client.respond("system", PROMPT)
+    assert answer.startswith("Knowledge insights")  # heuristic fallback
+    assert time.perf_counter() - started < 0.1
+    assert fake_openai.hits == 3
+    assert client.stats.short_circuits == 1
+    assert client.breaker.retry_in() > 0
+
+
+def test_half_open_trial_closes_on_success(fake_openai):
+    client = make_client(fake_openai, max_retries=0)
+    trip(client, fake_openai)
+    time.sleep(client.breaker.cooldown)
+    fake_openai.default = Reply()
+    assert client.respond("system", PROMPT) == "served"
+    assert client.breaker.state == "closed"
+    assert client.breaker.consecutive_failures == 0
+
+
+def test_half_open_trial_reopens_on_failure(fake_openai):
+    client = make_client(fake_openai, max_retries=0)
+    trip(client, fake_openai)
+    time.sleep(client.breaker.cooldown)
+    hits = fake_openai.hits
+    client.respond("system", PROMPT)
+    assert fake_openai.hits == hits + 1  # exactly one trial request
+    assert client.breaker.state == "open"
+    assert client.breaker.times_opened == 2
+    client.respond("system", PROMPT)
+    assert fake_openai.hits == hits + 1
+
+
+def test_abandoned_stream_trial_does_not_wedge_breaker(fake_openai):
+    client = make_client(fake_openai, max_retries=0)
+    trip(client, fake_openai)
+    time.sleep(client.breaker.cooldown)
+    fake_openai.default = Reply(text="take the practice exam")
+    stream = client.stream("system", PROMPT)
+    assert next(stream) == "take"
+    assert client.breaker.state == "half_open"
+    stream.close()
+    assert client.breaker.state == "open"
+    time.sleep(client.breaker.cooldown)
+    assert "".join(client.stream("system", PROMPT)) == "takethepracticeexam"
+    assert client.breaker.state == "closed"
+
+
+def test_half_open_breaker_retries_after_unsettled_trial():
+    breaker = CircuitBreaker(threshold=1, cooldown=0.1)
+    breaker.record_failure()
+    time.sleep(0.1)
+    assert breaker.allow()  # the trial starts and never reports back
+    assert not breaker.allow()
+    time.sleep(0.1)
+    assert breaker.allow()
+
+
+def test_async_cache_calls_use_the_storage_pool(fake_openai, storage):
+    cache = ResponseCache(storage)
+    threads = []
+    for name in ("get", "put"):
+        method = getattr(cache, name)
+
+        def traced(*args, _method=method):
+            threads.append(threading.current_thread().name)
+            return _method(*args)
+
+        setattr(cache, name, traced)
+    client = make_client(fake_openai)
+    client.cache = cache
+    async_storage = AsyncStorage(storage, max_workers=1)
+
+    async def ask_twice():
+        for _ in range(2):
+            answer = await client.respond_async(
+                "system", PROMPT, executor=async_storage.executor
+            )
+            assert answer == "served"
+
+    asyncio.run(ask_twice())
+    async_storage.executor.shutdown(wait=True)
+    assert fake_openai.hits == 1
+    assert len(threads) == 3  # miss, store, hit
+    assert all(name.startswith("campus-connect-db") for name in threads)
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from campus_connect_portal.memory import SUMMARY_SNIPPET_CHARS, ConversationMemory
+from campus_connect_portal.models import ChatMessage
+
+
+def converse(memory: ConversationMemory, turns: int) -> None:
+    for number in range(turns):
+        memory.add("user", f"question {number}")
+        memory.add("assistant", f"answer {number}")
+
+
+def test_recent_turns_are_kept_verbatim():
+    memory = ConversationMemory("s", max_turns=2)
+    converse(memory, 2)
+    assert memory.lines() == [
+        "user: question 0",
+        "assistant: answer 0",
+        "user: question 1",
+        "assistant: answer 1",
+    ]
+
+
+def test_older_turns_fold_into_the_summary():
+    memory = ConversationMemory("s", max_turns=2)
+    converse(memory, 3)
+    assert memory.lines() == [
+        "Earlier: user: question 0 assistant: answer 0",
+        "user: question 1",
+        "assistant: answer 1",
+        "user: question 2",
+        "assistant: answer 2",
+    ]
+
+
+def test_folded_messages_are_shortened():
+    memory = ConversationMemory("s", max_turns=1)
+    memory.add("user", "word " * 100)
+    converse(memory, 1)
+    summary = memory.lines()[0]
+    assert summary.startswith("Earlier: user: word word")
+    assert summary.endswith(" [...]")
+    assert len(summary) <= len("Earlier: user: ") + SUMMARY_SNIPPET_CHARS
+
+
+def test_summary_is_capped_dropping_the_oldest():
+    memory = ConversationMemory("s", max_turns=1, summary_chars=100)
+    converse(memory, 50)
+    summary, *window = memory.lines()
+    assert window == ["user: question 49", "assistant: answer 49"]
+    assert len(summary) <= len("Earlier: ") + 100
+    assert summary.endswith("user: question 48 assistant: answer 48")
+    assert "question 0 " not in summary
+
+
+def test_a_single_oversized_snippet_is_kept():
+    memory = ConversationMemory("s", max_turns=1, summary_chars=20)
+    memory.add("user", "x" * 60)
+    converse(memory, 1)
+    assert memory.lines()[0] == "Earlier: user: " + "x" * 60
+
+
+def test_window_is_loaded_from_storage_oldest_first(storage):
+    for number in range(4):
+        for role, content in (("user", f"question {number}"), ("assistant", f"answer {number}")):
+            created_at = f"2025-11-30T12:00:0{number}.{role == 'assistant':d}+00:00"
+            message = ChatMessage(session_id="s", role=role, content=content, created_at=created_at)
+            storage.insert_chat_message(message.to_row())
+    storage.insert_chat_message(ChatMessage(session_id="other", role="user", content="x").to_row())
+
+    memory = ConversationMemory("s", storage, max_turns=2)
+    assert memory.lines() == [
+        "user: question 2",
+        "assistant: answer 2",
+        "user: question 3",
+        "assistant: answer 3",
+    ]
+    with storage.connection() as conn:
+        conn.execute("DELETE FROM chat_messages")
+    memory.add("user", "question 4")  # later turns stay in memory
+    assert memory.lines()[-1] == "user: question 4"
+    assert len(memory.lines()) == 5  # the summary plus the four-message window
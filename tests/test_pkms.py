@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import sys
+import threading
+
+from campus_connect_portal import pkms
+from campus_connect_portal.models import KnowledgeEntry
+from campus_connect_portal.pkms import KnowledgeBase
+from campus_connect_portal.search_index import InvertedIndex
+from campus_connect_portal.storage import Storage
+
+
+def add(
+    index: InvertedIndex, doc_id: str, title: str, content: str = "", at: str = "2025-01-01"
+) -> None:
+    index.add(doc_id, title=title, content=content, tags=None, updated_at=at)
+
+
+def test_reindexing_keeps_bm25_scores_positive_and_ordered():
+    index = InvertedIndex()
+    for n in range(39):
+        add(index, f"d{n}", "advising", "office hours")
+    add(index, "d39", "advising", "advising advising")  # higher term frequency
+    for n in range(39):  # the normal note-update path tombstones the old postings
+        add(index, f"d{n}", "advising", "office hours")
+    hits = index.search("advising", 40)
+    assert len(hits) == 40
+    assert all(score > 0 for _, score in hits)
+    assert hits[0][0] == "d39"
+
+
+def test_index_survives_a_bytes_round_trip():
+    index = InvertedIndex()
+    add(index, "a", "Financial aid deadline", "Submit the FAFSA", at="2025-01-01")
+    add(index, "b", "Parking permit", "Renew before March", at="2025-01-02")
+    add(index, "a", "Financial aid deadline", "Submit the FAFSA by March", at="2025-01-03")
+    restored = InvertedIndex.from_bytes(index.to_bytes())
+    assert restored.watermark == "2025-01-03"
+    assert len(restored) == 2
+    assert restored.search("march", 5) == index.search("march", 5)
+    assert InvertedIndex.from_bytes(b"not an index") is None
+
+
+def knowledge_base(path) -> KnowledgeBase:
+    storage = Storage(path)
+    storage.has_fts = False  # exercise the in-process index
+    return KnowledgeBase(storage)
+
+
+def test_persisted_index_catches_up_with_later_writes(tmp_path, monkeypatch):
+    path = tmp_path / "state.db"
+    first = knowledge_base(path)
+    first.add_entry(title="Advising hold", content="Meet your advisor")
+    assert [entry.title for entry in first.search("advisor")] == ["Advising hold"]
+    persisted = InvertedIndex.from_bytes(first.storage.load_search_index(pkms.INDEX_NAME))
+    watermark = persisted.watermark
+
+    # Another process adds a note; this one starts from the persisted copy.
+    later = knowledge_base(path).add_entry(title="Advisor office moved", content="Room 210")
+    monkeypatch.delitem(pkms._LOADED_INDEXES, first.storage.db_path)
+    second = knowledge_base(path)
+    assert {entry.title for entry in second.search("advisor")} == {
+        "Advising hold",
+        "Advisor office moved",
+    }
+    persisted = InvertedIndex.from_bytes(second.storage.load_search_index(pkms.INDEX_NAME))
+    assert persisted.watermark == later.updated_at > watermark
+
+    # A deletion the index never saw forces a rebuild instead of stale hits.
+    second.storage.delete_knowledge([later.id])
+    monkeypatch.delitem(pkms._LOADED_INDEXES, second.storage.db_path)
+    assert [entry.title for entry in knowledge_base(path).search("advisor")] == ["Advising hold"]
+
+
+def test_index_search_is_safe_during_compaction(storage):
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # switch threads as often as possible
+    knowledge_base = KnowledgeBase(storage)
+    storage.has_fts = False  # exercise the in-process index
+    knowledge_base.search("advising")
+    stop = threading.Event()
+    errors: list[BaseException] = []
+
+    def churn() -> None:
+        try:
+            for round_ in range(30):
+                entries = [
+                    KnowledgeEntry(
+                        title=f"Advising note {round_}-{n}",
+                        content="Meet your advisor about course registration",
+                    )
+                    for n in range(80)
+                ]
+                knowledge_base.add_entries(entries)
+                knowledge_base.remove_entries(entry.id for entry in entries)  # compacts
+        finally:
+            stop.set()
+
+    def search() -> None:
+        try:
+            while not stop.is_set():
+                knowledge_base.search("advising registration", limit=3)
+        except BaseException as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=churn), threading.Thread(target=search)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    assert errors == []
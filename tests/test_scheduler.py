@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from datetime import date
+
+import pytest
+
+from campus_connect_portal.config import TASK_PRIORITIES
+from campus_connect_portal.scheduler import describe_due, normalize_due_date, schedule_key
+from campus_connect_portal.tasks import TaskManager
+
+CREATED = "2025-11-01T12:00:00+00:00"
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "2025-11-30",
+        "2025-11-30T09:00:00+00:00",
+        "2025/11/30",
+        "11/30/2025",
+        "11/30/25",
+        "Nov 30, 2025",
+        "Nov 30 2025",
+        "November 30, 2025",
+        "November 30 2025",
+        "30 Nov 2025",
+        "30 November 2025",
+        "  Nov  30,\t2025 ",
+    ],
+)
+def test_supported_due_date_formats(text):
+    assert normalize_due_date(text) == "2025-11-30"
+
+
+@pytest.mark.parametrize(
+    "text", [None, "", "next week", "2025-13-01", "31/12/2025", "Nov 31, 2025"]
+)
+def test_unparseable_due_dates(text):
+    assert normalize_due_date(text) is None
+
+
+def key(due_date, priority="medium", status="todo", created_at=CREATED):
+    return schedule_key(due_date, priority, status, created_at)
+
+
+def test_done_tasks_are_not_scheduled():
+    assert key("2025-11-30", status="done") is None
+
+
+def test_priority_lead_days_and_tie_break():
+    # critical earns 14 days of lead, low none: same effective day, critical first
+    assert key("2025-12-14", "critical") < key("2025-11-30", "low") < key("2025-12-14", "high")
+    days = len(TASK_PRIORITIES)  # keys step by this much per effective day
+    assert key("2025-12-14", "critical") // days == key("2025-11-30", "low") // days
+    # on the same due date a higher priority always comes first
+    keys = [key("2025-11-30", priority) for priority in ("critical", "high", "medium", "low")]
+    assert keys == sorted(keys)
+
+
+def test_status_lead_days():
+    due = "2025-11-30"
+    assert key(due, status="in_progress") < key(due) < key(due, status="blocked")
+    # blocked work is pushed back a week
+    assert key(due, status="blocked") == key("2025-12-07")
+
+
+def test_undated_tasks_count_as_due_two_weeks_after_creation():
+    assert key(None) == key("2025-11-15")
+    assert key("whenever") == key(None)
+    assert key(None, created_at="garbage") > key("9999-12-30")
+
+
+def test_next_tasks_ranking(storage):
+    manager = TaskManager(storage)
+    add = manager.add_task
+    add(title="Done", description="d", status="done", priority="critical", due_date="2020-01-01")
+    add(title="Later low", description="d", priority="low", due_date="2099-01-10")
+    add(title="Soon", description="d", priority="low", due_date="2099-01-01")
+    add(title="Critical", description="d", priority="critical", due_date="2099-01-14")
+    add(title="Started", description="d", status="in_progress", due_date="2099-01-06")
+    add(title="Blocked", description="d", status="blocked", priority="low", due_date="2098-12-27")
+    add(title="Spelled out", description="d", priority="low", due_date="Jan 5, 2099")
+    # effective day = due date - priority lead - status lead; ties go to higher priority
+    assert [task.title for task in manager.next_tasks(10)] == [
+        "Critical",  # 2099-01-14 - 14 = 2098-12-31
+        "Started",  # 2099-01-06 - 3 (medium) - 2 (in progress) = 2099-01-01
+        "Soon",  # 2099-01-01, same day but low priority
+        "Blocked",  # 2098-12-27 + 7 = 2099-01-03
+        "Spelled out",  # 2099-01-05
+        "Later low",  # 2099-01-10
+    ]
+    assert [task.title for task in manager.next_tasks(2)] == ["Critical", "Started"]
+
+
+@pytest.mark.parametrize(
+    "due_date, label",
+    [
+        (None, "no due date"),
+        ("someday", "due someday, unparsed"),
+        ("2025-11-30", "due 2025-11-30, today"),
+        ("Dec 1, 2025", "due 2025-12-01, in 1 day"),
+        ("12/3/2025", "due 2025-12-03, in 3 days"),
+        ("2025-11-29", "due 2025-11-29, 1 day overdue"),
+        ("2025-11-20", "due 2025-11-20, 10 days overdue"),
+    ],
+)
+def test_describe_due(due_date, label):
+    assert describe_due(due_date, today=date(2025, 11, 30)) == label
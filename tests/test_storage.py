@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from campus_connect_portal import storage as storage_module
+from campus_connect_portal.config import DB_PROFILES
+from campus_connect_portal.models import ChatMessage, KnowledgeEntry, PortalRecord, Task
+from campus_connect_portal.storage import SCHEMA_VERSION, Storage
+from campus_connect_portal.sync import import_records
+
+INDEXED_TABLES = ("knowledge_entries", "tasks", "chat_messages", "portal_records")
+
+# Schema written by the releases before numbered migrations (user_version 0).
+LEGACY_SCHEMA = """
+CREATE TABLE knowledge_entries (
+    id TEXT PRIMARY KEY, title TEXT NOT NULL, content TEXT NOT NULL, tags TEXT,
+    campus_area TEXT, source TEXT, created_at TEXT NOT NULL, updated_at TEXT NOT NULL
+);
+CREATE TABLE tasks (
+    id TEXT PRIMARY KEY, title TEXT NOT NULL, description TEXT NOT NULL,
+    status TEXT NOT NULL, priority TEXT NOT NULL, due_date TEXT, related_entry_id TEXT,
+    created_at TEXT NOT NULL, updated_at TEXT NOT NULL,
+    FOREIGN KEY (related_entry_id) REFERENCES knowledge_entries(id) ON DELETE SET NULL
+);
+CREATE TABLE chat_messages (
+    id TEXT PRIMARY KEY, session_id TEXT NOT NULL, role TEXT NOT NULL,
+    content TEXT NOT NULL, citations TEXT, created_at TEXT NOT NULL
+);
+CREATE TABLE portal_records (
+    id TEXT PRIMARY KEY, record_id TEXT NOT NULL, course TEXT, component TEXT NOT NULL,
+    grade TEXT, points TEXT, campus_area TEXT, needs_follow_up INTEGER NOT NULL DEFAULT 0,
+    notes TEXT, updated_at TEXT NOT NULL
+);
+"""
+
+
+def _seed(storage: Storage) -> None:
+    storage.upsert_knowledge_many(
+        KnowledgeEntry(title=f"Note {i}", content="FAFSA deadline", tags=["aid"]).to_row()
+        for i in range(20)
+    )
+    storage.upsert_tasks(
+        Task(title=f"Task {i}", description="Email advisor", due_date="2025-11-30").to_row()
+        for i in range(20)
+    )
+    for i in range(20):
+        storage.insert_chat_message(ChatMessage(session_id="s1", role="user", content="hi").to_row())
+
+
+def _traced_selects(storage: Storage, call) -> list[str]:
+    statements: list[str] = []
+    with storage.connection() as conn:
+        conn.set_trace_callback(statements.append)
+        try:
+            result = call()
+            if not isinstance(result, (list, set, str, type(None), sqlite3.Row)):
+                list(result)  # drain iterators so every chunk query runs
+        finally:
+            conn.set_trace_callback(None)
+    return [sql for sql in statements if sql.lstrip().upper().startswith("SELECT")]
+
+
+def test_read_helpers_use_indexes(storage):
+    _seed(storage)
+    task = Task.from_row(storage.fetch_tasks(limit=1)[0])
+    note = KnowledgeEntry.from_row(storage.fetch_knowledge(limit=1)[0])
+    calls = {
+        "fetch_knowledge": lambda: storage.fetch_knowledge(limit=5),
+        "fetch_knowledge_updated_since": lambda: storage.fetch_knowledge_updated_since(
+            note.updated_at
+        ),
+        "fetch_knowledge_by_ids": lambda: storage.fetch_knowledge_by_ids([note.id]),
+        "iter_knowledge": lambda: storage.iter_knowledge(chunk_size=7),
+        "iter_knowledge_after": lambda: storage.iter_knowledge(
+            after=(note.updated_at, note.id), chunk_size=7
+        ),
+        "fetch_tasks": lambda: storage.fetch_tasks(limit=5),
+        "fetch_tasks_status": lambda: storage.fetch_tasks(status="todo", limit=5),
+        "fetch_task": lambda: storage.fetch_task(task.id),
+        "fetch_task_by_title": lambda: storage.fetch_task_by_title(task.title),
+        "fetch_recent_tasks": lambda: storage.fetch_recent_tasks(5, [task.id], open_only=True),
+        "fetch_next_tasks": lambda: storage.fetch_next_tasks(5),
+        "iter_tasks": lambda: storage.iter_tasks(chunk_size=7),
+        "iter_tasks_status": lambda: storage.iter_tasks(
+            status="todo", after=(task.updated_at, task.id), chunk_size=7
+        ),
+        "fetch_chat_history": lambda: storage.fetch_chat_history("s1", limit=5),
+        "iter_chat_history": lambda: storage.iter_chat_history("s1", chunk_size=7),
+        "fetch_portal_records": lambda: storage.fetch_portal_records(["r1"]),
+    }
+    for name, call in calls.items():
+        selects = _traced_selects(storage, call)
+        assert selects, name
+        with storage.connection() as conn:
+            for sql in selects:
+                plan = [row["detail"] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+                assert not any("TEMP B-TREE" in step for step in plan), (name, plan)
+                for step in plan:
+                    if any(f" {table}" in step for table in INDEXED_TABLES):
+                        assert "USING" in step, (name, plan)
+
+
+def test_legacy_database_upgrades_to_current_schema(tmp_path):
+    path = tmp_path / "legacy.db"
+    conn = sqlite3.connect(path)
+    conn.executescript(LEGACY_SCHEMA)
+    conn.executemany(
+        "INSERT INTO portal_records VALUES (?, ?, 'CSC 394', 'Exam', ?, NULL, 'Grades', 1, NULL, ?)",
+        [
+            ("a", "r1", "B", "2025-01-01T00:00:00+00:00"),
+            ("b", "r1", "A", "2025-02-01T00:00:00+00:00"),
+            ("c", "r2", "C", "2025-01-01T00:00:00+00:00"),
+        ],
+    )
+    conn.execute(
+        "INSERT INTO tasks VALUES ('t1', 'Pay tuition', 'Bursar', 'todo', 'high', '11/30/2025',"
+        " NULL, '2025-01-01T00:00:00+00:00', '2025-01-01T00:00:00+00:00')"
+    )
+    conn.commit()
+    conn.close()
+
+    storage = Storage(path, persistent=True)
+    try:
+        with storage.connection() as conn:
+            assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+            records = conn.execute(
+                "SELECT id, grade FROM portal_records ORDER BY record_id"
+            ).fetchall()
+            assert [tuple(row) for row in records] == [("b", "A"), ("c", "C")]
+            task = conn.execute("SELECT due_key, schedule_key FROM tasks").fetchone()
+            assert task["due_key"] == "2025-11-30"
+            assert task["schedule_key"] is not None
+        assert [row["id"] for row in storage.fetch_next_tasks()] == ["t1"]
+    finally:
+        storage.close()
+
+
+def _trace_connections(monkeypatch) -> tuple[list, list[str]]:
+    connects: list = []
+    statements: list[str] = []
+    connect = Storage._connect
+
+    def traced(self):
+        conn = connect(self)  # connection setup PRAGMAs are not schema work
+        conn.set_trace_callback(statements.append)
+        connects.append(conn)
+        return conn
+
+    monkeypatch.setattr(Storage, "_connect", traced)
+    return connects, statements
+
+
+def test_schema_is_checked_once_per_process(tmp_path, monkeypatch):
+    path = tmp_path / "state.db"
+    Storage(path).close()
+    connects, statements = _trace_connections(monkeypatch)
+
+    Storage(path).close()
+    assert connects == []
+    assert statements == []
+
+    # a new process has no record of the migration: one version read, no DDL
+    monkeypatch.setattr(storage_module, "_MIGRATED", {})
+    Storage(path).close()
+    assert len(connects) == 1
+    # SQLite also traces the pragma's own virtual-table read as a "--" comment
+    issued = [sql for sql in statements if not sql.startswith("--")]
+    assert len(issued) == 1
+    assert "pragma_user_version" in issued[0]
+
+
+PRAGMA_CODES = {
+    "synchronous": {"OFF": 0, "NORMAL": 1, "FULL": 2, "EXTRA": 3},
+    "temp_store": {"DEFAULT": 0, "FILE": 1, "MEMORY": 2},
+}
+
+
+@pytest.mark.parametrize("profile", sorted(DB_PROFILES))
+def test_profile_pragmas_are_applied(tmp_path, profile):
+    storage = Storage(tmp_path / "state.db", persistent=True, profile=profile)
+    try:
+        with storage.connection() as conn:
+            for pragma, expected in DB_PROFILES[profile].items():
+                actual = conn.execute(f"PRAGMA {pragma}").fetchone()[0]
+                if isinstance(expected, str):
+                    expected = PRAGMA_CODES.get(pragma, {}).get(expected, expected.lower())
+                assert actual == expected, pragma
+    finally:
+        storage.close()
+
+
+def test_reader_is_not_blocked_during_seed(tmp_path):
+    path = tmp_path / "state.db"
+    writer = Storage(path, persistent=True)
+    records = [
+        PortalRecord(
+            record_id=f"r{i}",
+            course="CSC 394",
+            component=f"Assignment {i}",
+            grade=None,
+            points=None,
+            campus_area="Grades",
+            needs_follow_up=True,
+            notes="Check rubric",
+        )
+        for i in range(200)
+    ]
+    written, release = threading.Event(), threading.Event()
+
+    def seed() -> None:
+        with writer.connection() as conn:  # one open write transaction for the whole import
+            # a tiny page cache makes the import spill dirty pages mid-transaction,
+            # which takes an exclusive lock on rollback-journal databases
+            conn.execute("PRAGMA cache_size = 2")
+            import_records(writer, records)
+            written.set()
+            release.wait(timeout=10)
+
+    seeder = threading.Thread(target=seed)
+    seeder.start()
+    try:
+        assert written.wait(timeout=10)
+        reader = Storage(path)
+        with ThreadPoolExecutor(1) as pool:
+            started = time.perf_counter()
+            rows = pool.submit(reader.fetch_knowledge, 10).result(timeout=1)
+            assert time.perf_counter() - started < 0.5
+        assert rows == []  # the uncommitted seed is invisible, not blocking
+    finally:
+        release.set()
+        seeder.join()
+        writer.close()
+    assert len(reader.fetch_knowledge(limit=500)) == 200
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 500])
+def test_keyset_cursor_resumes_between_rows_with_equal_timestamps(storage, chunk_size):
+    stamps = ["2025-11-01T08:00:00", "2025-11-02T08:00:00", "2025-11-02T08:00:00"]
+    tasks = [
+        Task(title=f"T{n}", description="d", id=f"id-{n}", updated_at=stamp)
+        for n, stamp in enumerate(stamps + ["2025-11-03T08:00:00"])
+    ]
+    storage.upsert_tasks(task.to_row() for task in tasks)
+
+    def titles(after):
+        return [row["title"] for row in storage.iter_tasks(after=after, chunk_size=chunk_size)]
+
+    assert titles(None) == ["T0", "T1", "T2", "T3"]
+    cursor = storage_module.format_cursor(tasks[1].updated_at, tasks[1].id)
+    assert storage_module.parse_cursor(cursor) == (tasks[1].updated_at, tasks[1].id)
+    assert titles(storage_module.parse_cursor(cursor)) == ["T2", "T3"]
+    # a bare date starts at the beginning of that day, inclusive
+    assert titles(storage_module.parse_cursor("2025-11-02")) == ["T1", "T2", "T3"]
+
+
+@pytest.mark.parametrize("cursor", ["", ",id-1"])
+def test_parse_cursor_rejects_missing_timestamp(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        storage_module.parse_cursor(cursor)
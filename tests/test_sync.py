@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import io
+import json
+
+import pytest
+
+from campus_connect_portal import sync
+from campus_connect_portal.models import PortalRecord
+from campus_connect_portal.sync import (
+    import_records,
+    import_stream,
+    iter_payloads,
+    knowledge_entry_id,
+)
+
+PAYLOADS = [
+    {"record_id": "r1", "component": "Essay été", "points": -1.5e3, "flag": True},
+    {"record_id": "r2", "notes": 'quote " and \\ slash', "tags": ["a", {"b": None}]},
+    {"record_id": "r3", "component": "x" * 40, "flag": False},
+]
+
+
+def write(tmp_path, text: str, encoding: str = "utf-8"):
+    path = tmp_path / "export.json"
+    path.write_text(text, encoding=encoding, newline="")
+    return path
+
+
+class CountingReader(io.StringIO):
+    def __init__(self, text: str):
+        super().__init__(text)
+        self.reads = 0
+
+    def read(self, size: int = -1) -> str:
+        self.reads += 1
+        return super().read(size)
+
+
+@pytest.mark.parametrize("read_size", [1, 2, 3, 7, 64, 1 << 16])
+@pytest.mark.parametrize("separator", [",", ",\n  ", " , "])
+def test_array_items_split_across_reads(tmp_path, monkeypatch, read_size, separator):
+    monkeypatch.setattr(sync, "READ_SIZE", read_size)
+    text = "\n[ " + separator.join(json.dumps(item) for item in PAYLOADS) + " ]\n"
+    assert list(iter_payloads(write(tmp_path, text))) == PAYLOADS
+
+
+@pytest.mark.parametrize("text", ["[]", "  [ ]\n", "﻿[]"])
+def test_empty_array(tmp_path, text):
+    assert list(iter_payloads(write(tmp_path, text))) == []
+
+
+@pytest.mark.parametrize("read_size", [3, 1 << 16])
+def test_ndjson_with_crlf_and_blank_lines(tmp_path, monkeypatch, read_size):
+    monkeypatch.setattr(sync, "READ_SIZE", read_size)
+    text = "\r\n".join(json.dumps(item) for item in PAYLOADS) + "\r\n\r\n"
+    assert list(iter_payloads(write(tmp_path, text))) == PAYLOADS
+
+
+@pytest.mark.parametrize("as_array", [True, False])
+def test_byte_order_mark_is_ignored(tmp_path, as_array):
+    if as_array:
+        text = json.dumps(PAYLOADS)
+    else:
+        text = "\n".join(json.dumps(item) for item in PAYLOADS)
+    assert list(iter_payloads(write(tmp_path, text, encoding="utf-8-sig"))) == PAYLOADS
+
+
+@pytest.mark.parametrize(
+    "text, message",
+    [
+        ('[{"a": 1} {"b": 2}]', "expected ',' or ']'"),
+        ('[{"a": 1},, {"b": 2}]', "Expecting value"),
+        ('[{"a": 1},]', "Expecting value"),
+        ('[{"a": 1}, {"b": tru}]', "Expecting value"),
+        ('[{"a": 1}, {"b": 2}', "Truncated"),
+        ('[{"a": 1}, {"b": "unfinished', "Unterminated string"),
+    ],
+)
+def test_malformed_arrays_are_rejected(tmp_path, text, message):
+    with pytest.raises(ValueError, match=message):
+        list(iter_payloads(write(tmp_path, text)))
+
+
+def test_syntax_error_is_reported_without_reading_to_the_end(monkeypatch):
+    monkeypatch.setattr(sync, "READ_SIZE", 64)
+    tail = ", ".join(json.dumps(item) for item in PAYLOADS * 2000)
+    handle = CountingReader('{"b": tru}, ' + tail + "]")
+    with pytest.raises(ValueError, match="at character 17"):
+        list(sync._iter_json_array(handle, '{"a": 1}, ', offset=1))
+    assert handle.reads <= 2
+
+
+def records(*payloads: dict) -> list[PortalRecord]:
+    # from_dict assigns a fresh row id each time, as a reseed from the export does
+    return [PortalRecord.from_dict(payload) for payload in payloads]
+
+
+def portal_rows(storage) -> dict[str, dict]:
+    with storage.connection() as conn:
+        return {
+            row["record_id"]: dict(row) for row in conn.execute("SELECT * FROM portal_records")
+        }
+
+
+SNAPSHOT = [
+    {"record_id": "r1", "course": "CSC 101", "component": "Essay", "grade": "B"},
+    {"record_id": "r2", "course": "CSC 101", "component": "Quiz", "grade": "A"},
+    {
+        "record_id": "r3",
+        "component": "Loan counseling",
+        "campus_area": "Financial Aid",
+        "needs_follow_up": True,
+        "notes": "Finish entrance counseling",
+    },
+]
+
+
+def test_reseeding_the_same_snapshot_writes_nothing(storage):
+    first = import_records(storage, records(*SNAPSHOT))
+    assert (first.written, first.entries, first.tasks) == (3, 3, 1)
+    before = portal_rows(storage)
+
+    again = import_records(storage, records(*SNAPSHOT))
+    assert (again.written, again.entries, again.tasks) == (0, 0, 0)
+    assert portal_rows(storage) == before
+    assert storage.count_knowledge() == 3
+
+
+def test_changed_record_updates_its_row_and_note_in_place(storage):
+    import_records(storage, records(*SNAPSHOT))
+    before = portal_rows(storage)
+    changed = [dict(SNAPSHOT[0], grade="A-", notes="Regraded"), *SNAPSHOT[1:]]
+    new = {"record_id": "r4", "component": "Lab 1", "grade": "C"}
+
+    result = import_records(storage, records(*changed, new))
+    assert result.written == 2  # r1 and r4; the unchanged r2 and r3 are skipped
+    after = portal_rows(storage)
+    assert set(after) == {"r1", "r2", "r3", "r4"}
+    assert after["r1"]["id"] == before["r1"]["id"]
+    assert after["r1"]["grade"] == "A-"
+    assert after["r2"] == before["r2"]
+
+    [note] = storage.fetch_knowledge_by_ids([knowledge_entry_id("r1")])
+    assert note["content"] == "Regraded"
+    assert storage.count_knowledge() == 4
+
+
+def test_import_stream_classifies_changes_across_chunks(storage):
+    import_stream(storage, records(*SNAPSHOT))
+    update = [
+        dict(SNAPSHOT[0], grade="A"),
+        dict(SNAPSHOT[1], grade="A-", notes="Curved"),
+        {"record_id": "r5", "component": "Midterm", "grade": "B+"},
+    ]
+    result = import_stream(storage, records(*update), chunk_size=1)
+    assert (result.records, result.new, result.changed, result.unchanged) == (3, 1, 2, 0)
+    assert result.removed == 0  # without full_snapshot nothing is pruned
+    assert result.field_changes == {"grade": 2, "notes": 1}
+    assert result.summary() == "1 new, 2 changed (grade: 2, notes: 1), 0 removed, 0 unchanged"
+    assert set(portal_rows(storage)) == {"r1", "r2", "r3", "r5"}
+
+
+def test_full_snapshot_prunes_missing_records_and_their_notes(storage):
+    import_stream(storage, records(*SNAPSHOT))
+    tasks_before = storage.fetch_tasks()
+    assert len(tasks_before) == 1  # the r3 follow-up
+
+    result = import_stream(storage, records(SNAPSHOT[0]), chunk_size=1, full_snapshot=True)
+    assert (result.new, result.changed, result.removed, result.unchanged) == (0, 0, 2, 1)
+    assert result.summary() == "0 new, 0 changed, 2 removed, 1 unchanged"
+    assert set(portal_rows(storage)) == {"r1"}
+    remaining = storage.fetch_knowledge_by_ids([knowledge_entry_id(r) for r in ("r1", "r2", "r3")])
+    assert [row["id"] for row in remaining] == [knowledge_entry_id("r1")]
+    assert [row["id"] for row in storage.fetch_tasks()] == [row["id"] for row in tasks_before]
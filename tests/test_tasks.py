@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import pytest
+
+from campus_connect_portal.models import PortalRecord, Task
+from campus_connect_portal.scheduler import schedule_key
+from campus_connect_portal.tasks import TaskManager
+
+
+def test_scan_search_ignores_short_words(storage):
+    storage.has_task_fts = False  # exercise the substring scan
+    manager = TaskManager(storage)
+    manager.add_task(title="Download transcript", description="For the internship form")
+    manager.add_task(title="Renew parking permit", description="Lot C expires soon")
+    # "do" is only a substring of "Download" and "go" matches nothing, so the
+    # most recently updated open task fills the slot instead.
+    assert [task.title for task in manager.search_tasks("go do", limit=1)] == [
+        "Renew parking permit"
+    ]
+    assert [task.title for task in manager.search_tasks("the transcript", limit=1)] == [
+        "Download transcript"
+    ]
+
+
+def record(component: str, *, flagged: bool = True, area: str = "Grades") -> PortalRecord:
+    return PortalRecord(
+        record_id=f"r-{component}",
+        course="CSC 101",
+        component=component,
+        grade=None,
+        points=None,
+        campus_area=area,
+        needs_follow_up=flagged,
+        notes=f"Check {component}",
+    )
+
+
+def test_ensure_follow_up_tasks_creates_each_title_once(storage):
+    manager = TaskManager(storage)
+    manager.add_task(title="Follow up: Quiz 1", description="added by hand")
+    records = [
+        record("Quiz 1"),
+        record("Essay"),
+        record("Essay"),  # same title, one task
+        record("Loan counseling", area="Financial Aid"),
+        record("Lab 2", flagged=False),
+    ]
+    created = manager.ensure_follow_up_tasks(records)
+    assert sorted(task.title for task in created) == [
+        "Follow up: Essay",
+        "Follow up: Loan counseling",
+    ]
+    stored = {task.title: task for task in manager.list_tasks()}
+    assert set(stored) == {"Follow up: Quiz 1", "Follow up: Essay", "Follow up: Loan counseling"}
+    assert stored["Follow up: Quiz 1"].description == "added by hand"
+    assert stored["Follow up: Loan counseling"].priority == "high"
+    assert stored["Follow up: Essay"].priority == "medium"
+    assert {task.id for task in created} <= {task.id for task in stored.values()}
+
+    assert manager.ensure_follow_up_tasks(records) == []
+    assert len(manager.list_tasks()) == 3
+
+
+def test_insert_tasks_with_new_titles_skips_taken_titles(storage):
+    manager = TaskManager(storage)
+    existing = manager.add_task(title="Taken", description="d")
+    rows = [
+        Task(title="Taken", description="d").to_row(),
+        (first := Task(title="Fresh", description="first")).to_row(),
+        Task(title="Fresh", description="second").to_row(),
+    ]
+    assert storage.insert_tasks_with_new_titles(rows) == {first.id}
+    titles = sorted((task.title, task.description) for task in manager.list_tasks())
+    assert titles == [("Fresh", "first"), ("Taken", existing.description)]
+
+
+def task_rows(storage) -> dict[str, dict]:
+    with storage.connection() as conn:
+        return {row["title"]: dict(row) for row in conn.execute("SELECT * FROM tasks")}
+
+
+@pytest.fixture
+def board(storage):
+    manager = TaskManager(storage)
+    tasks = {
+        "Essay": manager.add_task(title="Essay", description="d", due_date="2025-11-30"),
+        "Quiz": manager.add_task(
+            title="Quiz", description="d", priority="high", due_date="11/30/2025"
+        ),
+        "Lab": manager.add_task(
+            title="Lab",
+            description="d",
+            status="in_progress",
+            priority="high",
+            due_date="2025-12-05",
+        ),
+        "Loan": manager.add_task(title="Loan", description="d", status="done", priority="low"),
+    }
+    return manager, tasks
+
+
+@pytest.mark.parametrize(
+    "filters, expected",
+    [
+        ({"ids": ["Essay", "Loan"]}, {"Essay", "Loan"}),
+        ({"where_status": "todo"}, {"Essay", "Quiz"}),
+        ({"where_priority": "high"}, {"Quiz", "Lab"}),
+        ({"due_from": "2025-12-01"}, {"Lab"}),
+        ({"due_to": "2025-11-30"}, {"Essay", "Quiz"}),  # "11/30/2025" is normalized
+        ({"due_from": "2025-11-30", "due_to": "2025-11-30"}, {"Essay", "Quiz"}),
+        ({"where_status": "todo", "where_priority": "high"}, {"Quiz"}),
+        ({"ids": ["Essay", "Quiz", "Lab"], "due_from": "2025-12-01"}, {"Lab"}),
+        ({"ids": []}, set()),
+    ],
+)
+def test_bulk_update_filters(board, filters, expected):
+    manager, tasks = board
+    if "ids" in filters:
+        filters["ids"] = [tasks[title].id for title in filters["ids"]]
+    assert manager.bulk_update(priority="critical", **filters) == len(expected)
+    rows = task_rows(manager.storage)
+    assert {title for title, row in rows.items() if row["priority"] == "critical"} == expected
+
+
+def test_bulk_update_skips_rows_that_already_hold_the_value(board):
+    manager, _ = board
+    before = task_rows(manager.storage)
+    assert manager.bulk_update(where_status="todo", priority="high") == 1  # Quiz already high
+    after = task_rows(manager.storage)
+    assert after["Essay"]["priority"] == "high"
+    assert after["Quiz"] == before["Quiz"]  # not even updated_at moved
+
+
+def test_bulk_update_recomputes_due_and_schedule_keys(board):
+    manager, tasks = board
+    assert manager.bulk_update(ids=[tasks["Quiz"].id], due_date="Dec 1, 2025") == 1
+    quiz = task_rows(manager.storage)["Quiz"]
+    assert (quiz["due_date"], quiz["due_key"]) == ("Dec 1, 2025", "2025-12-01")
+    assert quiz["schedule_key"] == schedule_key("Dec 1, 2025", "high", "todo", quiz["created_at"])
+
+    assert manager.bulk_update(ids=[tasks["Essay"].id], due_date="") == 1  # --set-due-date ''
+    essay = task_rows(manager.storage)["Essay"]
+    assert (essay["due_date"], essay["due_key"]) == (None, None)
+    assert essay["schedule_key"] == schedule_key(None, "medium", "todo", essay["created_at"])
+
+    assert manager.bulk_update(where_priority="high", status="done") == 2
+    rows = task_rows(manager.storage)
+    assert rows["Quiz"]["schedule_key"] is None and rows["Lab"]["schedule_key"] is None
+    assert rows["Lab"]["due_key"] == "2025-12-05"
+
+
+@pytest.mark.parametrize(
+    "kwargs, message",
+    [
+        ({"status": "done"}, "Refusing to update every task"),
+        ({"where_status": "todo"}, "Nothing to update"),
+        ({"where_status": "someday", "status": "done"}, "Status must be"),
+        ({"where_priority": "urgent", "status": "done"}, "Priority must be"),
+        ({"due_from": "11/30/2025", "status": "done"}, "ISO date"),
+        ({"where_status": "todo", "priority": "urgent"}, "Priority must be"),
+    ],
+)
+def test_bulk_update_rejects_bad_requests_before_writing(board, kwargs, message):
+    manager, _ = board
+    before = task_rows(manager.storage)
+    with pytest.raises(ValueError, match=message):
+        manager.bulk_update(**kwargs)
+    assert task_rows(manager.storage) == before